@@ -0,0 +1,130 @@
+# двухстадийное сопоставление: отбор кандидатов TF-IDF, переранжирование LaBSE
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from .matchers import fitted_matcher
+from .ranking import normalize_rows
+
+CANDIDATES = 50 # количество кандидатов, отбираемых первой стадией
+RERANK_MEMORY = 2 ** 26 # байт на промежуточный массив при переранжировании
+
+
+class Cascade:
+    """
+    Двухстадийное сопоставление товаров дилеров с каталогом.
+    Первая стадия - дешёвый разреженный поиск (TF-IDF по n-граммам очищенных
+    названий) отбирает candidates артикулов. Вторая стадия считает близость
+    эмбеддингов LaBSE только с названиями отобранных артикулов
+    (максимум по названиям артикула).
+    В timings накапливается время стадий: retrieve, embed и rerank (секунды).
+    """
+
+    def __init__(self, articles: list[str],
+                 cleaned_names: list[str],
+                 embeddings: np.ndarray,
+                 embed: Callable[[list[str]], np.ndarray],
+                 candidates: int = CANDIDATES,
+                 retriever: str = 'tfidf') -> None:
+        """
+        Parameters:
+        articles (list[str]): Артикулы товаров заказчика (по строке на название).
+        cleaned_names (list[str]): Очищенные названия в порядке articles.
+        embeddings (np.ndarray): Эмбеддинги названий в порядке articles.
+        embed (Callable[[list[str]], np.ndarray]): Функция получения эмбеддингов
+        названий дилеров.
+        candidates (int): Количество кандидатов первой стадии.
+        retriever (str): Модель первой стадии (см. ML/matchers.py).
+        """
+        articles, cleaned_names = list(articles), list(cleaned_names)
+        self.retriever = fitted_matcher(retriever, articles, cleaned_names)
+        self.candidates = candidates
+        self._embed = embed
+        self.embeddings = normalize_rows(embeddings)
+        self.timings = {'retrieve': 0.0, 'embed': 0.0, 'rerank': 0.0}
+
+        # строки эмбеддингов каждого артикула, нумерация артикулов как у retriever
+        entry_group, _ = pd.factorize(pd.Series(articles, dtype=object))
+        counts = np.bincount(entry_group, minlength=len(self.retriever.group_articles))
+        order = np.argsort(entry_group, kind='stable')
+        positions = np.arange(len(order)) - np.repeat(np.cumsum(counts) - counts, counts)
+        self.group_rows = np.full((len(counts), max(counts.max(initial=0), 1)), -1, dtype=np.int64)
+        self.group_rows[entry_group[order], positions] = order
+
+    def embed(self, cleaned_names: list[str]) -> np.ndarray:
+        """
+        Parameters:
+        cleaned_names (list[str]): Очищенные названия товаров дилеров.
+
+        Returns:
+        np.ndarray: Эмбеддинги названий (время учитывается в timings['embed']).
+        """
+        start = time.perf_counter()
+        embeddings = self._embed(cleaned_names)
+        self.timings['embed'] += time.perf_counter() - start
+        return embeddings
+
+    def shortlist(self, cleaned_names: list[str], candidates: int = None) -> np.ndarray:
+        """
+        Parameters:
+        cleaned_names (list[str]): Очищенные названия товаров дилеров.
+        candidates (int): Количество кандидатов, по умолчанию self.candidates.
+
+        Returns:
+        np.ndarray: Номера артикулов-кандидатов (в retriever.group_articles),
+        по строке на название.
+        """
+        start = time.perf_counter()
+        groups, _ = self.retriever.top_k_groups(cleaned_names, candidates or self.candidates)
+        self.timings['retrieve'] += time.perf_counter() - start
+        return groups
+
+    def rerank(self, queries: np.ndarray,
+               groups: np.ndarray,
+               quantity_int: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Parameters:
+        queries (np.ndarray): Эмбеддинги названий товаров дилеров.
+        groups (np.ndarray): Артикулы-кандидаты (результат shortlist).
+        quantity_int (int): Количество возвращаемых, наиболее подходящих товаров.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Артикулы и косинусная близость
+        по убыванию близости.
+        """
+        start = time.perf_counter()
+        queries = normalize_rows(queries)
+        quantity_int = min(quantity_int, groups.shape[1])
+        articles = np.empty((len(queries), quantity_int), dtype=object)
+        scores = np.empty((len(queries), quantity_int), dtype=np.float32)
+        # эмбеддинги кандидатов собираются кусками, чтобы ограничить память
+        chunk_size = max(1, RERANK_MEMORY // max(groups.shape[1] * self.group_rows.shape[1]
+                                                 * self.embeddings.shape[1] * 4, 1))
+        for chunk_start in range(0, len(queries), chunk_size):
+            chunk = slice(chunk_start, chunk_start + chunk_size)
+            rows = self.group_rows[groups[chunk]]
+            alias_scores = np.einsum('qcad,qd->qca', self.embeddings[rows], queries[chunk])
+            alias_scores[rows < 0] = -np.inf
+            candidate_scores = alias_scores.max(axis=2)
+            order = np.argsort(-candidate_scores, axis=1, kind='stable')[:, :quantity_int]
+            articles[chunk] = self.retriever.group_articles[np.take_along_axis(groups[chunk], order, axis=1)]
+            scores[chunk] = np.take_along_axis(candidate_scores, order, axis=1)
+        self.timings['rerank'] += time.perf_counter() - start
+        return articles, scores
+
+    def rank(self, queries: np.ndarray,
+             cleaned_names: list[str],
+             quantity_int: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Parameters:
+        queries (np.ndarray): Эмбеддинги названий товаров дилеров.
+        cleaned_names (list[str]): Очищенные названия в порядке queries.
+        quantity_int (int): Количество возвращаемых, наиболее подходящих товаров.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Артикулы и косинусная близость.
+        """
+        groups = self.shortlist(cleaned_names, max(self.candidates, quantity_int))
+        return self.rerank(queries, groups, quantity_int)
@@ -0,0 +1,196 @@
+# кэш эмбеддингов и результатов ранжирования для названий товаров дилеров
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from .embedding_store import write_matrix
+from .storage import data_path, read_index, save_versioned
+
+MAX_SIZE = 20000 # максимальное количество названий дилеров в кэше
+
+
+def catalogue_key(articles: list[str], cleaned_names: list[str],
+                  quantity_int: int, variant: str = '') -> str:
+    """
+    Parameters:
+    articles (list[str]): Артикулы товаров заказчика.
+    cleaned_names (list[str]): Очищенные названия товаров заказчика.
+    quantity_int (int): Количество возвращаемых, наиболее подходящих товаров.
+    variant (str): Прочие настройки, влияющие на результат (например, бэкенд индекса).
+
+    Returns:
+    str: Отпечаток каталога, при изменении которого сохранённые результаты
+    ранжирования перестают быть действительными.
+    """
+    payload = json.dumps([list(map(str, articles)), list(cleaned_names), quantity_int, variant],
+                         ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class DealerEmbeddingCache:
+    """
+    Ограниченный LRU-кэш для названий товаров дилеров.
+    Для каждого очищенного названия хранится эмбеддинг и результат ранжирования
+    (артикулы и близость) для текущего каталога. Кэш сохраняется на диск
+    в '<name>.<версия>.npy' (эмбеддинги) и '<name>.json' (ключи, результаты
+    и имя файла эмбеддингов, см. ML/storage.py),
+    поэтому повторяющиеся от выгрузки к выгрузке объявления не пересчитываются.
+    На диск кэш пишется только после появления новых записей (dirty).
+    """
+
+    def __init__(self, cache_dir: str, model_version: str,
+                 max_size: int = MAX_SIZE, name: str = 'dealer_embeddings') -> None:
+        self.cache_dir = cache_dir
+        self.model_version = model_version
+        self.max_size = max_size
+        self.index_path = os.path.join(cache_dir, f'{name}.json')
+        self.embeddings_by_key = OrderedDict()
+        self.results = {}
+        self.catalogue = None
+        self.dirty = False
+        self.load()
+
+    def key(self, cleaned_name: str) -> str:
+        """
+        Parameters:
+        cleaned_name (str): Очищенное название товара дилера.
+
+        Returns:
+        str: Ключ записи в кэше.
+        """
+        return hashlib.sha1(f'{self.model_version}\0{cleaned_name}'.encode('utf-8')).hexdigest()
+
+    def load(self) -> None:
+        """
+        Загружает кэш с диска. Эмбеддинги открываются через memmap.
+        """
+        index = read_index(self.index_path)
+        if index is None or index.get('model_version') != self.model_version:
+            return
+        matrix_path = data_path(self.index_path, index)
+        try:
+            matrix = np.load(matrix_path, mmap_mode='r') if matrix_path else None
+        except (OSError, ValueError):
+            return
+        keys = index.get('keys', [])
+        if matrix is None or len(keys) != len(matrix):
+            return
+        self.embeddings_by_key = OrderedDict(zip(keys, matrix))
+        self.results = {key: tuple(value) for key, value in index.get('results', {}).items()}
+        self.catalogue = index.get('catalogue')
+        self._evict()
+        self.dirty = False
+
+    def save(self) -> None:
+        """
+        Атомарно сохраняет кэш на диск (см. save_versioned) в порядке
+        от давно использованных к недавним.
+        Если новых записей нет, файлы не перезаписываются (порядок использования
+        без новых записей не сохраняется).
+        """
+        if not self.dirty:
+            return
+        keys = list(self.embeddings_by_key)
+        if keys:
+            matrix = np.stack(list(self.embeddings_by_key.values())).astype(np.float32)
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        save_versioned(self.index_path, '.npy', lambda path: write_matrix(path, matrix),
+                       {'model_version': self.model_version,
+                        'catalogue': self.catalogue,
+                        'keys': keys,
+                        'results': self.results})
+        self.dirty = False
+
+    def _evict(self) -> None:
+        while len(self.embeddings_by_key) > self.max_size:
+            key, _ = self.embeddings_by_key.popitem(last=False)
+            self.results.pop(key, None)
+        if len(self.results) > len(self.embeddings_by_key):
+            self.results = {key: value for key, value in self.results.items()
+                            if key in self.embeddings_by_key}
+
+    def embeddings(self, cleaned_names: list[str],
+                   embed: Callable[[list[str]], np.ndarray]) -> np.ndarray:
+        """
+        Parameters:
+        cleaned_names (list[str]): Очищенные названия товаров дилеров.
+        embed (Callable[[list[str]], np.ndarray]): Функция получения эмбеддингов
+        для названий, которых нет в кэше.
+
+        Returns:
+        np.ndarray: Эмбеддинги в порядке cleaned_names.
+        """
+        matrix = self._embeddings(cleaned_names, embed)
+        self._evict()
+        return matrix
+
+    def _embeddings(self, cleaned_names: list[str],
+                    embed: Callable[[list[str]], np.ndarray]) -> np.ndarray:
+        # без вытеснения: вызывающий вытесняет записи, когда результат уже собран
+        cleaned_names = list(cleaned_names)
+        keys = [self.key(name) for name in cleaned_names]
+        missing = {}
+        for key, name in zip(keys, cleaned_names):
+            if key not in self.embeddings_by_key:
+                missing.setdefault(key, name)
+        fresh = {}
+        if missing:
+            fresh = dict(zip(missing, embed(list(missing.values()))))
+            self.dirty = True
+
+        rows = []
+        for key in keys:
+            if key in fresh:
+                self.embeddings_by_key[key] = fresh[key]
+            self.embeddings_by_key.move_to_end(key)
+            rows.append(self.embeddings_by_key[key])
+        return np.stack(rows).astype(np.float32) if rows else np.empty((0, 0), dtype=np.float32)
+
+    def ranked(self, cleaned_names: list[str], catalogue: str,
+               embed: Callable[[list[str]], np.ndarray],
+               rank: Callable[[np.ndarray, list[str]], tuple[np.ndarray, np.ndarray]]
+               ) -> tuple[list[list[str]], list[list[float]]]:
+        """
+        Parameters:
+        cleaned_names (list[str]): Очищенные названия товаров дилеров.
+        catalogue (str): Отпечаток каталога (см. catalogue_key).
+        embed (Callable[[list[str]], np.ndarray]): Функция получения эмбеддингов.
+        rank (Callable[[np.ndarray, list[str]], tuple[np.ndarray, np.ndarray]]): Функция
+        ранжирования, возвращающая артикулы и близость для матрицы эмбеддингов
+        и соответствующих ей очищенных названий.
+
+        Returns:
+        tuple[list[list[str]], list[list[float]]]: Артикулы и близость
+        в порядке cleaned_names. Ранжируются только названия без сохранённого результата.
+        """
+        if catalogue != self.catalogue:
+            # каталог изменился - эмбеддинги дилеров актуальны, результаты нет
+            self.results = {}
+            self.catalogue = catalogue
+            self.dirty = True
+
+        cleaned_names = list(cleaned_names)
+        keys = [self.key(name) for name in cleaned_names]
+        missing = {}
+        for key, name in zip(keys, cleaned_names):
+            if key not in self.results:
+                missing.setdefault(key, name)
+        if missing:
+            missing_names = list(missing.values())
+            articles, scores = rank(self._embeddings(missing_names, embed), missing_names)
+            for key, key_articles, key_scores in zip(missing, articles.tolist(), scores.tolist()):
+                self.results[key] = (key_articles, key_scores)
+            self.dirty = True
+
+        for key in keys:
+            if key in self.embeddings_by_key:
+                self.embeddings_by_key.move_to_end(key)
+        ranked = [self.results[key] for key in keys]
+        # вытеснение - только после того, как результат собран
+        self._evict()
+        return [articles for articles, _ in ranked], [scores for _, scores in ranked]
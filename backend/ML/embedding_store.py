@@ -0,0 +1,114 @@
+# хранилище эмбеддингов товаров заказчика на диске
+import hashlib
+import os
+from typing import Callable, Optional
+
+import numpy as np
+
+from .storage import data_path, read_index, save_versioned
+
+
+def write_matrix(path: str, matrix: np.ndarray) -> None:
+    """
+    Функция записывает матрицу float32 в файл '.npy' по пути path.
+    """
+    with open(path, 'wb') as matrix_file:
+        np.save(matrix_file, np.asarray(matrix, dtype=np.float32))
+
+
+class ProductEmbeddingStore:
+    """
+    Кэш эмбеддингов названий товаров заказчика.
+    Эмбеддинги лежат в матрице '<name>.<версия>.npy', которая открывается через memmap,
+    а в '<name>.json' хранится версия модели, ключи строк и имя файла матрицы
+    (см. ML/storage.py), поэтому ключи и матрица всегда от одной записи.
+    Ключ строки - хэш очищенного названия вместе с версией модели, поэтому
+    заново считаются только новые или изменённые названия.
+    """
+
+    def __init__(self, cache_dir: str, model_version: str,
+                 name: str = 'product_embeddings') -> None:
+        self.cache_dir = cache_dir
+        self.model_version = model_version
+        self.index_path = os.path.join(cache_dir, f'{name}.json')
+
+    def key(self, cleaned_name: str) -> str:
+        """
+        Parameters:
+        cleaned_name (str): Очищенное название товара (результат clean_string).
+
+        Returns:
+        str: Ключ строки матрицы эмбеддингов.
+        """
+        return hashlib.sha1(f'{self.model_version}\0{cleaned_name}'.encode('utf-8')).hexdigest()
+
+    def load(self) -> tuple[list[str], Optional[np.ndarray]]:
+        """
+        Returns:
+        tuple[list[str], Optional[np.ndarray]]: Ключи и матрица эмбеддингов,
+        открытая только для чтения через memmap (без копирования в память).
+        Если кэша нет или он не согласован, возвращается ([], None).
+        """
+        index = read_index(self.index_path)
+        if index is None or index.get('model_version') != self.model_version:
+            return [], None
+        matrix_path = data_path(self.index_path, index)
+        try:
+            matrix = np.load(matrix_path, mmap_mode='r') if matrix_path else None
+        except (OSError, ValueError):
+            return [], None
+        keys = index.get('keys', [])
+        if matrix is None or len(keys) != len(matrix):
+            return [], None
+        return keys, matrix
+
+    def save(self, keys: list[str], matrix: np.ndarray) -> None:
+        """
+        Атомарно перезаписывает матрицу и индекс (см. save_versioned).
+
+        Parameters:
+        keys (list[str]): Ключи строк матрицы.
+        matrix (np.ndarray): Матрица эмбеддингов.
+        """
+        save_versioned(self.index_path, '.npy', lambda path: write_matrix(path, matrix),
+                       {'model_version': self.model_version, 'keys': keys})
+
+    def get(self, cleaned_names: list[str],
+            embed: Callable[[list[str]], np.ndarray]) -> np.ndarray:
+        """
+        Parameters:
+        cleaned_names (list[str]): Очищенные названия товаров заказчика.
+        embed (Callable[[list[str]], np.ndarray]): Функция получения эмбеддингов
+        для названий, которых ещё нет в кэше.
+
+        Returns:
+        np.ndarray: Эмбеддинги в порядке cleaned_names. Если каталог не менялся,
+        возвращается memmap кэша без копирования.
+        """
+        cleaned_names = list(cleaned_names)
+        keys = [self.key(name) for name in cleaned_names]
+        stored_keys, stored_matrix = self.load()
+        if stored_matrix is not None and stored_keys == keys:
+            return stored_matrix
+
+        positions = {key: row for row, key in enumerate(stored_keys)}
+        missing = {}
+        for key, name in zip(keys, cleaned_names):
+            if key not in positions:
+                missing.setdefault(key, name)
+        new_matrix = embed(list(missing.values())) if missing else None
+        new_positions = {key: row for row, key in enumerate(missing)}
+
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        dim = (new_matrix if new_matrix is not None else stored_matrix).shape[1]
+        matrix = np.empty((len(keys), dim), dtype=np.float32)
+        for row, key in enumerate(keys):
+            if key in new_positions:
+                matrix[row] = new_matrix[new_positions[key]]
+            else:
+                matrix[row] = stored_matrix[positions[key]]
+
+        # сохраняем в порядке текущего каталога, чтобы следующий запуск обошёлся без копий
+        self.save(keys, matrix)
+        return matrix
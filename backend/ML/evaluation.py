@@ -0,0 +1,259 @@
+# оценка качества сопоставления по размеченным данным (accuracy@n)
+import io
+import resource
+import tempfile
+import time
+from functools import partial
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .cascade import CANDIDATES, Cascade
+from .main_script import (ALIAS_COLUMNS, BATCH_SIZE, MatchingSession, match,
+                          prepare_catalogue, product_aliases, sentence_embeddings)
+from .preprocessing import clean_string
+from .registry import INFERENCE_BACKEND
+from .snapshot import load_catalogue, load_table
+
+NS = tuple(range(1, 11)) # значения n для accuracy@n
+PHASES = ('clean', 'lookup', 'embed_products', 'embed_dealers', 'rank') # этапы match для benchmark
+LATENCY_SAMPLE = 100 # количество товаров дилеров для замера задержки по одному
+
+
+def load_validation(marketing_product_csv: io.TextIOBase,
+                    marketing_dealerprice_csv: io.TextIOBase,
+                    marketing_productdealerkey_csv: io.TextIOBase,
+                    sep: str = ';') -> tuple[list[tuple[str, str]], pd.DataFrame]:
+    """
+    Parameters:
+    marketing_product_csv (io.TextIOBase): Файл CSV с товарами заказчика.
+    marketing_dealerprice_csv (io.TextIOBase): Файл CSV с товарами дилеров.
+    marketing_productdealerkey_csv (io.TextIOBase): Файл CSV с разметкой
+    (key - product_key товара дилера, dealer_id, product_id - id товара заказчика).
+    sep (str): Разделитель полей в файлах.
+
+    Returns:
+    tuple[list[tuple[str, str]], pd.DataFrame]: Пары (article, name) товаров
+    заказчика со всеми названиями и размеченные товары дилеров
+    (product_url, product_name, article).
+    """
+    marketing_product_df = pd.read_csv(marketing_product_csv, sep=sep)
+    marketing_dealerprice_df = pd.read_csv(marketing_dealerprice_csv, sep=sep)
+    marketing_productdealerkey_df = pd.read_csv(marketing_productdealerkey_csv, sep=sep)
+
+    alias_columns = [column for column in ALIAS_COLUMNS if column in marketing_product_df]
+    products = list(product_aliases(marketing_product_df[['article', *alias_columns]].to_numpy()))
+
+    # product_key дилера -> id товара заказчика -> артикул
+    keys_df = marketing_productdealerkey_df.merge(
+        marketing_product_df[['id', 'article']], left_on='product_id', right_on='id'
+    )[['key', 'dealer_id', 'article']]
+    keys_df['key'] = keys_df['key'].astype('str')
+    prices_df = marketing_dealerprice_df.dropna(subset=['product_key', 'product_name']).copy()
+    prices_df['key'] = prices_df['product_key'].astype('str')
+    prices_df = prices_df.merge(keys_df, on=['key', 'dealer_id'])
+    prices_df = prices_df.drop_duplicates(subset='product_url', keep='last').reset_index(drop=True)
+    return products, prices_df[['product_url', 'product_name', 'article']]
+
+
+def load_validation_snapshot(snapshot_dir: str) -> tuple[list[tuple[str, str]], pd.DataFrame]:
+    """
+    Parameters:
+    snapshot_dir (str): Директория снимка данных (см. ML/snapshot.py).
+
+    Returns:
+    tuple[list[tuple[str, str]], pd.DataFrame]: То же, что load_validation:
+    пары (article, name) товаров заказчика и товары дилеров
+    (product_url, product_name, article), размеченные оператором
+    (marked_product в снимке объявлений).
+    """
+    products, _ = load_catalogue(snapshot_dir)
+    prices_df = load_table(snapshot_dir, 'marketing_dealerprice',
+                           ['product_url', 'product_name', 'marked_product_id'])
+    prices_df = prices_df.dropna().rename(columns={'marked_product_id': 'article'})
+    return products, prices_df.reset_index(drop=True)
+
+
+def accuracy_at_n(ranked: dict[str, list[str]],
+                  true_articles: dict[str, str],
+                  ns: Iterable[int] = NS) -> dict[int, float]:
+    """
+    Parameters:
+    ranked (dict[str, list[str]]): Предложенные артикулы для каждого product_url
+    по убыванию близости.
+    true_articles (dict[str, str]): Правильный артикул для каждого product_url.
+    ns (Iterable[int]): Значения n.
+
+    Returns:
+    dict[int, float]: Доля товаров дилеров, у которых правильный артикул
+    попал в первые n предложенных.
+    """
+    positions = []
+    for product_url, article in true_articles.items():
+        url_articles = [str(url_article) for url_article in ranked.get(product_url, [])]
+        positions.append(url_articles.index(str(article)) if str(article) in url_articles else None)
+    total = max(len(positions), 1)
+    return {n: sum(position is not None and position < n for position in positions) / total
+            for n in ns}
+
+
+def evaluate(products: list[tuple[str, str]],
+             prices_df: pd.DataFrame,
+             ns: Iterable[int] = NS,
+             cache_dir: Optional[str] = None,
+             **match_kwargs) -> dict:
+    """
+    Parameters:
+    products (list[tuple[str, str]]): Пары (article, name) товаров заказчика.
+    prices_df (pd.DataFrame): Размеченные товары дилеров (см. load_validation).
+    ns (Iterable[int]): Значения n для accuracy@n.
+    cache_dir (Optional[str]): Директория кэша, по умолчанию без кэша,
+    чтобы время включало получение всех эмбеддингов.
+    match_kwargs: Прочие параметры match (batch_size, index_backend, inference_backend).
+
+    Returns:
+    dict: accuracy@n, общее время сопоставления в секундах и время на одно название в мс.
+    """
+    ns = list(ns)
+    start = time.perf_counter()
+    ranked = {}
+    for product_match in match(products,
+                               prices_df[['product_url', 'product_name']].to_numpy(),
+                               max(ns),
+                               cache_dir=cache_dir,
+                               **match_kwargs):
+        ranked.setdefault(product_match.product_url, []).append(product_match.article)
+    seconds = time.perf_counter() - start
+    names_count = len(products) + len(prices_df)
+    return {
+        'accuracy': accuracy_at_n(ranked, dict(zip(prices_df['product_url'], prices_df['article'])), ns),
+        'seconds': seconds,
+        'ms_per_name': 1000 * seconds / max(names_count, 1),
+    }
+
+
+def evaluate_cascade(products: list[tuple[str, str]],
+                     prices_df: pd.DataFrame,
+                     candidates: int = CANDIDATES,
+                     ns: Iterable[int] = NS,
+                     batch_size: int = BATCH_SIZE,
+                     **catalogue_kwargs) -> dict:
+    """
+    Parameters:
+    products (list[tuple[str, str]]): Пары (article, name) товаров заказчика.
+    prices_df (pd.DataFrame): Размеченные товары дилеров (см. load_validation).
+    candidates (int): Количество кандидатов первой стадии.
+    ns (Iterable[int]): Значения n для accuracy@n.
+    batch_size (int): Размер батча при получении эмбеддингов.
+    catalogue_kwargs: Прочие параметры prepare_catalogue (inference_backend).
+
+    Returns:
+    dict: accuracy@n двухстадийного сопоставления, recall@candidates - доля
+    товаров дилеров, чей правильный артикул попал в кандидаты первой стадии,
+    и время стадий в секундах (catalogue, retrieve, embed, rerank).
+    """
+    ns = list(ns)
+    start = time.perf_counter()
+    catalogue = prepare_catalogue(products, batch_size, cache_dir=None, **catalogue_kwargs)
+    cascade = Cascade(catalogue.products_df['article'],
+                      catalogue.products_df['name'],
+                      catalogue.embeddings,
+                      partial(sentence_embeddings, batch_size=batch_size,
+                              inference_backend=catalogue_kwargs.get('inference_backend',
+                                                                     INFERENCE_BACKEND)),
+                      candidates)
+    timings = {'catalogue': time.perf_counter() - start}
+
+    dealer_names = [clean_string(str(name)) for name in prices_df['product_name']]
+    true_articles = [str(article) for article in prices_df['article']]
+    groups = cascade.shortlist(dealer_names, max(candidates, *ns))
+    shortlisted = cascade.retriever.group_articles[groups]
+    recall = sum(article in map(str, row) for article, row in zip(true_articles, shortlisted))
+    articles, _ = cascade.rerank(cascade.embed(dealer_names), groups, max(ns))
+
+    timings.update(cascade.timings)
+    ranked = dict(zip(prices_df['product_url'], articles.tolist()))
+    return {
+        'accuracy': accuracy_at_n(ranked, dict(zip(prices_df['product_url'], true_articles)), ns),
+        'candidates': candidates,
+        'recall_at_candidates': recall / max(len(prices_df), 1),
+        'timings': timings,
+    }
+
+
+def benchmark(products: list[tuple[str, str]],
+              prices_df: pd.DataFrame,
+              ns: Iterable[int] = NS,
+              latency_sample: int = LATENCY_SAMPLE,
+              **match_kwargs) -> dict:
+    """
+    Parameters:
+    products (list[tuple[str, str]]): Пары (article, name) товаров заказчика.
+    prices_df (pd.DataFrame): Размеченные товары дилеров (см. load_validation).
+    ns (Iterable[int]): Значения n для accuracy@n.
+    latency_sample (int): Сколько товаров дилеров сопоставить по одному
+    для замера задержки, 0 - без замера.
+    match_kwargs: Прочие параметры match (matcher, batch_size, index_backend,
+    inference_backend, candidates, codes, lookup, units).
+
+    Returns:
+    dict: accuracy@n и пропускная способность (товаров дилеров в секунду) полного
+    прогона с пустым кэшем, время его этапов в секундах (см. PHASES),
+    p50 и p95 задержки сопоставления одного товара дилера в мс (каталог и модель
+    подготовлены заранее, кэш названий дилеров не используется) и пиковая память
+    процесса в МБ.
+    """
+    ns = list(ns)
+    prices = prices_df[['product_url', 'product_name']].to_numpy()
+    true_articles = dict(zip(prices_df['product_url'], prices_df['article']))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        stats = {}
+        start = time.perf_counter()
+        ranked = {}
+        for product_match in match(products, prices, max(ns),
+                                   cache_dir=cache_dir, stats=stats, **match_kwargs):
+            ranked.setdefault(product_match.product_url, []).append(product_match.article)
+        seconds = time.perf_counter() - start
+
+        # замеряется только работа на один товар дилера: очистка, поиск и пересчёт
+        latencies = []
+        session = MatchingSession(products, max(ns),
+                                  cache_dir=cache_dir, dealer_cache=False, **match_kwargs)
+        if latency_sample:
+            session.prepare()
+        for price in prices[:latency_sample]:
+            start = time.perf_counter()
+            list(session.match([price]))
+            latencies.append(1000 * (time.perf_counter() - start))
+
+    return {
+        'prices_count': len(prices_df),
+        'accuracy': accuracy_at_n(ranked, true_articles, ns),
+        'seconds': seconds,
+        'listings_per_sec': len(prices_df) / seconds if seconds else 0.0,
+        'phases': {phase: stats.get(phase, 0.0) for phase in PHASES},
+        'counts': stats.get('counts', {}),
+        'latency_ms': {
+            'sample': len(latencies),
+            'p50': float(np.percentile(latencies, 50)) if latencies else None,
+            'p95': float(np.percentile(latencies, 95)) if latencies else None,
+        },
+        # ru_maxrss в Linux - в килобайтах
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def model_size_mb(model) -> float:
+    """
+    Parameters:
+    model: Модель PyTorch.
+
+    Returns:
+    float: Размер сохранённых весов модели в мегабайтах.
+    """
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 2 ** 20
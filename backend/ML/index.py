@@ -0,0 +1,330 @@
+# векторные индексы каталога товаров заказчика
+import os
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .ranking import normalize_rows, top_k
+from .storage import data_path, read_index, save_versioned
+
+INDEX_BACKEND = os.environ.get('ML_INDEX_BACKEND', 'exact') # 'exact' или 'hnsw'
+HNSW_M = 16 # количество связей вершины графа HNSW
+HNSW_EF_CONSTRUCTION = 200 # ширина поиска при построении графа
+HNSW_EF_SEARCH = 64 # ширина поиска при запросе (не меньше quantity_int)
+
+
+def import_hnswlib():
+    # hnswlib - необязательная зависимость, нужна только для бэкенда 'hnsw'
+    try:
+        import hnswlib
+    except ImportError as error:
+        raise ImportError('Для индекса hnsw установите пакет hnswlib') from error
+    return hnswlib
+
+
+class ProductIndex(ABC):
+    """
+    Базовый класс индекса эмбеддингов товаров заказчика.
+    Запись индекса определяется идентификатором (артикул и очищенное
+    название) и хранит артикул, который возвращается при поиске.
+    У одного артикула может быть несколько записей (названия для
+    маркетплейсов и 1С), близость товара - максимум по его записям.
+    Индекс сохраняется на диск в '<path>.json' и файл данных бэкенда,
+    на который ссылается '<path>.json' (см. ML/storage.py),
+    а при изменении каталога обновляется инкрементально (sync).
+    """
+    backend = None
+    data_suffix = None # расширение файла данных бэкенда
+
+    def __init__(self, model_version: str) -> None:
+        self.model_version = model_version
+        self.ids = []
+        self.articles = []
+        self._groups = None
+
+    def groups(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Уникальные артикулы и номер артикула
+        для каждой записи индекса.
+        """
+        if self._groups is None:
+            entry_group, group_articles = pd.factorize(pd.Series(self.articles, dtype=object))
+            self._groups = (np.asarray(group_articles, dtype=object), entry_group)
+        return self._groups
+
+    def _reset_groups(self) -> None:
+        self._groups = None
+
+    def sync(self, ids: list[str], articles: list[str],
+             embeddings: np.ndarray) -> tuple[int, int]:
+        """
+        Приводит индекс в соответствие с текущим каталогом.
+
+        Parameters:
+        ids (list[str]): Идентификаторы записей каталога.
+        articles (list[str]): Артикулы товаров в порядке ids.
+        embeddings (np.ndarray): Эмбеддинги товаров в порядке ids.
+
+        Returns:
+        tuple[int, int]: Количество добавленных и удалённых записей.
+        """
+        wanted = set(ids)
+        stale = [row for row, record_id in enumerate(self.ids) if record_id not in wanted]
+        present = set(self.ids)
+        new_rows = [row for row, record_id in enumerate(ids) if record_id not in present]
+        if stale or new_rows:
+            self._reset_groups()
+        if stale:
+            self._remove(stale)
+        if new_rows:
+            self._add([ids[row] for row in new_rows],
+                      [articles[row] for row in new_rows],
+                      normalize_rows(np.asarray(embeddings)[new_rows]))
+        return len(new_rows), len(stale)
+
+    def search(self, queries: np.ndarray,
+               quantity_int: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Parameters:
+        queries (np.ndarray): Эмбеддинги товаров дилеров.
+        quantity_int (int): Количество возвращаемых, наиболее подходящих товаров.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Артикулы (без повторов) и косинусная
+        близость, по строке на каждый запрос, по убыванию близости.
+        """
+        group_articles, _ = self.groups()
+        groups, scores = self._search(normalize_rows(queries), min(quantity_int, len(group_articles)))
+        return group_articles[groups], scores
+
+    def save(self, path: str) -> None:
+        save_versioned(f'{path}.json', self.data_suffix, self._save_data,
+                       {'backend': self.backend,
+                        'model_version': self.model_version,
+                        'ids': self.ids,
+                        'articles': self.articles,
+                        **self._meta()})
+
+    @classmethod
+    def load(cls, path: str, model_version: str) -> Optional['ProductIndex']:
+        """
+        Returns:
+        Optional[ProductIndex]: Индекс с диска или None, если его нет
+        или он построен другим бэкендом или другой версией модели.
+        """
+        meta = read_index(f'{path}.json')
+        if meta is None or meta.get('backend') != cls.backend or meta.get('model_version') != model_version:
+            return None
+        index = cls(model_version)
+        index.ids = meta['ids']
+        index.articles = meta['articles']
+        if not index._load_data(data_path(f'{path}.json', meta), meta):
+            return None
+        return index
+
+    @abstractmethod
+    def _add(self, ids: list[str], articles: list[str], embeddings: np.ndarray) -> None:
+        pass
+
+    @abstractmethod
+    def _remove(self, rows: list[int]) -> None:
+        pass
+
+    @abstractmethod
+    def _search(self, queries: np.ndarray,
+                quantity_int: int) -> tuple[np.ndarray, np.ndarray]:
+        # возвращает номера артикулов (см. groups) и близость
+        pass
+
+    def _meta(self) -> dict:
+        return {}
+
+    @abstractmethod
+    def _save_data(self, data_path: str) -> None:
+        pass
+
+    @abstractmethod
+    def _load_data(self, data_path: Optional[str], meta: dict) -> bool:
+        pass
+
+
+class ExactIndex(ProductIndex):
+    """
+    Точный поиск: умножение нормированных матриц и top-k (см. ranking.top_k).
+    """
+    backend = 'exact'
+    data_suffix = '.npy'
+
+    def __init__(self, model_version: str) -> None:
+        super().__init__(model_version)
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self._grouped = None
+
+    def _reset_groups(self):
+        super()._reset_groups()
+        self._grouped = None
+
+    def _add(self, ids, articles, embeddings):
+        self.ids += ids
+        self.articles += articles
+        self.matrix = embeddings if not len(self.matrix) else np.vstack([self.matrix, embeddings])
+
+    def _remove(self, rows):
+        keep = np.ones(len(self.ids), dtype=bool)
+        keep[rows] = False
+        self.ids = [record_id for record_id, flag in zip(self.ids, keep) if flag]
+        self.articles = [article for article, flag in zip(self.articles, keep) if flag]
+        self.matrix = self.matrix[keep]
+
+    def _search(self, queries, quantity_int):
+        group_articles, entry_group = self.groups()
+        if len(group_articles) == len(self.ids):
+            # у каждого товара одно название
+            rows, scores = top_k(queries, self.matrix, quantity_int)
+            return entry_group[rows], scores
+        if self._grouped is None:
+            # записи одного артикула идут подряд, чтобы взять максимум через reduceat
+            order = np.argsort(entry_group, kind='stable')
+            group_starts = np.flatnonzero(np.diff(entry_group[order], prepend=-1))
+            self._grouped = (np.ascontiguousarray(self.matrix[order]), group_starts)
+        grouped_matrix, group_starts = self._grouped
+        return top_k(queries, grouped_matrix, quantity_int, group_starts=group_starts)
+
+    def _save_data(self, data_path):
+        with open(data_path, 'wb') as matrix_file:
+            np.save(matrix_file, self.matrix)
+
+    def _load_data(self, data_path, meta):
+        try:
+            self.matrix = np.load(data_path, mmap_mode='r')
+        except (OSError, TypeError, ValueError):
+            return False
+        return len(self.matrix) == len(self.ids)
+
+
+class HNSWIndex(ProductIndex):
+    """
+    Приближённый поиск по графу HNSW (библиотека hnswlib, ставится отдельно).
+    Удалённые товары помечаются в графе, новые добавляются без перестройки.
+    """
+    backend = 'hnsw'
+    data_suffix = '.bin'
+
+    def __init__(self, model_version: str) -> None:
+        super().__init__(model_version)
+        self.graph = None
+        self.labels = [] # метки записей в графе в порядке ids
+        self.next_label = 0
+
+    def _create_graph(self, dim: int, max_elements: int):
+        graph = import_hnswlib().Index(space='ip', dim=dim)
+        graph.init_index(max_elements=max_elements, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+        return graph
+
+    def _add(self, ids, articles, embeddings):
+        if self.graph is None:
+            self.graph = self._create_graph(embeddings.shape[1], len(ids))
+        required = self.next_label + len(ids)
+        if required > self.graph.get_max_elements():
+            self.graph.resize_index(max(required, 2 * self.graph.get_max_elements()))
+        labels = list(range(self.next_label, required))
+        self.graph.add_items(embeddings, labels)
+        self.next_label = required
+        self.ids += ids
+        self.articles += articles
+        self.labels += labels
+
+    def _remove(self, rows):
+        removed = set(rows)
+        for row in rows:
+            self.graph.mark_deleted(self.labels[row])
+        self.ids = [value for row, value in enumerate(self.ids) if row not in removed]
+        self.articles = [value for row, value in enumerate(self.articles) if row not in removed]
+        self.labels = [value for row, value in enumerate(self.labels) if row not in removed]
+
+    def _search(self, queries, quantity_int):
+        if not quantity_int:
+            return (np.empty((len(queries), 0), dtype=np.int64),
+                    np.empty((len(queries), 0), dtype=np.float32))
+        _, entry_group = self.groups()
+        # запрашиваем столько записей, чтобы среди них точно нашлось
+        # quantity_int разных артикулов
+        entries_int = min(len(self.ids), quantity_int * int(np.bincount(entry_group).max()))
+        self.graph.set_ef(max(HNSW_EF_SEARCH, entries_int))
+        labels, distances = self.graph.knn_query(queries, k=entries_int)
+        # метки графа переводятся в номера записей индекса, затем в номера артикулов
+        row_by_label = np.full(self.next_label, -1, dtype=np.int64)
+        row_by_label[self.labels] = np.arange(len(self.labels))
+        entry_groups = entry_group[row_by_label[labels]]
+        entry_scores = (1 - distances).astype(np.float32)
+        if entries_int == quantity_int:
+            return entry_groups, entry_scores
+
+        groups = np.empty((len(queries), quantity_int), dtype=np.int64)
+        scores = np.empty((len(queries), quantity_int), dtype=np.float32)
+        for row in range(len(queries)):
+            # первое вхождение артикула - его самое близкое название
+            _, first = np.unique(entry_groups[row], return_index=True)
+            first = np.sort(first)[:quantity_int]
+            groups[row] = entry_groups[row, first]
+            scores[row] = entry_scores[row, first]
+        return groups, scores
+
+    def _meta(self):
+        meta = {'labels': self.labels, 'next_label': self.next_label}
+        if self.graph is not None:
+            meta.update(dim=self.graph.dim, max_elements=self.graph.get_max_elements())
+        return meta
+
+    def _save_data(self, data_path):
+        # пустой индекс без графа сохраняется без файла данных
+        if self.graph is not None:
+            self.graph.save_index(data_path)
+
+    def _load_data(self, data_path, meta):
+        self.labels = meta.get('labels', [])
+        self.next_label = meta.get('next_label', 0)
+        if len(self.labels) != len(self.ids):
+            return False
+        if data_path is None or not os.path.exists(data_path):
+            return not self.ids
+        self.graph = import_hnswlib().Index(space='ip', dim=meta['dim'])
+        self.graph.load_index(data_path, max_elements=meta['max_elements'])
+        return True
+
+
+INDEX_BACKENDS = {
+    ExactIndex.backend: ExactIndex,
+    HNSWIndex.backend: HNSWIndex,
+}
+
+
+def load_index(backend: str, path: Optional[str], model_version: str,
+               ids: list[str], articles: list[str],
+               embeddings: np.ndarray) -> ProductIndex:
+    """
+    Parameters:
+    backend (str): Бэкенд индекса ('exact' или 'hnsw').
+    path (Optional[str]): Путь к файлам индекса без расширения, None - без сохранения.
+    model_version (str): Версия модели эмбеддингов.
+    ids (list[str]): Идентификаторы записей текущего каталога.
+    articles (list[str]): Артикулы товаров в порядке ids.
+    embeddings (np.ndarray): Эмбеддинги товаров в порядке ids.
+
+    Returns:
+    ProductIndex: Индекс, синхронизированный с текущим каталогом.
+    Сохранённый индекс обновляется только для изменившихся товаров.
+    """
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(f'Неизвестный бэкенд индекса: {backend}')
+    index_class = INDEX_BACKENDS[backend]
+    index = index_class.load(path, model_version) if path else None
+    if index is None:
+        index = index_class(model_version)
+    added, removed = index.sync(ids, articles, embeddings)
+    if path and (added or removed):
+        index.save(path)
+    return index
@@ -0,0 +1,116 @@
+# точное сопоставление по кодам товара и очищенным названиям до модели
+import re
+from collections import Counter
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+# коды товара заказчика, которые дилеры указывают в ссылке или названии
+CODE_COLUMNS = ['ean_13', 'ozon_article', 'wb_article', 'ym_article', 'wb_article_td']
+# EAN-13 и артикулы маркетплейсов - длинные числа, артикулы заказчика - '008-1', '007-10бц'
+CODE_RE = re.compile(r'\d{6,}|\d{2,4}-\d+[а-яёa-z]*')
+FLOAT_CODE_RE = re.compile(r'^(\d+)\.0+$')
+
+
+def normalize_code(code) -> str:
+    """
+    Parameters:
+    code: Код товара (строка или число, EAN-13 в базе хранится как float).
+
+    Returns:
+    str: Код в нижнем регистре без дробной части '.0', пустая строка для пропусков.
+    """
+    if code is None or (isinstance(code, float) and code != code):
+        return ''
+    if isinstance(code, float) and code.is_integer():
+        code = int(code)
+    code = str(code).strip().lower()
+    return FLOAT_CODE_RE.sub(r'\1', code)
+
+
+# функция для развёртывания кодов товара
+def product_codes(products: Iterable[Iterable]) -> Iterator[tuple[str, str]]:
+    """
+    Parameters:
+    products (Iterable[Iterable]): Строки (article, ean_13, ozon_article, ...)
+    товаров заказчика (см. CODE_COLUMNS).
+
+    Returns:
+    Iterator[tuple[str, str]]: Пары (article, code) для артикула и каждого
+    непустого кода, который можно найти в ссылке или названии (см. CODE_RE).
+    """
+    for article, *codes in products:
+        for code in (article, *codes):
+            code = normalize_code(code)
+            if code and CODE_RE.fullmatch(code):
+                yield article, code
+
+
+def _unique_map(pairs: Iterable[tuple[str, str]]) -> dict[str, str]:
+    # ключ, который ведёт к разным артикулам, не даёт уверенного ответа
+    articles_by_key = {}
+    for article, key in pairs:
+        articles_by_key.setdefault(key, set()).add(article)
+    return {key: articles.pop() for key, articles in articles_by_key.items() if len(articles) == 1}
+
+
+class LookupIndex:
+    """
+    Хэш-индекс для точного сопоставления до модели.
+    Товар дилера сопоставляется уверенно, если в ссылке и названии найдены коды
+    ровно одного товара заказчика (stage 'code'), либо если очищенное название
+    совпадает с очищенным названием ровно одного товара (stage 'name').
+    Остальные товары дилеров передаются модели.
+    """
+
+    def __init__(self, codes: Iterable[tuple[str, str]],
+                 products_df: pd.DataFrame) -> None:
+        """
+        Parameters:
+        codes (Iterable[tuple[str, str]]): Пары (article, code), см. product_codes.
+        products_df (pd.DataFrame): Каталог с очищенными названиями (article, name).
+        """
+        self.codes = _unique_map(codes)
+        self.names = _unique_map(zip(products_df['article'], products_df['name'].str.strip()))
+
+    def resolve(self, product_url: str,
+                product_name: str,
+                cleaned_name: str) -> Optional[tuple[str, str]]:
+        """
+        Parameters:
+        product_url (str): Ссылка на товар дилера.
+        product_name (str): Исходное название товара дилера.
+        cleaned_name (str): Очищенное название товара дилера.
+
+        Returns:
+        Optional[tuple[str, str]]: Артикул и стадия ('code' или 'name')
+        или None, если точного совпадения нет.
+        """
+        if self.codes:
+            tokens = CODE_RE.findall(f'{product_url} {product_name}'.lower())
+            articles = {self.codes[token] for token in tokens if token in self.codes}
+            if len(articles) == 1:
+                return articles.pop(), 'code'
+        article = self.names.get(cleaned_name.strip())
+        if article is not None:
+            return article, 'name'
+        return None
+
+    def resolve_all(self, product_urls: Iterable[str],
+                    product_names: Iterable[str],
+                    cleaned_names: Iterable[str]) -> tuple[list[Optional[tuple[str, str]]], Counter]:
+        """
+        Parameters:
+        product_urls (Iterable[str]): Ссылки на товары дилеров.
+        product_names (Iterable[str]): Исходные названия.
+        cleaned_names (Iterable[str]): Очищенные названия.
+
+        Returns:
+        tuple[list[Optional[tuple[str, str]]], Counter]: Результат resolve
+        для каждого товара и количество товаров, сопоставленных каждой стадией.
+        """
+        resolved = [self.resolve(product_url, str(product_name), cleaned_name)
+                    for product_url, product_name, cleaned_name
+                    in zip(product_urls, product_names, cleaned_names)]
+        counts = Counter(stage for _, stage in filter(None, resolved))
+        return resolved, counts
@@ -7,50 +7,76 @@
 # библиотеки
 import io
 import json
-import re
+import os
+import time
 import warnings
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+from typing import Iterable, Iterator, NamedTuple, Optional
 
 import numpy as np
 import pandas as pd
-import torch
 from scipy.spatial.distance import cosine
-from transformers import BertModel, BertTokenizer
 
-# константы
-SPACES = r'(?<=[а-яА-Я])(?=[a-zA-Z])|(?<=[a-zA-Z])(?=[а-яА-Я])'
-COMMA_OUT_LINE = r',\s'
-DROP_BRACKET = r'[()\s]'
-DUP_SPACES = r'([ ])\1+'
-DROP_SYMBOL = r'["\-/]'
+from .cascade import CANDIDATES, Cascade
+from .dealer_cache import DealerEmbeddingCache, catalogue_key
+from .embedding_store import ProductEmbeddingStore
+from .index import INDEX_BACKEND, ProductIndex, load_index
+from .lookup import CODE_COLUMNS, LookupIndex, product_codes
+from .matchers import MATCHER, fitted_matcher
+from .preprocessing import clean_series, clean_string
+from .ranking import CHUNK_SIZE, normalize_rows, top_k
+from .registry import INFERENCE_BACKEND, get_model, model_version
+from .units import UNIT_EXTRA, UnitRescorer, parse_units
 
-# модель
-bert_version = 'cointegrated/LaBSE-en-ru'
-tokenizer = BertTokenizer.from_pretrained(bert_version)
-model = BertModel.from_pretrained(bert_version)
+# константы
+BATCH_SIZE = 64 # количество названий в одном прогоне модели
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache') # кэш эмбеддингов
+ALIAS_COLUMNS = ['name', 'ozon_name', 'wb_name', 'name_1c'] # названия товара заказчика
 
-# настройка
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-model = model.eval()
-model.to(device)
+# модель загружается лениво при первом вызове sentence_embeddings (см. ML/registry.py)
 
-# функция для предобработки текста
-def clean_string(input_string: str) -> str:
+# функция для получения эмбеддингов
+def sentence_embeddings(sentences: list[str],
+                        batch_size: int = BATCH_SIZE,
+                        inference_backend: str = INFERENCE_BACKEND) -> np.ndarray:
     """
     Parameters:
-    input_string (str): Строка для очистки.
+    sentences (list[str]): Названия товаров для создания эмбеддингов.
+    batch_size (int): Количество названий, обрабатываемых моделью за один прогон.
+    inference_backend (str): Бэкенд инференса ('fp32' или 'int8', см. ML/registry.py).
 
     Returns:
-    output_string (str): Очищенная строка.
+    np.ndarray: Матрица эмбеддингов (по строке на название) в порядке входного списка.
     """
-    input_string = re.sub(SPACES, ' ', input_string.lower()) # нижний регистр/пропущенные пробелы
-    input_string = re.sub(COMMA_OUT_LINE, ' ', input_string) # убираем внешние запятые
-    input_string = re.sub(DROP_BRACKET, ' ', input_string) # убираем '(',')'
-    input_string = input_string.replace('prosept', '').replace('просепт', '') # убираем название фирмы
-    input_string = re.sub(DROP_SYMBOL, ' ', input_string)
-    output_string = re.sub(DUP_SPACES, r'\1', input_string) # обработка двойных пробелов
-    return output_string
+    import torch
+
+    tokenizer, model, device = get_model(inference_backend=inference_backend)
+    sentences = list(sentences)
+    embeddings = np.zeros((len(sentences), model.config.hidden_size), dtype=np.float32)
+    if not sentences:
+        return embeddings
+
+    # сортируем по длине в токенах, чтобы в батч попадали строки близкой длины
+    # и паддинга было как можно меньше
+    lengths = [len(ids) for ids in tokenizer(sentences, truncation=True)['input_ids']]
+    order = np.argsort(lengths, kind='stable')
+
+    for start in range(0, len(order), batch_size):
+        batch_index = order[start:start + batch_size]
+        encoded = tokenizer([sentences[i] for i in batch_index],
+                            padding=True, # паддинг до самой длинной строки батча
+                            truncation=True,
+                            return_tensors='pt').to(device)
+        with torch.no_grad():
+            last_hidden_states = model(**encoded)[0]
+        # среднее только по настоящим токенам, паддинг не учитывается
+        mask = encoded['attention_mask'].unsqueeze(-1).to(last_hidden_states.dtype)
+        batch_embeddings = (last_hidden_states * mask).sum(dim=1) / mask.sum(dim=1)
+        embeddings[batch_index] = batch_embeddings.float().cpu().numpy()
+    return embeddings
 
-# функция для получения эмбеддингов
 def sentence_embedding(sentence: str) -> np.ndarray:
     """
     Parameters:
@@ -59,12 +85,7 @@ def sentence_embedding(sentence: str) -> np.ndarray:
     Returns:
     np.ndarray: Эмбеддинг названия товара в виде массива NumPy.
     """
-    input_ids = torch.tensor(tokenizer.encode(sentence)).unsqueeze(0).to(device)
-    with torch.no_grad():
-        outputs = model(input_ids)
-        last_hidden_states = outputs[0].squeeze(0)
-        sentence_embedding = torch.mean(last_hidden_states, dim=0)
-    return sentence_embedding.cpu().numpy()
+    return sentence_embeddings([sentence])[0]
 
 # функция для рассчета метрики
 def cos_similarity(embedding_1: np.ndarray, 
@@ -80,35 +101,430 @@ def cos_similarity(embedding_1: np.ndarray,
     return 1 - cosine(embedding_1, embedding_2)
 
 # функция для ранжирования
-def rank_products(dealer_product: str,
-                  marketing_product_df: pd.DataFrame,
-                  products_embedding: pd.Series,
-                  quantity_int: int) -> list[str]:
+def rank_products(dealers_embedding: np.ndarray,
+                  products_embedding: np.ndarray,
+                  articles: np.ndarray,
+                  quantity_int: int,
+                  chunk_size: int = CHUNK_SIZE) -> tuple[np.ndarray, np.ndarray]:
     """
     Parameters:
-    dealer_product (str): Название товара дилера.
-    marketing_product_df (pd.DataFrame): Данные о товарах производитимых заказчиком.
-    products_embedding (pd.Series): Эмбеддингами названий товаров производитимых заказчиком.
+    dealers_embedding (np.ndarray): Эмбеддинги названий товаров дилеров.
+    products_embedding (np.ndarray): Эмбеддинги названий товаров производитимых заказчиком.
+    articles (np.ndarray): Артикулы товаров заказчика в порядке строк products_embedding.
     quantity_int (int): Количество возвращаемых, наиболее подходящих товаров.
+    chunk_size (int): Количество товаров дилеров, ранжируемых за одно умножение матриц.
+
+    Returns:
+    tuple[np.ndarray, np.ndarray]: Артикулы ранжированных товаров и их косинусная
+    близость, по строке на каждый товар дилера.
+    """
+    indices, scores = top_k(normalize_rows(dealers_embedding),
+                            normalize_rows(products_embedding),
+                            quantity_int,
+                            chunk_size)
+    return np.asarray(articles)[indices], scores
+
+
+# директория кэша для бэкенда инференса
+def backend_cache_dir(cache_dir: Optional[str],
+                      inference_backend: str = INFERENCE_BACKEND) -> Optional[str]:
+    """
+    Parameters:
+    cache_dir (Optional[str]): Директория кэша эмбеддингов и индекса.
+    inference_backend (str): Бэкенд инференса.
+
+    Returns:
+    Optional[str]: Директория кэша: эмбеддинги fp32 лежат в cache_dir,
+    остальных бэкендов - в поддиректории с именем бэкенда, чтобы при
+    переключении бэкенда кэши не вытесняли друг друга.
+    """
+    if not cache_dir or inference_backend == 'fp32':
+        return cache_dir
+    return os.path.join(cache_dir, inference_backend)
+
+
+# функция для развёртывания названий товара
+def product_aliases(products: Iterable[Iterable]) -> Iterator[tuple[str, str]]:
+    """
+    Parameters:
+    products (Iterable[Iterable]): Строки (article, name, ozon_name, wb_name, name_1c)
+    товаров заказчика, количество названий может быть любым (см. ALIAS_COLUMNS).
+
+    Returns:
+    Iterator[tuple[str, str]]: Пары (article, name) для каждого непустого названия.
+    Близость товара при ранжировании - максимум по его названиям.
+    """
+    for article, *names in products:
+        for name in names:
+            if isinstance(name, str) and name.strip():
+                yield article, name
+
+
+class Match(NamedTuple):
+    """
+    Вариант соответствия товара дилера товару заказчика.
+    """
+    product_url: str
+    article: str
+    compliance_number: int
+    score: float
+    stage: str = 'model' # 'code' или 'name' - точное совпадение (см. ML/lookup.py)
+
+
+class Catalogue(NamedTuple):
+    """
+    Подготовленный каталог товаров заказчика: очищенные названия,
+    эмбеддинги, векторный индекс для поиска и величины из названий
+    (объём, вес, концентрация, см. ML/units.py) в порядке эмбеддингов.
+    """
+    products_df: pd.DataFrame
+    embeddings: np.ndarray
+    index: ProductIndex
+    units: np.ndarray
+
+
+# очистка каталога товаров заказчика
+def catalogue_frame(products: Iterable[tuple[str, str]]) -> pd.DataFrame:
+    """
+    Parameters:
+    products (Iterable[tuple[str, str]]): Пары (article, name) товаров заказчика.
+
+    Returns:
+    pd.DataFrame: Столбцы article и name с очищенными непустыми названиями без повторов.
+    """
+    marketing_product_df = pd.DataFrame(list(products), columns=['article', 'name'])
+
+    # clean df
+    marketing_product_df = marketing_product_df.dropna().drop_duplicates().reset_index(drop=True)
+
+    # clean string
+    marketing_product_df['name'] = clean_series(marketing_product_df['name'])
+    # названия, совпавшие после очистки, считаются один раз
+    marketing_product_df = marketing_product_df[marketing_product_df['name'].str.strip() != '']
+    marketing_product_df = marketing_product_df.drop_duplicates().reset_index(drop=True)
+    return marketing_product_df
+
+
+# подготовка каталога товаров заказчика
+def prepare_catalogue(products: Iterable[tuple[str, str]],
+                      batch_size: int = BATCH_SIZE,
+                      cache_dir: Optional[str] = CACHE_DIR,
+                      index_backend: str = INDEX_BACKEND,
+                      inference_backend: str = INFERENCE_BACKEND) -> Catalogue:
+    """
+    Parameters:
+    products (Iterable[tuple[str, str]]): Пары (article, name) товаров заказчика,
+    у одного артикула может быть несколько названий (см. product_aliases).
+    batch_size (int): Размер батча при получении эмбеддингов.
+    cache_dir (Optional[str]): Директория кэша эмбеддингов и индекса, None - без кэша.
+    index_backend (str): Бэкенд векторного индекса ('exact' или 'hnsw').
+    inference_backend (str): Бэкенд инференса модели ('fp32' или 'int8').
 
     Returns:
-    list[str]: Список ранжированных товаров.
+    Catalogue: Каталог с эмбеддингами и индексом. Сохранённый индекс
+    обновляется только для новых, изменённых и удалённых товаров.
     """
-    dealer_embedding = sentence_embedding(dealer_product)
-    marketing_product_df['scores'] = products_embedding.apply(lambda x: cos_similarity(dealer_embedding, x))
-    return marketing_product_df.sort_values(by='scores', ascending=False).head(quantity_int)['article'].to_list()
+    marketing_product_df = catalogue_frame(products)
 
+    # embedding product
+    embed = partial(sentence_embeddings, batch_size=batch_size, inference_backend=inference_backend)
+    version = model_version(inference_backend)
+    cache_dir = backend_cache_dir(cache_dir, inference_backend)
+    if cache_dir:
+        store = ProductEmbeddingStore(cache_dir, version)
+        products_embedding = store.get(marketing_product_df['name'], embed)
+    else:
+        products_embedding = embed(marketing_product_df['name'])
+
+    # index
+    articles = marketing_product_df['article'].to_list()
+    ids = [f'{article}\0{name}' for article, name in zip(articles, marketing_product_df['name'])]
+    index_path = os.path.join(cache_dir, f'product_index_{index_backend}') if cache_dir else None
+    index = load_index(index_backend, index_path, version, ids, articles, products_embedding)
+    return Catalogue(marketing_product_df, products_embedding, index,
+                     parse_units(marketing_product_df['name']))
+
+
+# сопоставление без промежуточных файлов
+def match(products: Iterable[tuple[str, str]],
+          prices: Iterable[tuple[str, str]],
+          quantity_int: int,
+          batch_size: int = BATCH_SIZE,
+          cache_dir: Optional[str] = CACHE_DIR,
+          index_backend: str = INDEX_BACKEND,
+          inference_backend: str = INFERENCE_BACKEND,
+          matcher: str = MATCHER,
+          candidates: int = CANDIDATES,
+          stats: Optional[dict] = None,
+          codes: Iterable[tuple[str, str]] = (),
+          lookup: bool = True,
+          units: bool = True,
+          dealer_cache: bool = True) -> Iterator[Match]:
+    """
+    Parameters:
+    products (Iterable[tuple[str, str]]): Пары (article, name) товаров заказчика,
+    например product_aliases(Product.objects.values_list('article', *ALIAS_COLUMNS))
+    или массив NumPy.
+    prices (Iterable[tuple[str, str]]): Пары (product_url, product_name) товаров дилеров.
+    quantity_int (int): Количество возвращаемых, наиболее подходящих товаров заказчика.
+    batch_size (int): Размер батча при получении эмбеддингов.
+    cache_dir (Optional[str]): Директория кэша эмбеддингов, None - без кэша.
+    index_backend (str): Бэкенд векторного индекса ('exact' или 'hnsw').
+    inference_backend (str): Бэкенд инференса модели ('fp32' или 'int8').
+    matcher (str): Модель сопоставления (см. ML/matchers.py): 'labse' - эмбеддинги
+    LaBSE с кэшем и индексом, 'cascade' - отбор candidates кандидатов TF-IDF
+    и переранжирование эмбеддингами LaBSE из кэша (см. ML/cascade.py),
+    остальные модели обучаются на каталоге в памяти.
+    candidates (int): Количество кандидатов первой стадии для 'cascade'.
+    stats (Optional[dict]): Если передан, в него записывается время этапов в секундах
+    (clean, lookup, embed_products, embed_dealers, rank, для 'cascade' также
+    retrieve и rerank внутри rank) и в stats['counts'] - количество товаров дилеров,
+    сопоставленных по коду, по названию и моделью.
+    codes (Iterable[tuple[str, str]]): Пары (article, code) для точного
+    сопоставления по кодам (см. ML/lookup.py, product_codes).
+    lookup (bool): Сопоставлять ли точные совпадения кодов и очищенных названий
+    до модели. Такие товары получают один вариант с близостью 1.0.
+    units (bool): Пересчитывать ли близость лучших вариантов по объёму, весу
+    и концентрации из названий (см. ML/units.py).
+    dealer_cache (bool): Использовать ли кэш эмбеддингов и результатов для
+    названий дилеров (при заданном cache_dir).
+
+    Returns:
+    Iterator[Match]: Варианты соответствия, для каждого товара дилера
+    quantity_int вариантов по убыванию близости (при точном совпадении - один).
+    Для нескольких пачек товаров дилеров с одним каталогом используйте MatchingSession.
+    """
+    session = MatchingSession(products, quantity_int, batch_size, cache_dir, index_backend,
+                              inference_backend, matcher, candidates, codes, lookup, units,
+                              dealer_cache)
+    matches = session.match(prices, stats)
+    session.save()
+    return matches
+
+
+class MatchingSession:
+    """
+    Сопоставление пачек товаров дилеров с одним каталогом.
+    Очищенный каталог, индекс точных совпадений, модель (эмбеддинги
+    и векторный индекс или обученная модель), величины из названий
+    и кэш названий дилеров готовятся один раз при первой необходимости,
+    а match вызывается для любого количества пачек. Кэш названий дилеров
+    сохраняется на диск методом save - один раз после всех пачек.
+    Параметры конструктора - как у функции match.
+    """
+
+    def __init__(self, products: Iterable[tuple[str, str]],
+                 quantity_int: int,
+                 batch_size: int = BATCH_SIZE,
+                 cache_dir: Optional[str] = CACHE_DIR,
+                 index_backend: str = INDEX_BACKEND,
+                 inference_backend: str = INFERENCE_BACKEND,
+                 matcher: str = MATCHER,
+                 candidates: int = CANDIDATES,
+                 codes: Iterable[tuple[str, str]] = (),
+                 lookup: bool = True,
+                 units: bool = True,
+                 dealer_cache: bool = True) -> None:
+        self.products = list(products)
+        self.quantity_int = quantity_int
+        self.batch_size = batch_size
+        self.cache_dir = cache_dir
+        self.index_backend = index_backend
+        self.inference_backend = inference_backend
+        self.matcher = matcher
+        self.candidates = candidates
+        self.codes = list(codes)
+        self.lookup = lookup
+        self.units = units
+        self.use_dealer_cache = dealer_cache
+        self.lookup_index = None
+        self.dealer_cache = None
+        self.cascade = None
+        self._search = None
+
+    def match(self, prices: Iterable[tuple[str, str]],
+              stats: Optional[dict] = None) -> Iterator[Match]:
+        """
+        Parameters:
+        prices (Iterable[tuple[str, str]]): Пары (product_url, product_name) товаров дилеров.
+        stats (Optional[dict]): Время этапов и stats['counts'] (см. функцию match).
+        Подготовка каталога и модели учитывается в пачке, где она выполнена.
+
+        Returns:
+        Iterator[Match]: Варианты соответствия (см. функцию match).
+        """
+        with _timed(stats, 'clean'):
+            marketing_dealerprice_df = pd.DataFrame(list(prices), columns=['product_url', 'product_name'])
+
+            # clean df
+            marketing_dealerprice_df = marketing_dealerprice_df.dropna().drop_duplicates(
+                subset='product_url', keep='last'
+            ).reset_index(drop=True)
+
+            # clean string
+            # названия дилеров часто повторяются, clean_string запоминает результат
+            dealer_names = marketing_dealerprice_df['product_name'].astype('str').map(clean_string).to_list()
+            product_urls = marketing_dealerprice_df['product_url'].to_list()
+
+        # точные совпадения по кодам и названиям не передаются модели
+        resolved, counts = [None] * len(product_urls), Counter()
+        if self.lookup:
+            self._prepare_lookup(stats)
+            with _timed(stats, 'lookup'):
+                resolved, counts = self.lookup_index.resolve_all(
+                    product_urls, marketing_dealerprice_df['product_name'], dealer_names
+                )
+        remaining = [i for i, url_resolved in enumerate(resolved) if url_resolved is None]
+
+        # predict
+        ranked_articles, ranked_scores = [], []
+        if remaining:
+            ranked_articles, ranked_scores = self._rank([dealer_names[i] for i in remaining], stats)
+        if stats is not None:
+            stats['counts'] = {'code': counts['code'], 'name': counts['name'], 'model': len(remaining)}
+
+        ranked = dict(zip(remaining, zip(ranked_articles, ranked_scores)))
+        return _matches(product_urls, resolved, ranked)
+
+    def prepare(self, stats: Optional[dict] = None) -> None:
+        """
+        Готовит индекс точных совпадений и модель до первой пачки,
+        например, чтобы замер задержки match не включал подготовку каталога.
+        """
+        if self.lookup:
+            self._prepare_lookup(stats)
+        if self._search is None:
+            self._prepare_model(stats)
+
+    def save(self) -> None:
+        """
+        Сохраняет на диск кэш названий дилеров, если в нём появились новые записи.
+        """
+        if self.dealer_cache is not None:
+            self.dealer_cache.save()
+
+    def _prepare_lookup(self, stats: Optional[dict]) -> None:
+        if self.lookup_index is None:
+            with _timed(stats, 'lookup'):
+                self.lookup_index = LookupIndex(self.codes, catalogue_frame(self.products))
+
+    def _prepare_model(self, stats: Optional[dict]) -> None:
+        # модель, поиск и пересчёт по величинам для каталога;
+        # при units модель возвращает UNIT_EXTRA лишних вариантов для пересчёта по величинам
+        fetch_int = self.quantity_int + UNIT_EXTRA if self.units else self.quantity_int
+        self.rescorer = None
+
+        if self.matcher not in ('labse', 'cascade'):
+            with _timed(stats, 'embed_products'):
+                products_df = catalogue_frame(self.products)
+                fitted = fitted_matcher(self.matcher, products_df['article'], products_df['name'])
+                if self.units:
+                    self.rescorer = UnitRescorer(products_df['article'], parse_units(products_df['name']))
+            self._embed = fitted.transform
+            self._search = lambda queries, cleaned_names: fitted.search(queries, fetch_int)
+            return
+
+        with _timed(stats, 'embed_products'):
+            catalogue = prepare_catalogue(self.products, self.batch_size, self.cache_dir,
+                                          self.index_backend, self.inference_backend)
+        self._embed = partial(sentence_embeddings, batch_size=self.batch_size,
+                              inference_backend=self.inference_backend)
+        if self.matcher == 'cascade':
+            with _timed(stats, 'embed_products'):
+                self.cascade = Cascade(catalogue.products_df['article'],
+                                       catalogue.products_df['name'],
+                                       catalogue.embeddings,
+                                       self._embed,
+                                       self.candidates)
+            self._embed = self.cascade.embed
+            self._search = partial(self.cascade.rank, quantity_int=fetch_int)
+            variant = f'cascade:{self.candidates}'
+        else:
+            self._search = lambda queries, cleaned_names: catalogue.index.search(queries, fetch_int)
+            variant = self.index_backend
+        if self.units:
+            # величины каталога разобраны в prepare_catalogue один раз на сессию
+            self.rescorer = UnitRescorer(catalogue.products_df['article'], catalogue.units)
+
+        cache_dir = backend_cache_dir(self.cache_dir, self.inference_backend)
+        if cache_dir and self.use_dealer_cache:
+            # повторяющиеся названия дилеров берутся из кэша без пересчёта
+            self.dealer_cache = DealerEmbeddingCache(cache_dir, model_version(self.inference_backend))
+            self.catalogue_key = catalogue_key(catalogue.products_df['article'],
+                                               catalogue.products_df['name'],
+                                               self.quantity_int,
+                                               f'{variant}:units' if self.units else variant)
+
+    def _rank(self, dealer_names: list[str],
+              stats: Optional[dict]) -> tuple[list[list[str]], list[list[float]]]:
+        # ранжирование товаров заказчика для очищенных названий дилеров
+        if self._search is None:
+            self._prepare_model(stats)
+        cascade_timings = dict(self.cascade.timings) if self.cascade is not None else None
+
+        def embed(cleaned_names: list[str]) -> np.ndarray:
+            with _timed(stats, 'embed_dealers'):
+                return self._embed(cleaned_names)
+
+        def rank(queries: np.ndarray, cleaned_names: list[str]) -> tuple[np.ndarray, np.ndarray]:
+            with _timed(stats, 'rank'):
+                ranked_articles, ranked_scores = self._search(queries, cleaned_names)
+                if self.rescorer is None:
+                    return ranked_articles, ranked_scores
+                return self.rescorer.rescore(ranked_articles, ranked_scores, cleaned_names,
+                                             self.quantity_int)
+
+        if self.dealer_cache is not None:
+            ranked_articles, ranked_scores = self.dealer_cache.ranked(dealer_names, self.catalogue_key,
+                                                                      embed, rank)
+        else:
+            ranked_articles, ranked_scores = rank(embed(dealer_names), dealer_names)
+            ranked_articles, ranked_scores = ranked_articles.tolist(), ranked_scores.tolist()
+        if cascade_timings is not None and stats is not None:
+            for phase in ('retrieve', 'rerank'):
+                stats[phase] = stats.get(phase, 0.0) + self.cascade.timings[phase] - cascade_timings[phase]
+        return ranked_articles, ranked_scores
+
+
+@contextmanager
+def _timed(stats: Optional[dict], phase: str) -> Iterator[None]:
+    # время этапа сопоставления накапливается в stats[phase] (секунды)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats[phase] = stats.get(phase, 0.0) + time.perf_counter() - start
+
+
+def _matches(product_urls: list[str],
+             resolved: list[Optional[tuple[str, str]]],
+             ranked: dict[int, tuple[list[str], list[float]]]) -> Iterator[Match]:
+    for i, product_url in enumerate(product_urls):
+        if resolved[i] is not None:
+            # точное совпадение - единственный уверенный вариант
+            article, stage = resolved[i]
+            yield Match(product_url, article, 0, 1.0, stage)
+            continue
+        for compliance_number, (article, score) in enumerate(zip(*ranked[i])):
+            yield Match(product_url, article, compliance_number, score)
 
 
 # основная функция
 def result(marketing_product_csv: io.TextIOBase,
            marketing_dealerprice_csv: io.TextIOBase, 
-           quantity_int: int) -> str:
+           quantity_int: int,
+           batch_size: int = BATCH_SIZE,
+           cache_dir: Optional[str] = CACHE_DIR,
+           matcher: str = MATCHER) -> str:
     """
     Parameters:
     marketing_product_csv (io.TextIOBase): Файл CSV с информацией о товарах производимых заказчиком.
     marketing_dealerprice_csv (io.TextIOBase): Файл CSV с информацией о товарах дилера.
     quantity_int (int): Количество возвращаемых, наиболее подходящих товаров заказчика.
+    batch_size (int): Размер батча при получении эмбеддингов.
+    cache_dir (Optional[str]): Директория кэша эмбеддингов, None - без кэша.
+    matcher (str): Модель сопоставления (см. ML/matchers.py).
 
     Returns:
     str: Результат в формате JSON.
@@ -116,25 +532,24 @@ def result(marketing_product_csv: io.TextIOBase,
     # csv to dataset
     marketing_product_df = pd.read_csv(marketing_product_csv)
     marketing_dealerprice_df = pd.read_csv(marketing_dealerprice_csv)
-    
-    # clean df
-    marketing_product_df = marketing_product_df[['article', 'name']].dropna().drop_duplicates().reset_index(drop=True)
-    marketing_dealerprice_df = marketing_dealerprice_df[['product_url', 'product_name']].dropna().drop_duplicates().reset_index(drop=True)
-    
-    # clean string
-    marketing_product_df['name'] = marketing_product_df['name'].astype('str').apply(clean_string)
-    marketing_dealerprice_df['product_name'] = marketing_dealerprice_df['product_name'].astype('str').apply(clean_string)
-    
-    # embedding product
-    products_embedding = marketing_product_df['name'].apply(sentence_embedding)
-    
+
+    # все названия товара, которые есть в файле
+    alias_columns = [column for column in ALIAS_COLUMNS if column in marketing_product_df]
+    products = product_aliases(marketing_product_df[['article', *alias_columns]].to_numpy())
+    code_columns = [column for column in CODE_COLUMNS if column in marketing_product_df]
+    codes = product_codes(marketing_product_df[['article', *code_columns]].to_numpy())
+
     # predict
-    rez = marketing_dealerprice_df.set_index('product_url')['product_name'].apply(lambda x: rank_products(x, 
-                                                                                                          marketing_product_df, 
-                                                                                                          products_embedding, 
-                                                                                                          quantity_int)).to_dict()
+    rez = {}
+    for product_match in match(products,
+                               marketing_dealerprice_df[['product_url', 'product_name']].to_numpy(),
+                               quantity_int,
+                               batch_size,
+                               cache_dir,
+                               matcher=matcher,
+                               codes=codes):
+        rez.setdefault(product_match.product_url, []).append(product_match.article)
     # result to JSON
     rez_json = json.dumps(rez, ensure_ascii=False)
     
     return rez_json
-
@@ -0,0 +1,246 @@
+# сменные модели сопоставления с общим интерфейсом
+import os
+import threading
+from abc import ABC, abstractmethod
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+
+from .dealer_cache import catalogue_key
+from .ranking import normalize_rows, top_k
+from .registry import INFERENCE_BACKEND
+
+# модель сопоставления по умолчанию ('labse', 'tfidf', 'sentence_transformer' или 'cascade')
+MATCHER = os.environ.get('ML_MATCHER', 'labse')
+SENTENCE_TRANSFORMER = 'distiluse-base-multilingual-cased-v1'
+
+
+class Matcher(ABC):
+    """
+    Базовый класс модели сопоставления.
+    fit запоминает каталог (артикулы и очищенные названия, у одного артикула
+    может быть несколько названий), transform переводит очищенные названия
+    в нормированные векторы, search и top_k возвращают лучшие артикулы
+    каталога. Близость артикула - максимум по его названиям.
+    Наследники реализуют transform и, при необходимости, _fit
+    (обучение векторизатора).
+    """
+    name = ''
+
+    def __init__(self) -> None:
+        self.group_articles = np.empty(0, dtype=object)
+        self.group_starts = None
+        self.vectors = None
+
+    def fit(self, articles: list[str], cleaned_names: list[str]) -> 'Matcher':
+        """
+        Parameters:
+        articles (list[str]): Артикулы товаров заказчика.
+        cleaned_names (list[str]): Очищенные названия в порядке articles.
+
+        Returns:
+        Matcher: Обученная модель (self).
+        """
+        entry_group, group_articles = pd.factorize(pd.Series(list(articles), dtype=object))
+        # названия одного артикула идут подряд, чтобы взять максимум через reduceat
+        order = np.argsort(entry_group, kind='stable')
+        cleaned_names = list(cleaned_names)
+        cleaned_names = [cleaned_names[i] for i in order]
+        group_starts = np.flatnonzero(np.diff(entry_group[order], prepend=-1))
+
+        self._fit(cleaned_names)
+        self.vectors = self.transform(cleaned_names)
+        self.group_articles = np.asarray(group_articles, dtype=object)
+        self.group_starts = group_starts if len(group_starts) < len(order) else None
+        return self
+
+    def _fit(self, cleaned_names: list[str]) -> None:
+        pass
+
+    @abstractmethod
+    def transform(self, cleaned_names: list[str]):
+        """
+        Parameters:
+        cleaned_names (list[str]): Очищенные названия.
+
+        Returns:
+        np.ndarray или scipy.sparse.csr_matrix: Векторы с единичной L2-нормой.
+        """
+
+    def search(self, queries, quantity_int: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Parameters:
+        queries (np.ndarray или scipy.sparse.csr_matrix): Результат transform.
+        quantity_int (int): Количество возвращаемых, наиболее подходящих товаров.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Артикулы и косинусная близость,
+        по строке на каждый запрос, по убыванию близости.
+        """
+        groups, scores = self.search_groups(queries, quantity_int)
+        return self.group_articles[groups], scores
+
+    def search_groups(self, queries, quantity_int: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Parameters:
+        queries (np.ndarray или scipy.sparse.csr_matrix): Результат transform.
+        quantity_int (int): Количество возвращаемых, наиболее подходящих товаров.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Номера артикулов в group_articles
+        и косинусная близость.
+        """
+        return top_k(queries, self.vectors,
+                     min(quantity_int, len(self.group_articles)),
+                     group_starts=self.group_starts)
+
+    def top_k(self, cleaned_names: list[str], quantity_int: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Parameters:
+        cleaned_names (list[str]): Очищенные названия товаров дилеров.
+        quantity_int (int): Количество возвращаемых, наиболее подходящих товаров.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Артикулы и косинусная близость (см. search).
+        """
+        return self.search(self.transform(cleaned_names), quantity_int)
+
+    def top_k_groups(self, cleaned_names: list[str], quantity_int: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Parameters:
+        cleaned_names (list[str]): Очищенные названия товаров дилеров.
+        quantity_int (int): Количество возвращаемых, наиболее подходящих товаров.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Номера артикулов и косинусная близость (см. search_groups).
+        """
+        return self.search_groups(self.transform(cleaned_names), quantity_int)
+
+
+class TfidfMatcher(Matcher):
+    """
+    TF-IDF по символьным (внутри слов) и словесным n-граммам, разреженные
+    матрицы. Обучается за доли секунды и работает без модели, подходит
+    для быстрых подсказок.
+    """
+    name = 'tfidf'
+
+    def __init__(self, char_ngram_range: tuple[int, int] = (1, 3),
+                 word_ngram_range: tuple[int, int] = (1, 2)) -> None:
+        super().__init__()
+        self.char_ngram_range = char_ngram_range
+        self.word_ngram_range = word_ngram_range
+        self.vectorizer = None
+
+    def _fit(self, cleaned_names):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.pipeline import FeatureUnion
+
+        self.vectorizer = FeatureUnion([
+            ('char', TfidfVectorizer(analyzer='char_wb',
+                                     ngram_range=self.char_ngram_range,
+                                     sublinear_tf=True,
+                                     dtype=np.float32)),
+            ('word', TfidfVectorizer(analyzer='word',
+                                     ngram_range=self.word_ngram_range,
+                                     token_pattern=r'(?u)\b\w+\b',
+                                     sublinear_tf=True,
+                                     dtype=np.float32)),
+        ]).fit(cleaned_names)
+
+    def transform(self, cleaned_names):
+        from sklearn.preprocessing import normalize
+
+        return normalize(self.vectorizer.transform(list(cleaned_names))).astype(np.float32)
+
+
+class SentenceTransformerMatcher(Matcher):
+    """
+    Эмбеддинги SentenceTransformer (нужен пакет sentence-transformers,
+    без него модель не регистрируется в MATCHERS).
+    """
+    name = 'sentence_transformer'
+    _models = {}
+
+    def __init__(self, model_name: str = SENTENCE_TRANSFORMER, batch_size: int = 64) -> None:
+        super().__init__()
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+    def transform(self, cleaned_names):
+        if self.model_name not in self._models:
+            from sentence_transformers import SentenceTransformer
+
+            self._models[self.model_name] = SentenceTransformer(self.model_name)
+        return self._models[self.model_name].encode(list(cleaned_names),
+                                                    batch_size=self.batch_size,
+                                                    normalize_embeddings=True,
+                                                    convert_to_numpy=True).astype(np.float32)
+
+
+class LabseMatcher(Matcher):
+    """
+    Эмбеддинги LaBSE (ML/registry.py) без кэша на диске.
+    Основной путь сопоставления с кэшем и индексом - ML.main_script.match.
+    """
+    name = 'labse'
+
+    def __init__(self, batch_size: int = 64, inference_backend: str = INFERENCE_BACKEND) -> None:
+        super().__init__()
+        self.batch_size = batch_size
+        self.inference_backend = inference_backend
+
+    def transform(self, cleaned_names):
+        # main_script сам использует модели сопоставления, поэтому импорт здесь
+        from .main_script import sentence_embeddings
+
+        return normalize_rows(sentence_embeddings(list(cleaned_names),
+                                                  self.batch_size,
+                                                  self.inference_backend))
+
+
+# sentence-transformers - необязательная зависимость
+MATCHERS = {matcher.name: matcher for matcher in (LabseMatcher, TfidfMatcher, SentenceTransformerMatcher)
+            if matcher is not SentenceTransformerMatcher or find_spec('sentence_transformers')}
+# допустимые значения matcher в ML.main_script.match: модели и двухстадийный
+# путь 'cascade' (отбор кандидатов TF-IDF и переранжирование LaBSE, ML/cascade.py)
+MATCHER_CHOICES = (*MATCHERS, 'cascade')
+
+_fitted_matchers = {}
+_lock = threading.Lock()
+
+
+def get_matcher(name: str = MATCHER, **kwargs) -> Matcher:
+    """
+    Parameters:
+    name (str): Имя модели сопоставления (см. MATCHERS).
+    kwargs: Параметры конструктора модели.
+
+    Returns:
+    Matcher: Новая, не обученная модель.
+    """
+    if name not in MATCHERS:
+        raise ValueError(f'Неизвестная модель сопоставления: {name}')
+    return MATCHERS[name](**kwargs)
+
+
+def fitted_matcher(name: str, articles: list[str], cleaned_names: list[str]) -> Matcher:
+    """
+    Parameters:
+    name (str): Имя модели сопоставления (см. MATCHERS).
+    articles (list[str]): Артикулы товаров заказчика.
+    cleaned_names (list[str]): Очищенные названия в порядке articles.
+
+    Returns:
+    Matcher: Модель, обученная на каталоге. Для каждой модели в процессе
+    хранится последний обученный экземпляр, пока каталог не изменится.
+    """
+    articles, cleaned_names = list(articles), list(cleaned_names)
+    key = catalogue_key(articles, cleaned_names, 0, name)
+    with _lock:
+        cached = _fitted_matchers.get(name)
+        if cached is None or cached[0] != key:
+            cached = (key, get_matcher(name).fit(articles, cleaned_names))
+            _fitted_matchers[name] = cached
+    return cached[1]
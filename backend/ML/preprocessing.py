@@ -0,0 +1,55 @@
+# предобработка названий товаров
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+# константы
+SPACES = r'(?<=[а-яА-Я])(?=[a-zA-Z])|(?<=[a-zA-Z])(?=[а-яА-Я])'
+COMMA_OUT_LINE = r',\s'
+DROP_BRACKET = r'[()\s]'
+DUP_SPACES = r'([ ])\1+'
+DROP_SYMBOL = r'["\-/]'
+BRANDS = ('prosept', 'просепт')
+CACHE_SIZE = 100000 # количество запоминаемых очищенных строк
+
+# скомпилированные шаблоны: внешние запятые, скобки, пробельные символы
+# и лишние символы заменяются на пробел за один проход
+SPACES_RE = re.compile(SPACES)
+TO_SPACE_RE = re.compile(rf'{COMMA_OUT_LINE}|{DROP_BRACKET}|{DROP_SYMBOL}')
+DUP_SPACES_RE = re.compile(r' {2,}')
+
+
+# функция для предобработки текста
+@lru_cache(maxsize=CACHE_SIZE)
+def clean_string(input_string: str) -> str:
+    """
+    Parameters:
+    input_string (str): Строка для очистки.
+
+    Returns:
+    output_string (str): Очищенная строка.
+    """
+    input_string = SPACES_RE.sub(' ', input_string.lower()) # нижний регистр/пропущенные пробелы
+    input_string = TO_SPACE_RE.sub(' ', input_string) # внешние запятые, '(', ')', лишние символы
+    for brand in BRANDS:
+        input_string = input_string.replace(brand, '') # убираем название фирмы
+    output_string = DUP_SPACES_RE.sub(' ', input_string) # обработка двойных пробелов
+    return output_string
+
+
+# функция для предобработки столбца целиком
+def clean_series(input_series: pd.Series) -> pd.Series:
+    """
+    Parameters:
+    input_series (pd.Series): Столбец строк для очистки.
+
+    Returns:
+    pd.Series: Очищенные строки, результат совпадает с clean_string для каждой строки.
+    """
+    output_series = input_series.astype('str').map(str.lower) # как str.lower для любых букв
+    output_series = output_series.str.replace(SPACES_RE, ' ', regex=True)
+    output_series = output_series.str.replace(TO_SPACE_RE, ' ', regex=True)
+    for brand in BRANDS:
+        output_series = output_series.str.replace(brand, '', regex=False)
+    return output_series.str.replace(DUP_SPACES_RE, ' ', regex=True)
@@ -0,0 +1,69 @@
+# ранжирование товаров заказчика по косинусной близости
+from typing import Optional
+
+import numpy as np
+
+CHUNK_SIZE = 4096 # количество строк дилеров, сравниваемых за одно умножение матриц
+
+
+def normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Parameters:
+    embeddings (np.ndarray): Матрица эмбеддингов (по строке на название).
+
+    Returns:
+    np.ndarray: Матрица с единичной L2-нормой каждой строки (float32).
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.maximum(norms, np.finfo(np.float32).eps)
+
+
+def top_k(queries: np.ndarray,
+          candidates: np.ndarray,
+          quantity_int: int,
+          chunk_size: int = CHUNK_SIZE,
+          group_starts: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Parameters:
+    queries (np.ndarray): Нормированные эмбеддинги товаров дилеров
+    (или разреженная матрица scipy.sparse).
+    candidates (np.ndarray): Нормированные эмбеддинги товаров заказчика
+    (или разреженная матрица scipy.sparse).
+    quantity_int (int): Количество возвращаемых, наиболее подходящих товаров.
+    chunk_size (int): Количество строк queries в одном умножении матриц,
+    ограничивает пиковый расход памяти (chunk_size x len(candidates)).
+    group_starts (Optional[np.ndarray]): Начала групп строк candidates
+    (например, нескольких названий одного товара, идущих подряд).
+    Если задано, близость группы - максимум по её строкам, и ранжируются группы.
+
+    Returns:
+    tuple[np.ndarray, np.ndarray]: Индексы кандидатов (или групп) и косинусная
+    близость, обе матрицы формы (len(queries), quantity_int), по убыванию близости.
+    """
+    n_queries = queries.shape[0]
+    n_candidates = candidates.shape[0] if group_starts is None else len(group_starts)
+    quantity_int = min(quantity_int, n_candidates)
+    indices = np.empty((n_queries, quantity_int), dtype=np.int64)
+    scores = np.empty((n_queries, quantity_int), dtype=np.float32)
+    if not quantity_int:
+        return indices, scores
+
+    for start in range(0, n_queries, chunk_size):
+        chunk_scores = queries[start:start + chunk_size] @ candidates.T
+        if hasattr(chunk_scores, 'toarray'):
+            # произведение разреженных матриц
+            chunk_scores = chunk_scores.toarray()
+        if group_starts is not None:
+            chunk_scores = np.maximum.reduceat(chunk_scores, group_starts, axis=1)
+        if quantity_int < chunk_scores.shape[1]:
+            # отбираем quantity_int лучших без полной сортировки
+            chunk_index = np.argpartition(-chunk_scores, quantity_int - 1, axis=1)[:, :quantity_int]
+        else:
+            chunk_index = np.broadcast_to(np.arange(chunk_scores.shape[1]), chunk_scores.shape)
+        chunk_top = np.take_along_axis(chunk_scores, chunk_index, axis=1)
+        # сортируем только отобранных кандидатов
+        order = np.argsort(-chunk_top, axis=1, kind='stable')
+        indices[start:start + chunk_size] = np.take_along_axis(chunk_index, order, axis=1)
+        scores[start:start + chunk_size] = np.take_along_axis(chunk_top, order, axis=1)
+    return indices, scores
@@ -0,0 +1,105 @@
+# ленивая загрузка модели, один экземпляр на процесс
+import os
+import threading
+from typing import Any, NamedTuple
+
+# версия модели на Hugging Face, она же версия для ключей кэша эмбеддингов
+bert_version = 'cointegrated/LaBSE-en-ru'
+
+# откуда загружать модель: имя на Hugging Face или локальная директория
+# (для серверов без доступа к сети задаётся переменной окружения ML_MODEL_PATH)
+MODEL_PATH = os.environ.get('ML_MODEL_PATH', bert_version)
+
+# бэкенд инференса: 'fp32' - исходная модель PyTorch,
+# 'int8' - динамическая квантизация линейных слоёв (только CPU)
+INFERENCE_BACKENDS = ('fp32', 'int8')
+INFERENCE_BACKEND = os.environ.get('ML_INFERENCE_BACKEND', 'fp32')
+
+
+class LoadedModel(NamedTuple):
+    tokenizer: Any
+    model: Any
+    device: Any
+
+
+_loaded_models = {}
+_lock = threading.Lock()
+
+
+def model_version(inference_backend: str = None) -> str:
+    """
+    Parameters:
+    inference_backend (str): Бэкенд инференса, по умолчанию INFERENCE_BACKEND.
+
+    Returns:
+    str: Версия модели для ключей кэша эмбеддингов и индекса: эмбеддинги
+    квантизованной модели немного отличаются и кэшируются отдельно.
+    """
+    inference_backend = inference_backend or INFERENCE_BACKEND
+    if inference_backend == 'fp32':
+        return bert_version
+    return f'{bert_version}+{inference_backend}'
+
+
+def _load(model_path: str, inference_backend: str) -> LoadedModel:
+    # torch и transformers импортируются только при первой загрузке модели,
+    # чтобы manage.py и веб-процессы не тратили на них время при старте
+    import torch
+    from transformers import BertModel, BertTokenizer
+
+    local_files_only = os.path.isdir(model_path)
+    tokenizer = BertTokenizer.from_pretrained(model_path, local_files_only=local_files_only)
+    model = BertModel.from_pretrained(model_path, local_files_only=local_files_only)
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = model.eval()
+    if inference_backend == 'int8':
+        # веса линейных слоёв хранятся в int8, активации квантуются на лету;
+        # квантизованные ядра есть только для CPU
+        device = torch.device('cpu')
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model.to(device)
+    return LoadedModel(tokenizer, model, device)
+
+
+def get_model(model_path: str = None, inference_backend: str = None) -> LoadedModel:
+    """
+    Parameters:
+    model_path (str): Имя модели или путь к локальной директории,
+    по умолчанию MODEL_PATH. Учитывается только при первой загрузке.
+    inference_backend (str): Бэкенд инференса ('fp32' или 'int8'),
+    по умолчанию INFERENCE_BACKEND.
+
+    Returns:
+    LoadedModel: Токенизатор, модель и устройство, общие для всего процесса.
+    """
+    inference_backend = inference_backend or INFERENCE_BACKEND
+    if inference_backend not in INFERENCE_BACKENDS:
+        raise ValueError(f'Неизвестный бэкенд инференса: {inference_backend}')
+    if inference_backend not in _loaded_models:
+        with _lock:
+            if inference_backend not in _loaded_models:
+                _loaded_models[inference_backend] = _load(model_path or MODEL_PATH,
+                                                          inference_backend)
+    return _loaded_models[inference_backend]
+
+
+def warm_up(model_path: str = None, inference_backend: str = None) -> LoadedModel:
+    """
+    Загружает модель и делает один пробный прогон, чтобы первый
+    настоящий запрос не тратил время на инициализацию.
+
+    Parameters:
+    model_path (str): Имя модели или путь к локальной директории.
+    inference_backend (str): Бэкенд инференса ('fp32' или 'int8').
+
+    Returns:
+    LoadedModel: Загруженная модель.
+    """
+    import torch
+
+    loaded_model = get_model(model_path, inference_backend)
+    encoded = loaded_model.tokenizer(['прогрев'], return_tensors='pt').to(loaded_model.device)
+    with torch.no_grad():
+        loaded_model.model(**encoded)
+    return loaded_model
@@ -0,0 +1,170 @@
+# снимки данных в колоночном формате: таблицы Parquet и эмбеддинги Arrow
+import json
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .embedding_store import ProductEmbeddingStore
+from .lookup import CODE_COLUMNS, product_codes
+from .main_script import ALIAS_COLUMNS, product_aliases
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+EMBEDDINGS = ('product_embeddings', 'dealer_embeddings') # кэши эмбеддингов в снимке
+
+
+def import_pyarrow():
+    # pyarrow - необязательная зависимость, нужна только для снимков и файлов Parquet
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.csv
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError('Для снимков и файлов Parquet установите пакет pyarrow') from error
+    return pyarrow
+
+
+def read_manifest(snapshot_dir: str) -> dict:
+    """
+    Parameters:
+    snapshot_dir (str): Директория снимка.
+
+    Returns:
+    dict: Манифест снимка: версия, время создания, таблицы и эмбеддинги
+    (файл, количество строк, размер, схема).
+    """
+    with open(os.path.join(snapshot_dir, MANIFEST), encoding='utf-8') as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.get('format') != FORMAT_VERSION:
+        raise ValueError(f'Неподдерживаемый формат снимка: {manifest.get("format")}')
+    return manifest
+
+
+def snapshot_versions(root: str) -> list[str]:
+    """
+    Parameters:
+    root (str): Директория со снимками.
+
+    Returns:
+    list[str]: Версии готовых снимков (с манифестом) по возрастанию.
+    """
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root)
+                  if not name.startswith('.') and os.path.exists(os.path.join(root, name, MANIFEST)))
+
+
+def latest_snapshot(root: str) -> Optional[str]:
+    """
+    Parameters:
+    root (str): Директория со снимками.
+
+    Returns:
+    Optional[str]: Директория последнего снимка или None, если снимков нет.
+    """
+    versions = snapshot_versions(root)
+    return os.path.join(root, versions[-1]) if versions else None
+
+
+def load_table(snapshot_dir: str,
+               name: str,
+               columns: Optional[list[str]] = None,
+               arrow_dtypes: bool = False) -> pd.DataFrame:
+    """
+    Parameters:
+    snapshot_dir (str): Директория снимка.
+    name (str): Таблица снимка (например, 'marketing_product').
+    columns (Optional[list[str]]): Читаемые столбцы, None - все.
+    arrow_dtypes (bool): Оставить столбцы в памяти Arrow (pd.ArrowDtype) без копирования.
+    Иначе числовые столбцы передаются в NumPy без копирования, а строки
+    становятся объектами Python.
+
+    Returns:
+    pd.DataFrame: Таблица снимка.
+    """
+    pyarrow = import_pyarrow()
+    table_file = read_manifest(snapshot_dir)['tables'][name]['file']
+    table = pyarrow.parquet.read_table(os.path.join(snapshot_dir, table_file),
+                                       columns=columns, memory_map=True)
+    if arrow_dtypes:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    # каждый столбец - отдельный блок, память Arrow освобождается по мере переноса
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def load_embeddings(snapshot_dir: str,
+                    name: str = 'product_embeddings') -> tuple[list[str], np.ndarray, str]:
+    """
+    Parameters:
+    snapshot_dir (str): Директория снимка.
+    name (str): Кэш эмбеддингов ('product_embeddings' или 'dealer_embeddings').
+
+    Returns:
+    tuple[list[str], np.ndarray, str]: Ключи строк (см. ProductEmbeddingStore.key),
+    матрица эмбеддингов и версия модели. Файл Arrow открывается через memory map,
+    матрица - представление NumPy этой памяти без копирования (только для чтения).
+    """
+    pyarrow = import_pyarrow()
+    embeddings = read_manifest(snapshot_dir)['embeddings'][name]
+    source = pyarrow.memory_map(os.path.join(snapshot_dir, embeddings['file']))
+    table = pyarrow.ipc.open_file(source).read_all()
+    keys = table.column('key').to_pylist()
+    if not keys:
+        return keys, np.empty((0, embeddings['dim']), dtype=np.float32), embeddings['model_version']
+    # файл пишется одним пакетом, поэтому столбец состоит из одного куска
+    vectors = table.column('embedding').chunk(0)
+    matrix = vectors.flatten().to_numpy(zero_copy_only=True).reshape(len(vectors), embeddings['dim'])
+    return keys, matrix, embeddings['model_version']
+
+
+def write_embeddings(cache_dir: str, name: str, path: str) -> Optional[dict]:
+    """
+    Parameters:
+    cache_dir (str): Директория кэша эмбеддингов (см. ML.main_script.backend_cache_dir).
+    name (str): Кэш эмбеддингов ('product_embeddings' или 'dealer_embeddings').
+    path (str): Путь к файлу Arrow, в который записываются эмбеддинги.
+
+    Returns:
+    Optional[dict]: Запись манифеста (строки, размерность, версия модели)
+    или None, если кэша нет или он не согласован.
+    """
+    pyarrow = import_pyarrow()
+    try:
+        with open(os.path.join(cache_dir, f'{name}.json'), encoding='utf-8') as index_file:
+            version = json.load(index_file).get('model_version')
+    except (OSError, ValueError):
+        return None
+    # формат файлов у кэшей товаров и дилеров общий
+    keys, matrix = ProductEmbeddingStore(cache_dir, version, name).load()
+    if matrix is None:
+        return None
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    dim = matrix.shape[1] if matrix.ndim == 2 else 0
+    vectors = pyarrow.FixedSizeListArray.from_arrays(pyarrow.array(matrix.reshape(-1)), dim)
+    table = pyarrow.table({'key': pyarrow.array(keys, pyarrow.string()), 'embedding': vectors})
+    # Arrow IPC без сжатия: при чтении матрица отображается в память без копирования
+    with pyarrow.OSFile(path, 'wb') as sink:
+        with pyarrow.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(len(keys), 1))
+    return {'rows': len(keys), 'dim': dim, 'model_version': version}
+
+
+def load_catalogue(snapshot_dir: str) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+    """
+    Parameters:
+    snapshot_dir (str): Директория снимка.
+
+    Returns:
+    tuple[list[tuple[str, str]], list[tuple[str, str]]]: Пары (article, name)
+    товаров заказчика со всеми названиями и пары (article, code)
+    для точного сопоставления - аргументы products и codes функции match.
+    """
+    products_df = load_table(snapshot_dir, 'marketing_product',
+                             ['article', *ALIAS_COLUMNS, *CODE_COLUMNS])
+    products = list(product_aliases(products_df[['article', *ALIAS_COLUMNS]].to_numpy()))
+    codes = list(product_codes(products_df[['article', *CODE_COLUMNS]].to_numpy()))
+    return products, codes
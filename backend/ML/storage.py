@@ -0,0 +1,91 @@
+# согласованная запись кэшей на диск: файл данных и JSON-индекс со ссылкой на него
+import json
+import os
+import tempfile
+import uuid
+from contextlib import suppress
+from typing import Callable, Optional
+
+
+def replace_file(path: str, write: Callable[[str], None]) -> None:
+    """
+    Функция атомарно заменяет файл path: write пишет во временный файл
+    (tempfile.mkstemp в той же директории, своё имя у каждого потока
+    и процесса), который затем переименовывается в path.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def read_index(index_path: str) -> Optional[dict]:
+    """
+    Parameters:
+    index_path (str): Путь к JSON-индексу.
+
+    Returns:
+    Optional[dict]: Содержимое индекса или None, если его нет или он повреждён.
+    """
+    try:
+        with open(index_path, encoding='utf-8') as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return None
+    return index if isinstance(index, dict) else None
+
+
+def data_path(index_path: str, index: dict) -> Optional[str]:
+    """
+    Parameters:
+    index_path (str): Путь к JSON-индексу.
+    index (dict): Содержимое индекса (см. save_versioned).
+
+    Returns:
+    Optional[str]: Путь к файлу данных, на который ссылается индекс,
+    или None, если индекс записан без данных или в старом формате.
+    """
+    data_file = index.get('data')
+    if not isinstance(data_file, str):
+        return None
+    return os.path.join(os.path.dirname(index_path), data_file)
+
+
+def save_versioned(index_path: str, suffix: str,
+                   write_data: Optional[Callable[[str], None]],
+                   index: dict) -> None:
+    """
+    Функция сохраняет файл данных и JSON-индекс так, что читатель
+    всегда получает пару от одной записи. Данные пишутся в новый файл
+    '<имя индекса>.<версия><suffix>', затем атомарно заменяется индекс,
+    в котором записано имя этого файла ('data'): замена индекса -
+    единственное переключение. Файл данных предыдущей записи остаётся
+    для читателей, уже открывших её индекс, удаляется файл позапрошлой.
+    write_data получает путь к файлу данных, None - запись без данных.
+    """
+    directory = os.path.dirname(index_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    previous = read_index(index_path) or {}
+    data_file = None
+    if write_data is not None:
+        name = os.path.splitext(os.path.basename(index_path))[0]
+        data_file = f'{name}.{uuid.uuid4().hex}{suffix}'
+        write_data(os.path.join(directory, data_file))
+    index = {**index, 'data': data_file, 'previous': previous.get('data')}
+
+    def write_index(path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as index_file:
+            json.dump(index, index_file, ensure_ascii=False)
+
+    replace_file(index_path, write_index)
+    stale = previous.get('previous')
+    if isinstance(stale, str) and stale not in (data_file, previous.get('data')):
+        with suppress(OSError):
+            os.remove(os.path.join(directory, stale))
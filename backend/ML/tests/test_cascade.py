@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+from ML.cascade import Cascade
+
+ARTICLES = ['A1', 'A2', 'A3', 'A3', 'A4']
+NAMES = ['грунт акриловый', 'грунт алкидный', 'эмаль белая', 'эмаль для пола', 'лак яхтный']
+# эмбеддинги каталога: по оси на артикул
+EMBEDDINGS = np.eye(4, dtype=np.float32)[[0, 1, 2, 2, 3]]
+
+
+class StubEmbed:
+    # эмбеддинги названий дилеров задаются тестом, вызовы запоминаются
+    def __init__(self, vectors: dict[str, list[float]]):
+        self.vectors = vectors
+        self.calls = []
+
+    def __call__(self, cleaned_names: list[str]) -> np.ndarray:
+        self.calls.append(list(cleaned_names))
+        return np.array([self.vectors[name] for name in cleaned_names], dtype=np.float32)
+
+
+class CascadeTest(unittest.TestCase):
+    def rank(self, vectors: dict[str, list[float]], quantity_int: int = 2):
+        embed = StubEmbed(vectors)
+        cascade = Cascade(ARTICLES, NAMES, EMBEDDINGS, embed, candidates=2)
+        names = list(vectors)
+        shortlist = cascade.retriever.group_articles[cascade.shortlist(names)]
+        articles, scores = cascade.rank(cascade.embed(names), names, quantity_int)
+        self.assertEqual(embed.calls, [names])
+        return shortlist, articles, scores
+
+    def test_rerank_reorders_shortlist(self):
+        # TF-IDF ставит A1 первым, эмбеддинг запроса ближе к A2
+        shortlist, articles, scores = self.rank({'грунт акриловый': [0.2, 1, 0, 0]})
+        self.assertEqual(list(shortlist[0]), ['A1', 'A2'])
+        self.assertEqual(list(articles[0]), ['A2', 'A1'])
+        self.assertGreater(scores[0][0], scores[0][1])
+
+    def test_candidates_outside_shortlist_not_scored(self):
+        # эмбеддинг запроса совпадает с A4, но TF-IDF его не отбирает
+        shortlist, articles, scores = self.rank({'грунт': [0, 0.1, 0, 1]})
+        self.assertNotIn('A4', shortlist[0])
+        self.assertEqual(list(articles[0]), ['A2', 'A1'])
+        self.assertLess(scores[0][0], 0.5)
+
+    def test_article_score_is_max_over_names(self):
+        shortlist, articles, scores = self.rank({'эмаль белая': [0, 0, 1, 0]}, quantity_int=1)
+        self.assertEqual(shortlist[0][0], 'A3')
+        self.assertEqual(list(articles[0]), ['A3'])
+        self.assertAlmostEqual(float(scores[0][0]), 1.0, places=5)
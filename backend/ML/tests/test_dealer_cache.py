@@ -0,0 +1,104 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from ML.dealer_cache import DealerEmbeddingCache
+
+
+class CountingEmbed:
+    # эмбеддинг - длина названия и код первой буквы, вызовы запоминаются
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, cleaned_names: list[str]) -> np.ndarray:
+        self.calls.append(list(cleaned_names))
+        return np.array([[len(name), ord(name[0])] for name in cleaned_names], dtype=np.float32)
+
+
+class CountingRank:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, queries: np.ndarray, cleaned_names: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        self.calls.append(list(cleaned_names))
+        return rank(queries, cleaned_names)
+
+
+def rank(queries: np.ndarray, cleaned_names: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    return (np.array([[name.upper()] for name in cleaned_names], dtype=object),
+            queries[:, :1].astype(np.float32))
+
+
+class DealerEmbeddingCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = directory.name
+        self.embed = CountingEmbed()
+        self.rank = CountingRank()
+
+    def test_hits_and_misses(self):
+        cache = DealerEmbeddingCache(self.cache_dir, 'v1')
+        cache.ranked(['грунт', 'лак'], 'catalogue', self.embed, self.rank)
+        articles, scores = cache.ranked(['лак', 'эмаль', 'эмаль', 'грунт'], 'catalogue',
+                                        self.embed, self.rank)
+        self.assertEqual(articles, [['ЛАК'], ['ЭМАЛЬ'], ['ЭМАЛЬ'], ['ГРУНТ']])
+        self.assertEqual(scores, [[3.0], [5.0], [5.0], [5.0]])
+        # повторяющееся название ранжируется один раз
+        self.assertEqual(self.embed.calls, [['грунт', 'лак'], ['эмаль']])
+        self.assertEqual(self.rank.calls, [['грунт', 'лак'], ['эмаль']])
+        np.testing.assert_array_equal(cache.embeddings(['лак'], self.embed), [[3, ord('л')]])
+        self.assertEqual(len(self.embed.calls), 2)
+
+    def test_catalogue_change_keeps_embeddings(self):
+        cache = DealerEmbeddingCache(self.cache_dir, 'v1')
+        cache.ranked(['грунт', 'лак'], 'catalogue', self.embed, self.rank)
+        cache.ranked(['грунт'], 'new catalogue', self.embed, self.rank)
+        self.assertEqual(self.rank.calls[1], ['грунт'])
+        self.assertEqual(self.embed.calls, [['грунт', 'лак']])
+        self.assertEqual(list(cache.results), [cache.key('грунт')])
+        self.assertEqual(len(cache.embeddings_by_key), 2)
+
+    def test_lru_eviction(self):
+        cache = DealerEmbeddingCache(self.cache_dir, 'v1', max_size=3)
+        cache.ranked(['a', 'b', 'c'], 'catalogue', self.embed, self.rank)
+        cache.ranked(['a'], 'catalogue', self.embed, self.rank)
+        cache.ranked(['d'], 'catalogue', self.embed, self.rank)
+        # 'b' - давно использованное название
+        self.assertEqual(list(cache.embeddings_by_key), [cache.key(name) for name in 'cad'])
+        self.assertEqual(set(cache.results), set(cache.embeddings_by_key))
+        cache.ranked(['b'], 'catalogue', self.embed, self.rank)
+        self.assertEqual(self.embed.calls[-1], ['b'])
+
+    def test_batch_above_max_size(self):
+        cache = DealerEmbeddingCache(self.cache_dir, 'v1', max_size=2)
+        articles, _ = cache.ranked(['a', 'b', 'c', 'a'], 'catalogue', self.embed, self.rank)
+        self.assertEqual(articles, [['A'], ['B'], ['C'], ['A']])
+        self.assertEqual(list(cache.embeddings_by_key), [cache.key('c'), cache.key('a')])
+
+    def test_save_and_load(self):
+        cache = DealerEmbeddingCache(self.cache_dir, 'v1')
+        cache.ranked(['грунт', 'лак'], 'catalogue', self.embed, self.rank)
+        cache.ranked(['грунт'], 'catalogue', self.embed, self.rank)
+        cache.save()
+        self.assertFalse(cache.dirty)
+
+        loaded = DealerEmbeddingCache(self.cache_dir, 'v1')
+        self.assertFalse(loaded.dirty)
+        self.assertEqual(loaded.catalogue, 'catalogue')
+        self.assertEqual(list(loaded.embeddings_by_key), list(cache.embeddings_by_key))
+        self.assertEqual(loaded.results, cache.results)
+        articles, _ = loaded.ranked(['лак', 'грунт'], 'catalogue', self.embed, self.rank)
+        self.assertEqual(articles, [['ЛАК'], ['ГРУНТ']])
+        self.assertEqual(len(self.rank.calls), 1)
+        # другая версия модели не видит сохранённый кэш
+        self.assertEqual(len(DealerEmbeddingCache(self.cache_dir, 'v2').embeddings_by_key), 0)
+
+    def test_eviction_keeps_current_hits(self):
+        # попадание 'x' и новое 'z' при заполненном кэше
+        cache = DealerEmbeddingCache(self.cache_dir, 'v1', max_size=2)
+        cache.ranked(['x', 'y'], 'catalogue', self.embed, self.rank)
+        articles, _ = cache.ranked(['x', 'z'], 'catalogue', self.embed, self.rank)
+        self.assertEqual(articles, [['X'], ['Z']])
+        self.assertEqual(list(cache.embeddings_by_key), [cache.key('x'), cache.key('z')])
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from ML.embedding_store import ProductEmbeddingStore
+
+
+class CountingEmbed:
+    # эмбеддинг - длина названия и код первой буквы, вызовы запоминаются
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, cleaned_names: list[str]) -> np.ndarray:
+        self.calls.append(list(cleaned_names))
+        return np.array([[len(name), ord(name[0])] for name in cleaned_names], dtype=np.float32)
+
+
+class ProductEmbeddingStoreTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = directory.name
+        self.embed = CountingEmbed()
+
+    def get(self, names: list[str], model_version: str = 'v1') -> np.ndarray:
+        return ProductEmbeddingStore(self.cache_dir, model_version).get(names, self.embed)
+
+    def test_unchanged_names_reused(self):
+        first = self.get(['грунт', 'краска'])
+        second = self.get(['грунт', 'краска'])
+        self.assertEqual(self.embed.calls, [['грунт', 'краска']])
+        np.testing.assert_array_equal(second, first)
+        self.assertIsInstance(second, np.memmap)
+
+    def test_only_changed_names_embedded(self):
+        self.get(['грунт', 'краска', 'лак'])
+        matrix = self.get(['лак', 'эмаль', 'грунт', 'эмаль'])
+        self.assertEqual(self.embed.calls[1], ['эмаль'])
+        np.testing.assert_array_equal(matrix, CountingEmbed()(['лак', 'эмаль', 'грунт', 'эмаль']))
+
+    def test_model_version_change_drops_store(self):
+        self.get(['грунт', 'краска'])
+        self.assertEqual(ProductEmbeddingStore(self.cache_dir, 'v2').load(), ([], None))
+        self.get(['грунт', 'краска'], 'v2')
+        self.assertEqual(self.embed.calls, [['грунт', 'краска'], ['грунт', 'краска']])
+
+    def test_keys_and_matrix_from_one_save(self):
+        store = ProductEmbeddingStore(self.cache_dir, 'v1')
+        for names in (['грунт'], ['краска'], ['лак']):
+            store.save([store.key(name) for name in names], CountingEmbed()(names))
+        keys, matrix = store.load()
+        self.assertEqual(keys, [store.key('лак')])
+        np.testing.assert_array_equal(matrix, CountingEmbed()(['лак']))
+        # остаются индекс, текущая и предыдущая матрицы, временных файлов нет
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
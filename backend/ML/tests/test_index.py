@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from importlib.util import find_spec
+
+import numpy as np
+
+from ML.index import INDEX_BACKENDS, ExactIndex, HNSWIndex, load_index
+
+HAS_HNSWLIB = find_spec('hnswlib') is not None
+
+
+def catalogue(size: int, seed: int = 0) -> tuple[list[str], list[str], np.ndarray]:
+    # у каждого артикула по два названия
+    generator = np.random.default_rng(seed)
+    articles = [f'A{row // 2}' for row in range(size)]
+    ids = [f'{article}|{row}' for row, article in enumerate(articles)]
+    return ids, articles, generator.normal(size=(size, 8)).astype(np.float32)
+
+
+class ProductIndexSearchTest(unittest.TestCase):
+    @unittest.skipUnless(HAS_HNSWLIB, 'hnswlib не установлен')
+    def test_exact_and_hnsw_same_top_k(self):
+        ids, articles, embeddings = catalogue(40)
+        queries = np.random.default_rng(1).normal(size=(5, 8)).astype(np.float32)
+        results = []
+        for index_class in (ExactIndex, HNSWIndex):
+            index = index_class('v1')
+            index.sync(ids, articles, embeddings)
+            results.append(index.search(queries, 3))
+        (exact_articles, exact_scores), (hnsw_articles, hnsw_scores) = results
+        np.testing.assert_array_equal(hnsw_articles, exact_articles)
+        np.testing.assert_allclose(hnsw_scores, exact_scores, atol=1e-5)
+
+    def test_articles_not_repeated(self):
+        ids, articles, embeddings = catalogue(10)
+        index = ExactIndex('v1')
+        index.sync(ids, articles, embeddings)
+        found, scores = index.search(embeddings[:1], 5)
+        self.assertEqual(len(set(found[0])), 5)
+        self.assertEqual(found[0][0], 'A0')
+        self.assertTrue(np.all(np.diff(scores[0]) <= 0))
+
+
+class LoadIndexTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = directory.name
+
+    def check_sync(self, backend: str):
+        path = os.path.join(self.cache_dir, f'product_index_{backend}')
+        ids, articles, embeddings = catalogue(12)
+        load_index(backend, path, 'v1', ids, articles, embeddings)
+
+        # первые две записи удалены, добавлен новый артикул
+        _, _, added = catalogue(2, seed=2)
+        new_ids = ids[2:] + ['N|0', 'N|1']
+        new_articles = articles[2:] + ['N', 'N']
+        new_embeddings = np.vstack([embeddings[2:], added])
+        index = load_index(backend, path, 'v1', new_ids, new_articles, new_embeddings)
+        self.assertEqual(sorted(index.ids), sorted(new_ids))
+
+        reloaded = INDEX_BACKENDS[backend].load(path, 'v1')
+        self.assertEqual(sorted(reloaded.ids), sorted(new_ids))
+        found, _ = reloaded.search(new_embeddings[-1:], 1)
+        self.assertEqual(found[0][0], 'N')
+        found, _ = reloaded.search(embeddings[:1], len(set(new_articles)))
+        self.assertNotIn('A0', found[0])
+
+    def test_exact_sync(self):
+        self.check_sync('exact')
+
+    @unittest.skipUnless(HAS_HNSWLIB, 'hnswlib не установлен')
+    def test_hnsw_sync(self):
+        self.check_sync('hnsw')
+
+    def test_model_version_change_rebuilds(self):
+        path = os.path.join(self.cache_dir, 'product_index_exact')
+        ids, articles, embeddings = catalogue(6)
+        load_index('exact', path, 'v1', ids, articles, embeddings)
+        self.assertIsNone(ExactIndex.load(path, 'v2'))
+        index = load_index('exact', path, 'v2', ids, articles, embeddings)
+        self.assertEqual(index.model_version, 'v2')
+        self.assertIsNotNone(ExactIndex.load(path, 'v2'))
+
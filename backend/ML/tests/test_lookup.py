@@ -0,0 +1,56 @@
+import unittest
+
+import pandas as pd
+
+from ML.lookup import LookupIndex, normalize_code, product_codes
+
+
+class LookupIndexTest(unittest.TestCase):
+    def setUp(self):
+        products = [
+            ('008-1', 4680008140234.0, '', '150254061', 'nan'),
+            ('242-12', None, '314112233', '', ''),
+            ('007-10бц', float('nan'), '', '', ''),
+        ]
+        names = pd.DataFrame({
+            'article': ['008-1', '242-12', '007-10бц', '101-5'],
+            'name': ['антисептик ultra 1 л', 'антигололед 12 кг ', 'грунт', 'грунт'],
+        })
+        self.index = LookupIndex(product_codes(products), names)
+
+    def test_code_stage(self):
+        for url, name in (('https://shop.ru/p/4680008140234', 'Антисептик'),
+                          ('https://shop.ru/p/1', 'Антисептик арт. 008-1'),
+                          ('https://ozon.ru/product/150254061/', ''),
+                          ('https://shop.ru/p/1', 'Грунт 007-10БЦ')):
+            with self.subTest(url=url, name=name):
+                self.assertIsNotNone(self.index.resolve(url, name, 'другое название'))
+                self.assertEqual(self.index.resolve(url, name, 'другое название')[1], 'code')
+        self.assertEqual(self.index.resolve('https://shop.ru/p/1', 'Грунт 007-10БЦ', ''),
+                         ('007-10бц', 'code'))
+
+    def test_name_stage(self):
+        self.assertEqual(self.index.resolve('https://shop.ru/p/1', 'Антигололед', 'антигололед 12 кг'),
+                         ('242-12', 'name'))
+
+    def test_ambiguous(self):
+        # коды двух товаров в одном объявлении и название двух товаров
+        self.assertIsNone(self.index.resolve('https://shop.ru/4680008140234', 'Набор 242-12', 'набор'))
+        self.assertIsNone(self.index.resolve('https://shop.ru/p/1', 'Грунт', 'грунт'))
+        self.assertIsNone(self.index.resolve('https://shop.ru/p/1', 'Пропитка', 'пропитка'))
+
+    def test_resolve_all(self):
+        resolved, counts = self.index.resolve_all(
+            ['https://shop.ru/p/4680008140234', 'https://shop.ru/p/2', 'https://shop.ru/p/3'],
+            ['Антисептик', 'Антигололед', 'Пропитка'],
+            ['антисептик', 'антигололед 12 кг', 'пропитка'],
+        )
+        self.assertEqual(resolved, [('008-1', 'code'), ('242-12', 'name'), None])
+        self.assertEqual(counts, {'code': 1, 'name': 1})
+
+    def test_normalize_code(self):
+        self.assertEqual(normalize_code(4680008140234.0), '4680008140234')
+        self.assertEqual(normalize_code('4680008140234.0'), '4680008140234')
+        self.assertEqual(normalize_code(' 007-10БЦ '), '007-10бц')
+        self.assertEqual(normalize_code(float('nan')), '')
+        self.assertEqual(normalize_code(None), '')
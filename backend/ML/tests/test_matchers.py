@@ -0,0 +1,53 @@
+import unittest
+
+import numpy as np
+
+from ML import matchers
+from ML.matchers import TfidfMatcher, fitted_matcher, get_matcher
+
+ARTICLES = ['A1', 'A2', 'A2', 'A3']
+NAMES = ['грунт акриловый 10 л', 'краска фасадная белая', 'краска для фасада белая', 'лак яхтный']
+
+
+class TfidfMatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.matcher = TfidfMatcher().fit(ARTICLES, NAMES)
+
+    def test_best_article_first(self):
+        found, scores = self.matcher.top_k(['лак яхтный глянцевый', 'грунт акриловый'], 2)
+        self.assertEqual(list(found[:, 0]), ['A3', 'A1'])
+        self.assertTrue(np.all(scores[:, 0] >= scores[:, 1]))
+
+    def test_article_score_is_max_over_names(self):
+        # запрос совпадает с одним из названий A2, близость - по нему
+        found, scores = self.matcher.top_k(['краска для фасада белая', 'краска фасадная белая'], 1)
+        self.assertEqual(list(found[:, 0]), ['A2', 'A2'])
+        np.testing.assert_allclose(scores[:, 0], [1.0, 1.0], atol=1e-5)
+
+    def test_quantity_capped_by_articles(self):
+        found, _ = self.matcher.top_k(['краска'], 10)
+        self.assertEqual(found.shape, (1, 3))
+        self.assertEqual(sorted(found[0]), ['A1', 'A2', 'A3'])
+
+    def test_unknown_matcher(self):
+        with self.assertRaises(ValueError):
+            get_matcher('unknown')
+
+
+class FittedMatcherTest(unittest.TestCase):
+    def setUp(self):
+        matchers._fitted_matchers.clear()
+        self.addCleanup(matchers._fitted_matchers.clear)
+
+    def test_same_catalogue_reuses_matcher(self):
+        first = fitted_matcher('tfidf', ARTICLES, NAMES)
+        self.assertIs(fitted_matcher('tfidf', tuple(ARTICLES), tuple(NAMES)), first)
+
+    def test_catalogue_change_refits(self):
+        first = fitted_matcher('tfidf', ARTICLES, NAMES)
+        second = fitted_matcher('tfidf', ARTICLES, NAMES[:-1] + ['лак паркетный'])
+        self.assertIsNot(second, first)
+        found, _ = second.top_k(['лак паркетный'], 1)
+        self.assertEqual(found[0][0], 'A3')
+        # хранится только последний обученный экземпляр
+        self.assertIsNot(fitted_matcher('tfidf', ARTICLES, NAMES), first)
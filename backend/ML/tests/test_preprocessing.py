@@ -0,0 +1,51 @@
+import os
+import re
+import unittest
+
+import pandas as pd
+
+from ML.preprocessing import (COMMA_OUT_LINE, DROP_BRACKET, DROP_SYMBOL,
+                              DUP_SPACES, SPACES, clean_series, clean_string)
+
+PRODUCT_CSV = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'marketing_product.csv')
+NAMES = [
+    'Антисептик невымываемыйPROSEPT ULTRAконцентрат 1:10  / 1 л',
+    'Средство (для удаления) "ржавчины", 0,5 л - ПРОСЕПТ',
+    'Пропитка,\tдля  дерева\nPROSEPT-ULTRA / 5кг',
+    'Грунт , бетон-контакт ((( 20 кг)))',
+    'pro-sept prosept,prosept , просептПРОСЕПТ',
+    'ÄÖ İstanbul ǅ Σίσυφος',
+    '',
+]
+
+
+def baseline_clean_string(input_string: str) -> str:
+    # исходная очистка: отдельный re.sub на каждый шаг
+    input_string = re.sub(SPACES, ' ', input_string.lower())
+    input_string = re.sub(COMMA_OUT_LINE, ' ', input_string)
+    input_string = re.sub(DROP_BRACKET, ' ', input_string)
+    input_string = input_string.replace('prosept', '').replace('просепт', '')
+    input_string = re.sub(DROP_SYMBOL, ' ', input_string)
+    return re.sub(DUP_SPACES, r'\1', input_string)
+
+
+class CleanStringTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        products_df = pd.read_csv(PRODUCT_CSV, sep=';', dtype=str)
+        catalogue_names = pd.concat(
+            [products_df[column] for column in ('name', 'ozon_name', 'wb_name', 'name_1c')]
+        ).dropna().to_list()
+        cls.names = NAMES + catalogue_names
+
+    def test_clean_string_matches_baseline(self):
+        for name in self.names:
+            self.assertEqual(clean_string(name), baseline_clean_string(name), name)
+
+    def test_clean_series_matches_baseline(self):
+        self.assertEqual(clean_series(pd.Series(self.names)).to_list(),
+                         [baseline_clean_string(name) for name in self.names])
+
+    def test_clean_series_non_strings(self):
+        self.assertEqual(clean_series(pd.Series([12, 'Грунт(PROSEPT)'], dtype=object)).to_list(),
+                         ['12', 'грунт '])
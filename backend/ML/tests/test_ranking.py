@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+from scipy import sparse
+
+from ML.ranking import normalize_rows, top_k
+
+
+def brute_force(scores: np.ndarray, quantity_int: int) -> tuple[np.ndarray, np.ndarray]:
+    # полная сортировка всех кандидатов
+    order = np.argsort(-scores, axis=1, kind='stable')[:, :quantity_int]
+    return order, np.take_along_axis(scores, order, axis=1)
+
+
+class TopKTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.queries = normalize_rows(rng.normal(size=(37, 16)))
+        self.candidates = normalize_rows(rng.normal(size=(120, 16)))
+        self.scores = self.queries @ self.candidates.T
+
+    def assert_ranked(self, result, expected):
+        np.testing.assert_array_equal(result[0], expected[0])
+        np.testing.assert_allclose(result[1], expected[1], rtol=1e-6)
+
+    def test_matches_argsort(self):
+        for quantity_int in (1, 5, 10):
+            with self.subTest(quantity_int=quantity_int):
+                self.assert_ranked(top_k(self.queries, self.candidates, quantity_int),
+                                   brute_force(self.scores, quantity_int))
+
+    def test_chunks(self):
+        self.assert_ranked(top_k(self.queries, self.candidates, 10, chunk_size=8),
+                           brute_force(self.scores, 10))
+
+    def test_quantity_above_candidates(self):
+        indices, scores = top_k(self.queries, self.candidates[:4], 10)
+        self.assertEqual(indices.shape, (37, 4))
+        self.assert_ranked((indices, scores), brute_force(self.scores[:, :4], 4))
+
+    def test_sparse(self):
+        self.assert_ranked(top_k(sparse.csr_matrix(self.queries), sparse.csr_matrix(self.candidates), 10),
+                           brute_force(self.scores, 10))
+
+    def test_group_starts_max_pooling(self):
+        # группы по 1-4 строки подряд: названия одного товара
+        group_sizes = np.random.default_rng(1).integers(1, 5, size=40)
+        group_starts = np.concatenate([[0], np.cumsum(group_sizes)[:-1]])
+        candidates = self.candidates[:group_sizes.sum()]
+        groups = np.repeat(np.arange(len(group_sizes)), group_sizes)
+        group_scores = np.full((len(self.queries), len(group_sizes)), -np.inf, dtype=np.float32)
+        for column, group in enumerate(groups):
+            group_scores[:, group] = np.maximum(group_scores[:, group], self.scores[:, column])
+        self.assert_ranked(top_k(self.queries, candidates, 10, chunk_size=16, group_starts=group_starts),
+                           brute_force(group_scores, 10))
+
+    def test_empty(self):
+        indices, scores = top_k(self.queries, self.candidates[:0], 10)
+        self.assertEqual(indices.shape, (37, 0))
+        self.assertEqual(scores.shape, (37, 0))
@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+
+from ML.units import UNIT_PENALTY, UnitRescorer, parse_units
+
+NAN = np.nan
+
+
+class ParseUnitsTest(unittest.TestCase):
+    def test_units(self):
+        names = [
+            'антисептик ultra концентрат 1:10 1 л',
+            'средство 500мл',
+            'пропитка 0,5 l',
+            'антигололед 12 кг',
+            'грунт 750 гр',
+            'краска 2.5 литра 3 кг',
+            'набор 1 л 5 л', # берётся последнее вхождение
+            'герметик 12 2023', # числа без единиц
+            'концентрат 0:10', # деление на ноль
+            'гель 10мл2',
+            '',
+        ]
+        np.testing.assert_allclose(parse_units(names), [
+            [1000, NAN, 10],
+            [500, NAN, NAN],
+            [500, NAN, NAN],
+            [NAN, 12000, NAN],
+            [NAN, 750, NAN],
+            [2500, 3000, NAN],
+            [5000, NAN, NAN],
+            [NAN, NAN, NAN],
+            [NAN, NAN, NAN],
+            [10, NAN, NAN],
+            [NAN, NAN, NAN],
+        ], rtol=1e-6)
+        self.assertEqual(parse_units(names).dtype, np.float32)
+
+    def test_rescorer(self):
+        rescorer = UnitRescorer(['001', '002', '002'], parse_units(['грунт 1 л', 'грунт 5 л', 'грунт']))
+        articles, scores = rescorer.rescore([['001', '002', 'нет в каталоге']], [[0.9, 0.85, 0.8]],
+                                            ['грунт 5 л'], 2)
+        self.assertEqual(articles.tolist(), [['002', 'нет в каталоге']])
+        np.testing.assert_allclose(scores, [[0.85, 0.8]])
+        _, scores = rescorer.rescore([['001', '002']], [[0.9, 0.85]], ['грунт 5 л'], 3)
+        np.testing.assert_allclose(scores, [[0.85, 0.9 - UNIT_PENALTY]])
@@ -0,0 +1,98 @@
+# объём, вес и концентрация из названий товаров для пересчёта близости
+import re
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+# число и единица измерения; берётся последнее вхождение ('... / 1 л')
+VOLUME_RE = re.compile(r'(?<![\d.,])(\d+(?:[.,]\d+)?)\s*(мл|ml|л|l|литр[а-я]*)(?![а-яa-z])')
+WEIGHT_RE = re.compile(r'(?<![\d.,])(\d+(?:[.,]\d+)?)\s*(кг|kg|гр|г|g)(?![а-яa-z])')
+RATIO_RE = re.compile(r'(?<![\d.,])(\d+)\s*:\s*(\d+)(?![\d.,])')
+UNIT_SCALE = {'мл': 1, 'ml': 1, 'л': 1000, 'l': 1000, 'кг': 1000, 'kg': 1000, 'гр': 1, 'г': 1, 'g': 1}
+UNIT_COLUMNS = ['volume_ml', 'weight_g', 'ratio'] # столбцы массива parse_units
+UNIT_PENALTY = 0.1 # снижение близости за каждую несовпавшую величину
+UNIT_EXTRA = 10 # сколько вариантов модели запрашивается сверх quantity_int
+UNIT_RTOL = 0.01 # допустимое относительное расхождение величин
+
+
+def _amount(names: list[str], pattern: re.Pattern) -> np.ndarray:
+    values = np.full(len(names), np.nan, dtype=np.float32)
+    for row, name in enumerate(names):
+        matches = pattern.findall(name)
+        if matches:
+            number, unit = matches[-1]
+            scale = UNIT_SCALE.get(unit[:2], UNIT_SCALE.get(unit[:1]))
+            values[row] = float(number.replace(',', '.')) * scale
+    return values
+
+
+def parse_units(cleaned_names: Iterable[str]) -> np.ndarray:
+    """
+    Parameters:
+    cleaned_names (Iterable[str]): Очищенные названия товаров (см. clean_string).
+
+    Returns:
+    np.ndarray: Матрица (len(cleaned_names), 3) float32: объём в мл, вес в г
+    и концентрация (1:10 -> 10), NaN - величина в названии не указана.
+    """
+    series = pd.Series(list(cleaned_names), dtype=object).astype('str')
+    ratio = series.str.extract(RATIO_RE).apply(pd.to_numeric, errors='coerce')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio_values = (ratio[1] / ratio[0]).replace([np.inf, -np.inf], np.nan)
+    names = series.to_list()
+    return np.column_stack([
+        _amount(names, VOLUME_RE),
+        _amount(names, WEIGHT_RE),
+        ratio_values.to_numpy(dtype=np.float32),
+    ]).astype(np.float32)
+
+
+class UnitRescorer:
+    """
+    Пересчёт близости лучших вариантов по объёму, весу и концентрации.
+    Если величина указана и у товара дилера, и у товара заказчика, но не совпадает,
+    близость варианта снижается на UNIT_PENALTY, после чего варианты
+    сортируются заново. Все операции векторные, модель не вызывается.
+    """
+
+    def __init__(self, articles: Iterable[str], units: np.ndarray) -> None:
+        """
+        Parameters:
+        articles (Iterable[str]): Артикулы товаров заказчика (по строке на название).
+        units (np.ndarray): Величины названий (см. parse_units) в порядке articles.
+        """
+        # у артикула берутся первые указанные величины среди его названий
+        units_df = pd.DataFrame(units, columns=UNIT_COLUMNS)
+        units_df['article'] = pd.Series(list(articles), dtype=object).astype('str')
+        article_units = units_df.groupby('article', sort=False).first()
+        self.articles = article_units.index
+        self.units = np.vstack([article_units.to_numpy(dtype=np.float32),
+                                np.full((1, len(UNIT_COLUMNS)), np.nan, dtype=np.float32)])
+
+    def rescore(self, articles: np.ndarray,
+                scores: np.ndarray,
+                cleaned_names: list[str],
+                quantity_int: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Parameters:
+        articles (np.ndarray): Артикулы вариантов, по строке на товар дилера.
+        scores (np.ndarray): Близость вариантов.
+        cleaned_names (list[str]): Очищенные названия товаров дилеров.
+        quantity_int (int): Количество возвращаемых вариантов.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: quantity_int лучших артикулов и близость
+        после пересчёта.
+        """
+        articles, scores = np.asarray(articles, dtype=object), np.asarray(scores, dtype=np.float32)
+        if not articles.size:
+            return articles[:, :quantity_int], scores[:, :quantity_int]
+        dealer_units = parse_units(cleaned_names)[:, None, :]
+        rows = self.articles.get_indexer(articles.ravel().astype('str')).reshape(articles.shape)
+        candidate_units = self.units[rows]
+        mismatches = (~np.isnan(dealer_units) & ~np.isnan(candidate_units)
+                      & ~np.isclose(dealer_units, candidate_units, rtol=UNIT_RTOL)).sum(axis=2)
+        scores = scores - UNIT_PENALTY * mismatches
+        order = np.argsort(-scores, axis=1, kind='stable')[:, :quantity_int]
+        return np.take_along_axis(articles, order, axis=1), np.take_along_axis(scores, order, axis=1)
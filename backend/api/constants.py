@@ -0,0 +1,3 @@
+# константы API без зависимостей от ML: их импортируют формы и задачи
+
+AMOUNT_RESULT = 10 # вариантов соответствия на объявление дилера
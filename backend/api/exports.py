@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import QuerySet
+from products.models import DealerPrice, Product, ProductDealerKey
+
+CHUNK_SIZE = 2000 # строк, читаемых из БД за один запрос курсора
+BUFFER_SIZE = 64 * 1024 # символов, отдаваемых клиенту за раз
+
+
+class Export(NamedTuple):
+    """
+    Выгрузка: запрос, столбцы (заголовок и поле values_list)
+    и поля для фильтров по дате и дилеру (None - фильтр не применяется).
+    """
+    queryset: Callable[[], QuerySet]
+    columns: list[tuple[str, str]]
+    date_field: Optional[str] = None
+    dealer_field: Optional[str] = None
+
+
+def _model_columns(model) -> list[tuple[str, str]]:
+    return [(field.column, field.attname) for field in model._meta.fields]
+
+
+EXPORTS = {
+    'products': Export(lambda: Product.objects.order_by('article'),
+                       _model_columns(Product)),
+    'dealer_prices': Export(lambda: DealerPrice.objects.order_by('product_url'),
+                            _model_columns(DealerPrice),
+                            'date', 'dealer_id'),
+    # варианты соответствия с объявлением и артикулом товара заказчика
+    'matches': Export(lambda: ProductDealerKey.objects.order_by('key_id', 'compliance_number'),
+                      [('product_url', 'key_id'),
+                       ('dealer_id', 'key__dealer_id'),
+                       ('date', 'key__date'),
+                       ('product_name', 'key__product_name'),
+                       ('article', 'product_id_id'),
+                       ('article_name', 'product_id__name'),
+                       ('compliance_number', 'compliance_number'),
+                       ('score', 'score')],
+                      'key__date', 'key__dealer_id'),
+}
+
+
+def export_rows(name: str,
+                start_date: Optional[date] = None,
+                end_date: Optional[date] = None,
+                dealer_ids: Iterable[int] = ()) -> tuple[list[str], Iterator[tuple]]:
+    """
+    Функция возвращает заголовки выгрузки name и строки, которые читаются
+    из БД курсором пачками по CHUNK_SIZE, без загрузки всей таблицы в память.
+    """
+    export = EXPORTS[name]
+    queryset = export.queryset()
+    if export.date_field and start_date:
+        queryset = queryset.filter(**{f'{export.date_field}__gte': start_date})
+    if export.date_field and end_date:
+        queryset = queryset.filter(**{f'{export.date_field}__lte': end_date})
+    dealer_ids = list(dealer_ids)
+    if export.dealer_field and dealer_ids:
+        queryset = queryset.filter(**{f'{export.dealer_field}__in': dealer_ids})
+    headers = [header for header, _ in export.columns]
+    rows = queryset.values_list(*(field for _, field in export.columns)).iterator(chunk_size=CHUNK_SIZE)
+    return headers, rows
+
+
+def _buffered(parts: Iterable[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    for part in parts:
+        buffer.write(part)
+        if buffer.tell() >= BUFFER_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def csv_chunks(headers: list[str], rows: Iterable[tuple]) -> Iterator[bytes]:
+    """
+    CSV с разделителем ';', как у загружаемых файлов.
+    """
+    def lines() -> Iterator[str]:
+        line = io.StringIO()
+        writer = csv.writer(line, delimiter=';')
+        writer.writerow(headers)
+        yield line.getvalue()
+        for row in rows:
+            line.seek(0)
+            line.truncate()
+            writer.writerow(row)
+            yield line.getvalue()
+
+    return _buffered(lines())
+
+
+def json_chunks(headers: list[str], rows: Iterable[tuple]) -> Iterator[bytes]:
+    """
+    JSON-массив объектов {заголовок: значение}.
+    """
+    def parts() -> Iterator[str]:
+        separator = '['
+        for row in rows:
+            yield separator + json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder, ensure_ascii=False)
+            separator = ',\n'
+        yield '[]' if separator == '[' else ']'
+
+    return _buffered(parts())
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Сжатие потока в формат gzip по мере выдачи.
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -1,5 +1,85 @@
+import base64
+import json
+
 from django import forms
+from django.core.exceptions import ValidationError
+from django.utils.dateparse import parse_date
+
+from .constants import AMOUNT_RESULT
+
+PAGE_SIZE = 50 # объявлений на странице MainView по умолчанию
+MAX_PAGE_SIZE = 500
 
 
 class MarkupRequestForm(forms.Form):
-    key = forms.CharField(max_length=255)
\ No newline at end of file
+    key = forms.CharField(max_length=255)
+
+
+class IntegerListField(forms.Field):
+    """
+    Список целых чисел из повторяющегося параметра запроса (?dealers=1&dealers=2).
+    """
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        try:
+            return [int(item) for item in value or []]
+        except (TypeError, ValueError):
+            raise ValidationError('Ожидается список целых чисел', code='invalid')
+
+
+def encode_cursor(date, product_url: str) -> str:
+    """
+    Курсор следующей страницы: дата и ссылка последнего объявления страницы.
+    """
+    return base64.urlsafe_b64encode(
+        json.dumps([date.isoformat(), product_url]).encode()
+    ).decode()
+
+
+class StatisticsFilterForm(forms.Form):
+    """
+    Параметры статистики разметки: период и фильтры по дилерам и категориям.
+    """
+    start_date = forms.DateField(required=False)
+    end_date = forms.DateField(required=False)
+    dealers = IntegerListField(required=False)
+    categories = IntegerListField(required=False)
+
+
+class ExportFilterForm(forms.Form):
+    """
+    Параметры выгрузки: формат и фильтры по дате объявления и дилерам.
+    """
+    format = forms.ChoiceField(required=False, choices=[('', ''), ('csv', 'csv'), ('json', 'json')])
+    start_date = forms.DateField(required=False)
+    end_date = forms.DateField(required=False)
+    dealers = IntegerListField(required=False)
+
+
+class ListingFilterForm(forms.Form):
+    """
+    Параметры списка объявлений в MainView: фильтры, размер страницы,
+    количество вариантов соответствия и курсор следующей страницы.
+    """
+    start_date = forms.DateField(required=False)
+    end_date = forms.DateField(required=False)
+    status = forms.ChoiceField(required=False,
+                               choices=[('', ''), ('matched', 'matched'), ('unmatched', 'unmatched')])
+    dealers = IntegerListField(required=False)
+    num_matches = forms.IntegerField(required=False, min_value=0, max_value=AMOUNT_RESULT)
+    page_size = forms.IntegerField(required=False, min_value=1, max_value=MAX_PAGE_SIZE)
+    cursor = forms.CharField(required=False)
+
+    def clean_cursor(self):
+        cursor = self.cleaned_data['cursor']
+        if not cursor:
+            return None
+        try:
+            date, product_url = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            date = parse_date(date)
+        except (TypeError, ValueError):
+            date = None
+        if date is None or not isinstance(product_url, str):
+            raise ValidationError('Неверный курсор', code='invalid')
+        return date, product_url
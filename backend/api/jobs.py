@@ -0,0 +1,294 @@
+import os
+import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q, QuerySet
+from django.utils import timezone
+from products.models import DealerPrice, MatchingJob, Product, ProductDealerKey
+from tools.import_csv import (ImportReport, import_dealers_from_csv,
+                              import_prices_from_csv, import_products_from_csv)
+
+from ML.dealer_cache import catalogue_key
+from ML.lookup import CODE_COLUMNS, product_codes
+from ML.main_script import ALIAS_COLUMNS, MatchingSession, product_aliases
+from ML.matchers import MATCHER
+from ML.registry import model_version
+
+from .constants import AMOUNT_RESULT
+
+BATCH_SIZE = 500 # размер пачки при удалении и вставке вариантов соответствия
+MATCH_CHUNK_SIZE = 10000 # количество объявлений, сопоставляемых и сохраняемых за раз
+DEALER_FILE = 'marketing_dealer.csv'
+PRODUCT_FILE = 'marketing_product.csv'
+PRICES_FILE = 'marketing_dealerprice.csv'
+
+# Пул фоновых воркеров общий для процесса и создаётся при первой задаче
+_executor = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.MATCHING_WORKERS,
+                                       thread_name_prefix='matching')
+    return _executor
+
+
+def enqueue(job: MatchingJob) -> None:
+    """
+    Ставит задачу в пул фоновых воркеров после фиксации транзакции,
+    в которой она создана. Задачи, не выполненные из-за перезапуска
+    процесса, подхватывает команда process_matching_jobs.
+    """
+    transaction.on_commit(lambda: get_executor().submit(run_job, job.id))
+
+
+def claim_job(job_id: int) -> bool:
+    """
+    Атомарно переводит задачу из очереди в работу.
+    Возвращает False, если задачу уже забрал другой воркер.
+    """
+    return bool(MatchingJob.objects.filter(
+        id=job_id, state=MatchingJob.PENDING
+    ).update(state=MatchingJob.RUNNING, started_at=timezone.now()))
+
+
+def set_stage(job: MatchingJob, stage: str, **counts) -> None:
+    job.stage = stage
+    for field, value in counts.items():
+        setattr(job, field, value)
+    job.save(update_fields=['stage', *counts])
+
+
+def run_job(job_id: int) -> None:
+    """
+    Выполняет задачу сопоставления: импорт файлов в БД, подбор
+    вариантов моделью ML и сохранение ProductDealerKey.
+    """
+    close_old_connections()
+    try:
+        if not claim_job(job_id):
+            return
+        job = MatchingJob.objects.get(id=job_id)
+        try:
+            run_matching(job)
+        except Exception as error:
+            job.state = MatchingJob.FAILED
+            job.error = repr(error)
+        else:
+            job.state = MatchingJob.DONE
+        job.finished_at = timezone.now()
+        job.save(update_fields=['state', 'error', 'finished_at'])
+        shutil.rmtree(job.upload_dir, ignore_errors=True)
+    finally:
+        close_old_connections()
+
+
+def catalogue_fingerprint() -> str:
+    """
+    Отпечаток каталога товаров заказчика: при его изменении
+    все объявления дилеров сопоставляются заново.
+    """
+    products = list(product_aliases(
+        Product.objects.order_by('article').values_list('article', *ALIAS_COLUMNS)
+    ))
+    codes = list(product_codes(
+        Product.objects.order_by('article').values_list('article', *CODE_COLUMNS)
+    ))
+    articles = [article for article, _ in products]
+    names = [name for _, name in products]
+    codes_key = catalogue_key([article for article, _ in codes], [code for _, code in codes], 0)
+    return catalogue_key(articles, names, AMOUNT_RESULT, codes_key)
+
+
+def prices_to_match(job: MatchingJob) -> QuerySet:
+    """
+    Выбирает объявления дилеров для сопоставления.
+    В инкрементальном режиме - только новые объявления и объявления
+    с изменённым названием. Если с последней успешной задачи изменился
+    каталог или модель, либо это первая задача, выбираются все объявления.
+    """
+    last_job = MatchingJob.objects.filter(
+        state=MatchingJob.DONE
+    ).exclude(id=job.id).order_by('-finished_at').first()
+    if (job.full_rematch or last_job is None
+            or last_job.catalogue_key != job.catalogue_key
+            or last_job.model_version != job.model_version):
+        job.full_rematch = True
+        return DealerPrice.objects.all()
+    return DealerPrice.objects.filter(
+        Q(matched_name__isnull=True) | ~Q(matched_name=F('product_name'))
+    )
+
+
+def price_chunks(prices: QuerySet) -> Iterator[list[DealerPrice]]:
+    """
+    Читает объявления пачками по MATCH_CHUNK_SIZE в порядке product_url,
+    каждая пачка - отдельный запрос от последнего прочитанного product_url.
+    В памяти находится только текущая пачка.
+    """
+    last_url = None
+    while True:
+        chunk_query = prices.order_by('pk')
+        if last_url is not None:
+            chunk_query = chunk_query.filter(pk__gt=last_url)
+        chunk = list(chunk_query[:MATCH_CHUNK_SIZE])
+        if not chunk:
+            return
+        yield chunk
+        last_url = chunk[-1].pk
+
+
+def replace_matches(prices: list[DealerPrice],
+                    matching_data: list[ProductDealerKey]) -> None:
+    """
+    Атомарно заменяет варианты соответствия для переданных объявлений.
+    """
+    with transaction.atomic():
+        for start in range(0, len(prices), BATCH_SIZE):
+            ProductDealerKey.objects.filter(
+                key__in=prices[start:start + BATCH_SIZE]
+            ).delete()
+        ProductDealerKey.objects.bulk_create(matching_data, batch_size=BATCH_SIZE)
+        DealerPrice.objects.bulk_update(prices, ['matched_name'], batch_size=BATCH_SIZE)
+
+
+def matcher_version(matcher: str) -> str:
+    """
+    Версия модели сопоставления: при её изменении все объявления
+    сопоставляются заново.
+    """
+    if matcher == 'labse':
+        return model_version()
+    if matcher == 'cascade':
+        return f'cascade:{model_version()}'
+    return matcher
+
+
+def upload_path(upload_dir: str, file_name: str) -> str:
+    # вместо CSV можно загрузить файл Parquet с теми же столбцами
+    parquet_path = os.path.join(upload_dir, os.path.splitext(file_name)[0] + '.parquet')
+    if os.path.exists(parquet_path):
+        return parquet_path
+    return os.path.join(upload_dir, file_name)
+
+
+def run_matching(job: MatchingJob) -> None:
+    # Импорт файлов в базу данных пачками, прогресс пишется в задачу
+    set_stage(job, 'import')
+    total = ImportReport()
+
+    def import_progress(report: ImportReport) -> None:
+        set_stage(job, 'import',
+                  imported_count=total.rows + report.rows,
+                  import_errors_count=total.errors + report.errors,
+                  inserted_count=total.inserted + report.inserted,
+                  updated_count=total.updated + report.updated,
+                  unchanged_count=total.unchanged + report.unchanged)
+
+    for import_file, file_name in ((import_dealers_from_csv, DEALER_FILE),
+                                   (import_products_from_csv, PRODUCT_FILE),
+                                   (import_prices_from_csv, PRICES_FILE)):
+        report = import_file(upload_path(job.upload_dir, file_name),
+                             progress=import_progress)
+        for field in ('rows', 'errors', 'inserted', 'updated', 'unchanged'):
+            setattr(total, field, getattr(total, field) + getattr(report, field))
+
+    # Отбор объявлений: новые и изменённые или все, если изменился каталог/модель
+    job.catalogue_key = catalogue_fingerprint()
+    default_matcher = job.matcher or MATCHER
+    job.model_version = matcher_version(default_matcher)
+    prices = prices_to_match(job)
+    prices_count = prices.count()
+    set_stage(job, 'match',
+              full_rematch=job.full_rematch,
+              catalogue_key=job.catalogue_key,
+              model_version=job.model_version,
+              prices_count=prices_count)
+    if not prices_count:
+        set_stage(job, 'done')
+        return
+
+    # Товары и объявления передаются в модель напрямую из БД,
+    # варианты соответствия сразу превращаются в записи ProductDealerKey.
+    # Точные совпадения по кодам и названиям сопоставляются без модели.
+    # Варианты соответствия сохраняются в базе данных после каждой пачки
+    products = list(product_aliases(Product.objects.values_list('article', *ALIAS_COLUMNS)))
+    codes = list(product_codes(Product.objects.values_list('article', *CODE_COLUMNS)))
+    stage_counts = Counter()
+    processed_count = matches_count = 0
+    # каталог, модель и кэш названий дилеров готовятся один раз на задачу для каждой модели
+    sessions = {}
+
+    def session(matcher: str) -> MatchingSession:
+        if matcher not in sessions:
+            sessions[matcher] = MatchingSession(products, AMOUNT_RESULT, matcher=matcher, codes=codes)
+        return sessions[matcher]
+
+    for chunk in price_chunks(prices):
+        matching_data = []
+        # объявления дилеров из MATCHERS_BY_DEALER сопоставляются своей моделью
+        chunk_by_matcher = {}
+        for price in chunk:
+            matcher = settings.MATCHERS_BY_DEALER.get(price.dealer_id_id, default_matcher)
+            chunk_by_matcher.setdefault(matcher, []).append((price.product_url, price.product_name))
+        for matcher, matcher_prices in chunk_by_matcher.items():
+            stats = {}
+            matching_data.extend(
+                ProductDealerKey(
+                    key_id=product_match.product_url,
+                    product_id_id=product_match.article,
+                    compliance_number=product_match.compliance_number,
+                    score=product_match.score
+                )
+                for product_match in session(matcher).match(matcher_prices, stats)
+            )
+            stage_counts.update(stats['counts'])
+        for price in chunk:
+            price.matched_name = price.product_name
+        replace_matches(chunk, matching_data)
+        processed_count += len(chunk)
+        matches_count += len(matching_data)
+        set_stage(job, 'match', processed_count=processed_count, matches_count=matches_count,
+                  stage_counts=dict(stage_counts))
+
+    # Сохранение кэша названий дилеров
+    set_stage(job, 'save')
+    for matcher_session in sessions.values():
+        matcher_session.save()
+    set_stage(job, 'done')
+
+
+def requeue_stale_jobs(stale_after: timedelta) -> int:
+    """
+    Возвращает в очередь задачи, которые выполняются дольше stale_after:
+    их воркер завершился, не закончив задачу. Файлы загрузки остаются
+    на диске до завершения задачи, поэтому она выполняется заново целиком.
+    Возвращает количество задач.
+    """
+    return MatchingJob.objects.filter(
+        state=MatchingJob.RUNNING, started_at__lt=timezone.now() - stale_after
+    ).update(state=MatchingJob.PENDING, stage='', started_at=None)
+
+
+def process_pending_jobs(stale_after: Optional[timedelta] = None) -> int:
+    """
+    Выполняет все задачи из очереди в текущем процессе, предварительно
+    вернув в очередь брошенные задачи (stale_after, по умолчанию
+    settings.MATCHING_STALE_AFTER минут).
+    Возвращает количество обработанных задач.
+    """
+    if stale_after is None:
+        stale_after = timedelta(minutes=settings.MATCHING_STALE_AFTER)
+    requeue_stale_jobs(stale_after)
+    job_ids = list(MatchingJob.objects.filter(
+        state=MatchingJob.PENDING
+    ).order_by('created_at').values_list('id', flat=True))
+    for job_id in job_ids:
+        run_job(job_id)
+    return len(job_ids)
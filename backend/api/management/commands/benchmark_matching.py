@@ -0,0 +1,137 @@
+import json
+import tempfile
+
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from ML.cascade import CANDIDATES
+from ML.evaluation import (LATENCY_SAMPLE, benchmark, load_validation,
+                           load_validation_snapshot)
+from ML.index import INDEX_BACKEND, INDEX_BACKENDS
+from ML.lookup import CODE_COLUMNS, product_codes
+from ML.matchers import MATCHER, MATCHER_CHOICES
+from ML.registry import INFERENCE_BACKEND, INFERENCE_BACKENDS
+from ML.snapshot import load_catalogue
+from tools.synthetic_data import generate_validation
+
+SYNTHETIC_ROWS = 2000 # объявлений в синтетическом наборе без --prices
+
+
+class Command(BaseCommand):
+    """
+    Замер качества и скорости сопоставления на размеченных данных:
+    accuracy@1..10, товаров дилеров в секунду, p50/p95 задержки, пиковая память
+    и время этапов. С --baseline сравнивает accuracy@n с сохранённым результатом
+    и завершается с ошибкой при снижении больше --tolerance.
+    """
+    help = 'Замер точности и задержки сопоставления'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', default='data/marketing_product.csv',
+                            help='CSV с товарами заказчика')
+        parser.add_argument('--prices',
+                            help='CSV с товарами дилеров, по умолчанию синтетический набор'
+                                 ' по каталогу --products (см. generate_synthetic_data)')
+        parser.add_argument('--keys', default='data/marketing_productdealerkey.csv',
+                            help='CSV с разметкой соответствий для --prices')
+        parser.add_argument('--synthetic-rows', type=int, default=SYNTHETIC_ROWS,
+                            help='Количество синтетических объявлений без --prices')
+        parser.add_argument('--snapshot',
+                            help='Снимок данных (create_snapshot) вместо CSV: товары заказчика'
+                                 ' и объявления, размеченные оператором')
+        parser.add_argument('--matcher', default=MATCHER, choices=MATCHER_CHOICES,
+                            help='Модель сопоставления')
+        parser.add_argument('--inference-backend', default=INFERENCE_BACKEND,
+                            choices=INFERENCE_BACKENDS,
+                            help='Бэкенд инференса модели')
+        parser.add_argument('--index-backend', default=INDEX_BACKEND,
+                            choices=INDEX_BACKENDS,
+                            help='Бэкенд векторного индекса')
+        parser.add_argument('--candidates', type=int, default=CANDIDATES,
+                            help='Количество кандидатов первой стадии для cascade')
+        parser.add_argument('--no-lookup', action='store_true',
+                            help='Не сопоставлять точные совпадения кодов и названий до модели')
+        parser.add_argument('--no-units', action='store_true',
+                            help='Не пересчитывать близость по объёму, весу и концентрации')
+        parser.add_argument('--batch-size', type=int, default=64,
+                            help='Размер батча при получении эмбеддингов')
+        parser.add_argument('--latency-sample', type=int, default=LATENCY_SAMPLE,
+                            help='Сколько товаров дилеров сопоставить по одному для замера задержки')
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести результат в формате JSON')
+        parser.add_argument('--output',
+                            help='Сохранить результат в JSON-файл')
+        parser.add_argument('--baseline',
+                            help='JSON-файл с прошлым результатом для сравнения accuracy@n')
+        parser.add_argument('--tolerance', type=float, default=0.005,
+                            help='Допустимое снижение accuracy@n относительно --baseline')
+
+    def handle(self, *args, **options):
+        if options['snapshot']:
+            try:
+                products, prices_df = load_validation_snapshot(options['snapshot'])
+                _, codes = load_catalogue(options['snapshot'])
+            except ImportError as error:
+                raise CommandError(str(error))
+        else:
+            with tempfile.TemporaryDirectory() as synthetic_dir:
+                prices_csv, keys_csv = options['prices'], options['keys']
+                if prices_csv is None:
+                    prices_csv, keys_csv = generate_validation(options['products'], synthetic_dir,
+                                                               options['synthetic_rows'])
+                products, prices_df = load_validation(options['products'], prices_csv, keys_csv)
+            products_df = pd.read_csv(options['products'], sep=';')
+            code_columns = [column for column in CODE_COLUMNS if column in products_df]
+            codes = list(product_codes(products_df[['article', *code_columns]].to_numpy()))
+
+        result = benchmark(products, prices_df,
+                           latency_sample=options['latency_sample'],
+                           matcher=options['matcher'],
+                           batch_size=options['batch_size'],
+                           index_backend=options['index_backend'],
+                           inference_backend=options['inference_backend'],
+                           candidates=options['candidates'],
+                           codes=codes,
+                           lookup=not options['no_lookup'],
+                           units=not options['no_units'])
+        result['settings'] = {key: options[key] for key in (
+            'snapshot', 'matcher', 'inference_backend', 'index_backend', 'candidates',
+            'no_lookup', 'no_units', 'batch_size'
+        )}
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, ensure_ascii=False, indent=2))
+        else:
+            accuracy, latency = result['accuracy'], result['latency_ms']
+            self.stdout.write(f'Размеченных товаров дилеров: {result["prices_count"]}')
+            self.stdout.write(' '.join(f'@{n}={accuracy[n]:.3f}' for n in accuracy))
+            self.stdout.write(f'{result["seconds"]:.2f} с, {result["listings_per_sec"]:.1f} товаров/с,'
+                              f' пиковая память {result["peak_rss_mb"]:.0f} МБ')
+            if latency['sample']:
+                self.stdout.write(f'Задержка на товар: p50 {latency["p50"]:.1f} мс,'
+                                  f' p95 {latency["p95"]:.1f} мс ({latency["sample"]} товаров)')
+            self.stdout.write('Этапы: ' + ', '.join(f'{phase} {seconds:.2f} с'
+                                                    for phase, seconds in result['phases'].items()))
+
+        if options['baseline']:
+            self.check_baseline(result, options['baseline'], options['tolerance'])
+
+    def check_baseline(self, result, baseline_path, tolerance):
+        """Сравнивает accuracy@n с сохранённым результатом."""
+        with open(baseline_path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        # ключи n в JSON - строки
+        regressions = [
+            f'@{n}: {float(baseline_accuracy):.3f} -> {result["accuracy"][int(n)]:.3f}'
+            for n, baseline_accuracy in baseline['accuracy'].items()
+            if int(n) in result['accuracy']
+            and float(baseline_accuracy) - result['accuracy'][int(n)] > tolerance
+        ]
+        if regressions:
+            raise CommandError('Снижение accuracy@n относительно ' + baseline_path + ': '
+                               + ', '.join(regressions))
+        self.stdout.write(f'accuracy@n не ниже {baseline_path} (допуск {tolerance})')
@@ -0,0 +1,59 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from tools.query_benchmark import REPEAT, benchmark_indexes
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает планы и время запросов сопоставления до и после миграции
+    индексов на синтетическом наборе в отдельной тестовой БД.
+    """
+    help = 'Планы и время запросов до и после индексов сопоставления'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000,
+                            help='Количество синтетических объявлений дилеров')
+        parser.add_argument('--dealers', type=int, default=18,
+                            help='Количество дилеров')
+        parser.add_argument('--repeat', type=int, default=REPEAT,
+                            help='Запусков каждого запроса (берётся медиана)')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Начальное значение генератора набора')
+        parser.add_argument('--data-dir',
+                            help='Готовый набор generate_synthetic_data (иначе генерируется)')
+        parser.add_argument('--plans', action='store_true',
+                            help='Вывести планы запросов')
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести результат в формате JSON')
+        parser.add_argument('--output',
+                            help='Сохранить результат в JSON-файл')
+
+    def handle(self, *args, **options):
+        result = benchmark_indexes(options['rows'],
+                                   dealers_count=options['dealers'],
+                                   repeat=options['repeat'],
+                                   seed=options['seed'],
+                                   data_dir=options['data_dir'],
+                                   progress=self.stderr.write)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump(result, file, ensure_ascii=False, indent=2)
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(f'{result["vendor"]}: объявлений {result["rows"]},'
+                          f' вариантов соответствия {result["suggestions"]}')
+        for name, query in result['queries'].items():
+            before, after = query['before'], query['after']
+            self.stdout.write(f'{name}: {before["ms"]:.2f} мс -> {after["ms"]:.2f} мс'
+                              f' (x{before["ms"] / max(after["ms"], 1e-6):.1f})')
+            if options['plans']:
+                for title, plan in (('до', before['plan']), ('после', after['plan'])):
+                    self.stdout.write(f'  {title}:')
+                    for line in plan.splitlines():
+                        self.stdout.write(f'    {line}')
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from products.models import Product
+
+from ML.index import INDEX_BACKEND, INDEX_BACKENDS
+from ML.main_script import (ALIAS_COLUMNS, CACHE_DIR, prepare_catalogue,
+                            product_aliases)
+from ML.registry import INFERENCE_BACKEND, INFERENCE_BACKENDS
+
+
+class Command(BaseCommand):
+    """
+    Строит или обновляет векторный индекс каталога товаров заказчика.
+    Эмбеддинги считаются только для новых и изменённых товаров,
+    индекс сохраняется в директорию кэша ML и используется при сопоставлении.
+    """
+    help = 'Построение векторного индекса товаров заказчика'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', default=INDEX_BACKEND,
+                            choices=sorted(INDEX_BACKENDS),
+                            help='Бэкенд индекса')
+        parser.add_argument('--inference-backend', default=INFERENCE_BACKEND,
+                            choices=INFERENCE_BACKENDS,
+                            help='Бэкенд инференса модели')
+        parser.add_argument('--cache-dir', default=CACHE_DIR,
+                            help='Директория кэша эмбеддингов и индекса')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        products = product_aliases(Product.objects.values_list('article', *ALIAS_COLUMNS))
+        catalogue = prepare_catalogue(products,
+                                      cache_dir=options['cache_dir'],
+                                      index_backend=options['backend'],
+                                      inference_backend=options['inference_backend'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс {options["backend"]}: {len(catalogue.index.ids)} товаров, '
+            f'{time.perf_counter() - start:.1f} с'
+        ))
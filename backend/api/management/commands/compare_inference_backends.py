@@ -0,0 +1,74 @@
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from ML.evaluation import evaluate, load_validation, model_size_mb
+from ML.registry import INFERENCE_BACKENDS, get_model
+from tools.synthetic_data import generate_validation
+
+SYNTHETIC_ROWS = 2000 # объявлений в синтетическом наборе без --prices
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает бэкенды инференса модели (fp32 и int8) на размеченных данных:
+    accuracy@1..10, время сопоставления и размер весов модели.
+    """
+    help = 'Сравнение точности и скорости бэкендов инференса модели'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', default='data/marketing_product.csv',
+                            help='CSV с товарами заказчика')
+        parser.add_argument('--prices',
+                            help='CSV с товарами дилеров, по умолчанию синтетический набор'
+                                 ' по каталогу --products (см. generate_synthetic_data)')
+        parser.add_argument('--keys', default='data/marketing_productdealerkey.csv',
+                            help='CSV с разметкой соответствий для --prices')
+        parser.add_argument('--synthetic-rows', type=int, default=SYNTHETIC_ROWS,
+                            help='Количество синтетических объявлений без --prices')
+        parser.add_argument('--backends', nargs='+', default=list(INFERENCE_BACKENDS),
+                            choices=INFERENCE_BACKENDS,
+                            help='Сравниваемые бэкенды, первый - базовый')
+        parser.add_argument('--batch-size', type=int, default=64,
+                            help='Размер батча при получении эмбеддингов')
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести результат в формате JSON')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as synthetic_dir:
+            prices_csv, keys_csv = options['prices'], options['keys']
+            if prices_csv is None:
+                prices_csv, keys_csv = generate_validation(options['products'], synthetic_dir,
+                                                           options['synthetic_rows'])
+            products, prices_df = load_validation(options['products'], prices_csv, keys_csv)
+        results = {}
+        for backend in options['backends']:
+            loaded_model = get_model(inference_backend=backend)
+            results[backend] = evaluate(products, prices_df,
+                                        batch_size=options['batch_size'],
+                                        inference_backend=backend,
+                                        # сравнивается только бэкенд LaBSE, без поиска
+                                        # по кодам и пересчёта по единицам измерения
+                                        matcher='labse', lookup=False, units=False)
+            results[backend]['model_size_mb'] = model_size_mb(loaded_model.model)
+
+        if options['json']:
+            self.stdout.write(json.dumps({'prices_count': len(prices_df), 'backends': results},
+                                         ensure_ascii=False, indent=2))
+            return
+
+        baseline = results[options['backends'][0]]
+        self.stdout.write(f'Размеченных товаров дилеров: {len(prices_df)}')
+        for backend, backend_result in results.items():
+            accuracy = backend_result['accuracy']
+            self.stdout.write(
+                f'{backend}: '
+                + ' '.join(f'@{n}={accuracy[n]:.3f}' for n in (1, 3, 5, 10) if n in accuracy)
+                + f', {backend_result["seconds"]:.1f} с'
+                f' (x{baseline["seconds"] / backend_result["seconds"]:.2f}),'
+                f' {backend_result["model_size_mb"]:.0f} МБ'
+            )
+            worst = max(baseline['accuracy'][n] - accuracy[n] for n in accuracy)
+            if worst > 0:
+                self.stdout.write(f'  максимальное снижение accuracy@n: {worst:.3f}')
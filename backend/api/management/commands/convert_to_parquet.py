@@ -0,0 +1,36 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tools.import_csv import read_chunks
+from tools.snapshots import csv_to_parquet
+
+
+class Command(BaseCommand):
+    """
+    Переводит CSV в формате загружаемых файлов (marketing_*.csv)
+    в Parquet для LoadDataView и сравнивает размер файлов и время их чтения.
+    """
+    help = 'Перевод загружаемых CSV в Parquet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+',
+                            help='CSV-файлы, Parquet пишется рядом с расширением .parquet')
+
+    def handle(self, *args, **options):
+        for path_to_csv in options['paths']:
+            try:
+                path_to_parquet = csv_to_parquet(path_to_csv)
+            except ImportError as error:
+                raise CommandError(str(error))
+            timings = []
+            for path in (path_to_csv, path_to_parquet):
+                start = time.perf_counter()
+                rows = sum(len(chunk) for chunk in read_chunks(path))
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(
+                f'{path_to_parquet}: {rows} строк,'
+                f' {os.path.getsize(path_to_csv) / 1024:.0f} -> {os.path.getsize(path_to_parquet) / 1024:.0f} КБ,'
+                f' чтение {timings[0]:.2f} -> {timings[1]:.2f} с'
+            )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ML.main_script import CACHE_DIR
+from ML.snapshot import read_manifest
+from tools.snapshots import SNAPSHOT_DIR, create_snapshot, prune_snapshots
+
+
+class Command(BaseCommand):
+    """
+    Создаёт версию снимка данных: товары, дилеры, объявления и варианты
+    соответствия в Parquet, кэши эмбеддингов в Arrow и manifest.json.
+    Снимок читается ML.snapshot (load_table, load_embeddings, load_catalogue)
+    и командой benchmark_matching --snapshot без разбора CSV.
+    """
+    help = 'Снимок данных в формате Parquet/Arrow'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=SNAPSHOT_DIR,
+                            help='Директория снимков (версия создаётся внутри)')
+        parser.add_argument('--cache-dir', default=CACHE_DIR,
+                            help='Директория кэша эмбеддингов')
+        parser.add_argument('--no-embeddings', action='store_true',
+                            help='Не добавлять в снимок кэши эмбеддингов')
+        parser.add_argument('--keep', type=int,
+                            help='Оставить столько последних снимков, старые удалить')
+
+    def handle(self, *args, **options):
+        try:
+            snapshot_dir = create_snapshot(
+                options['output'],
+                cache_dir=None if options['no_embeddings'] else options['cache_dir'],
+                progress=self.stderr.write,
+            )
+        except ImportError as error:
+            raise CommandError(str(error))
+
+        manifest = read_manifest(snapshot_dir)
+        for name, table in {**manifest['tables'], **manifest['embeddings']}.items():
+            self.stdout.write(f'{name}: {table["rows"]} строк, {table["bytes"] / 1024:.0f} КБ')
+        if options['keep'] is not None:
+            for version in prune_snapshots(options['output'], options['keep']):
+                self.stdout.write(f'Удалён снимок {version}')
+        self.stdout.write(self.style.SUCCESS(f'Снимок {manifest["version"]}: {snapshot_dir}'))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from tools.synthetic_data import CHUNK_SIZE, generate_dataset
+
+
+class Command(BaseCommand):
+    """
+    Генерирует синтетические объявления дилеров с разметкой по реальному
+    каталогу для нагрузочного тестирования импорта, загрузки файлов
+    и сопоставления (до 10^7 строк).
+    """
+    help = 'Генерация синтетического набора объявлений дилеров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir',
+                            help='Директория для CSV-файлов набора')
+        parser.add_argument('--rows', type=int, default=100000,
+                            help='Количество объявлений дилеров')
+        parser.add_argument('--dealers', type=int, default=18,
+                            help='Количество дилеров')
+        parser.add_argument('--products', default='data/marketing_product.csv',
+                            help='CSV с товарами заказчика')
+        parser.add_argument('--dealers-csv', default='data/marketing_dealer.csv',
+                            help='CSV с дилерами, чьи id и названия используются первыми')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Начальное значение генератора случайных чисел')
+        parser.add_argument('--sep', default=';',
+                            help="Разделитель полей (',' для ML.main_script.result)")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Количество строк, записываемых за один раз')
+
+    def handle(self, *args, **options):
+        report = generate_dataset(
+            options['products'],
+            options['output_dir'],
+            options['rows'],
+            dealers_count=options['dealers'],
+            marketing_dealer_csv=options['dealers_csv'],
+            seed=options['seed'],
+            sep=options['sep'],
+            chunk_size=options['chunk_size'],
+            progress=lambda report: self.stdout.write(f'Записано объявлений: {report.rows}'),
+        )
+        self.stdout.write(f'Набор в {report.output_dir}: объявлений {report.rows},'
+                          f' дилеров {report.dealers}, товаров заказчика {report.products}')
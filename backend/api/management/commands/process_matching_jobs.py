@@ -0,0 +1,35 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.jobs import process_pending_jobs
+
+
+class Command(BaseCommand):
+    """
+    Выполняет задачи сопоставления, оставшиеся в очереди в БД
+    (например, после перезапуска веб-процесса), и возвращает в очередь
+    задачи, брошенные аварийно завершённым воркером.
+    С параметром --loop работает как отдельный воркер и опрашивает очередь.
+    """
+    help = 'Обработка очереди задач сопоставления'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Опрашивать очередь постоянно')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Пауза между опросами очереди, секунд')
+        parser.add_argument('--stale-after', type=float, default=settings.MATCHING_STALE_AFTER,
+                            help='Через сколько минут выполняемая задача '
+                                 'считается брошенной и возвращается в очередь')
+
+    def handle(self, *args, **options):
+        while True:
+            processed = process_pending_jobs(timedelta(minutes=options['stale_after']))
+            if processed:
+                self.stdout.write(f'Обработано задач: {processed}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
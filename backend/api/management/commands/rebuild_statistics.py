@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает дневные итоги разметки (StatisticsRollup) по решениям
+    оператора, сохранённым в объявлениях дилеров.
+    """
+    help = 'Пересчёт дневных итогов статистики разметки'
+
+    def handle(self, *args, **options):
+        rows = rebuild_rollups()
+        self.stdout.write(f'Строк итогов: {rows}')
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ML.registry import (INFERENCE_BACKEND, INFERENCE_BACKENDS, MODEL_PATH,
+                         warm_up)
+
+
+class Command(BaseCommand):
+    """
+    Загружает модель ML и делает пробный прогон.
+    С параметром --save-to сохраняет модель в локальную директорию,
+    которую затем можно указать в переменной окружения ML_MODEL_PATH
+    на серверах без доступа к сети.
+    """
+    help = 'Загрузка и прогрев модели сопоставления товаров'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model-path', default=MODEL_PATH,
+                            help='Имя модели на Hugging Face или локальная директория')
+        parser.add_argument('--inference-backend', default=INFERENCE_BACKEND,
+                            choices=INFERENCE_BACKENDS,
+                            help='Бэкенд инференса модели')
+        parser.add_argument('--save-to',
+                            help='Директория для сохранения модели и токенизатора')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        loaded_model = warm_up(options['model_path'], options['inference_backend'])
+        self.stdout.write(
+            f'Модель {options["model_path"]} загружена за '
+            f'{time.perf_counter() - start:.1f} с '
+            f'({options["inference_backend"]}, {loaded_model.device})'
+        )
+        if options['save_to']:
+            if options['inference_backend'] != 'fp32':
+                raise CommandError('Сохранять можно только исходную модель (fp32)')
+            loaded_model.tokenizer.save_pretrained(options['save_to'])
+            loaded_model.model.save_pretrained(options['save_to'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Модель сохранена в {options["save_to"]}'
+            ))
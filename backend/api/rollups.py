@@ -0,0 +1,110 @@
+from datetime import date
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, QuerySet, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from products.models import (DealerPrice, Product, ProductDealerKey,
+                             StatisticsRollup)
+
+BATCH_SIZE = 1000
+
+
+def rollup_key(price: DealerPrice) -> Optional[dict]:
+    """
+    Ключ дневных итогов для решения оператора по объявлению
+    или None, если объявление не размечено.
+    """
+    if price.marking_date is None:
+        return None
+    category_id = None
+    if price.marked_product_id is not None:
+        category_id = Product.objects.filter(
+            article=price.marked_product_id
+        ).values_list('category_id', flat=True).first()
+    return {
+        'day': timezone.localdate(price.marking_date),
+        'dealer_id_id': price.dealer_id_id,
+        'category_id': StatisticsRollup.NO_CATEGORY if category_id is None else category_id,
+        'chosen_position': StatisticsRollup.NONE_CHOSEN
+        if price.marked_position is None else price.marked_position,
+    }
+
+
+def _add(key: Optional[dict], count: int) -> None:
+    if key is None:
+        return
+    if count < 0:
+        # решения, сделанные до появления итогов, есть в итогах только после rebuild_rollups
+        StatisticsRollup.objects.filter(count__gte=-count, **key).update(count=F('count') + count)
+        return
+    rollup, _ = StatisticsRollup.objects.select_for_update().get_or_create(**key)
+    StatisticsRollup.objects.filter(id=rollup.id).update(count=F('count') + count)
+
+
+@transaction.atomic
+def record_markup(product_url: str, product: Optional[Product]) -> DealerPrice:
+    """
+    Функция сохраняет решение оператора по объявлению: выбранный товар
+    (None - ничего не подходит) и его номер среди вариантов соответствия.
+    В той же транзакции прежнее решение вычитается из дневных итогов,
+    а новое добавляется.
+    """
+    price = DealerPrice.objects.select_for_update().get(product_url=product_url)
+    _add(rollup_key(price), -1)
+
+    price.marking_date = timezone.now()
+    price.marked_product = product
+    price.marked_position = None
+    if product is not None:
+        price.marked_position = ProductDealerKey.objects.filter(
+            key=price, product_id=product
+        ).values_list('compliance_number', flat=True).first()
+    price.save(update_fields=['marking_date', 'marked_product', 'marked_position'])
+    _add(rollup_key(price), 1)
+    return price
+
+
+@transaction.atomic
+def rebuild_rollups() -> int:
+    """
+    Функция пересчитывает дневные итоги по всем размеченным объявлениям.
+    Возвращает количество строк итогов.
+    """
+    StatisticsRollup.objects.all().delete()
+    rows = DealerPrice.objects.filter(marking_date__isnull=False).annotate(
+        day=TruncDate('marking_date'),
+        category=Coalesce('marked_product__category_id', Value(StatisticsRollup.NO_CATEGORY)),
+        position=Coalesce('marked_position', Value(StatisticsRollup.NONE_CHOSEN)),
+    ).values('day', 'dealer_id', 'category', 'position').annotate(count=Count('product_url'))
+    rollups = [StatisticsRollup(day=row['day'],
+                                dealer_id_id=row['dealer_id'],
+                                category_id=row['category'],
+                                chosen_position=row['position'],
+                                count=row['count'])
+               for row in rows.order_by()]
+    StatisticsRollup.objects.bulk_create(rollups, batch_size=BATCH_SIZE)
+    return len(rollups)
+
+
+def rollups_in_range(start_date: date,
+                     end_date: date,
+                     dealer_ids: Iterable[int] = (),
+                     category_ids: Iterable[int] = ()) -> QuerySet:
+    """
+    Итоги разметки за период [start_date, end_date] с фильтрами по дилерам и категориям.
+    """
+    rollups = StatisticsRollup.objects.filter(day__range=(start_date, end_date), count__gt=0)
+    if dealer_ids:
+        rollups = rollups.filter(dealer_id__in=list(dealer_ids))
+    if category_ids:
+        rollups = rollups.filter(category_id__in=list(category_ids))
+    return rollups
+
+
+def summarize(rollups: QuerySet, *fields: str) -> list[dict]:
+    """
+    Сумма решений по полям итогов (например, 'chosen_position').
+    """
+    return list(rollups.values(*fields).annotate(count=Sum('count')).order_by(*fields))
@@ -1,5 +1,5 @@
-from products.models import (Dealer, DealerPrice, Product, ProductDealerKey,
-                             Statistics)
+from products.models import (Dealer, DealerPrice, MatchingJob, Product,
+                             ProductDealerKey, Statistics)
 from rest_framework import serializers
 
 
@@ -27,7 +27,50 @@ class ProductDealerKeySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class SuggestionSerializer(serializers.ModelSerializer):
+    """
+    Вариант соответствия объявления: артикул и название товара заказчика.
+    """
+    article = serializers.CharField(source='product_id_id')
+    name = serializers.CharField(source='product_id.name')
+
+    class Meta:
+        model = ProductDealerKey
+        fields = ('article', 'name', 'compliance_number', 'score')
+
+
+class ListingSerializer(serializers.ModelSerializer):
+    """
+    Объявление дилера для MainView с дилером и лучшими вариантами соответствия
+    (атрибут suggestions заполняется через prefetch_related).
+    """
+    dealer_id = serializers.IntegerField(source='dealer_id_id')
+    dealer_name = serializers.CharField(source='dealer_id.name')
+    suggestions = SuggestionSerializer(many=True)
+
+    class Meta:
+        model = DealerPrice
+        fields = ('product_url', 'product_key', 'product_name', 'price', 'date',
+                  'dealer_id', 'dealer_name', 'marking_date', 'suggestions')
+
+
 class StatisticsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Statistics
         fields = '__all__'
+
+
+class MatchingJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MatchingJob
+        exclude = ('upload_dir',)
+
+    def get_progress(self, obj):
+        # Доля обработанных объявлений дилеров, от 0 до 1
+        if obj.state == MatchingJob.DONE:
+            return 1.0
+        if not obj.prices_count:
+            return 0.0
+        return round(obj.processed_count / obj.prices_count, 3)
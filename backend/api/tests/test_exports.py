@@ -0,0 +1,81 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from products.models import Dealer, DealerPrice, Product, ProductDealerKey
+
+from api import exports
+
+
+class ExportViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        dealers = Dealer.objects.bulk_create([Dealer(id=1, name='Дилер 1'), Dealer(id=2, name='Дилер 2')])
+        product = Product.objects.create(id=1, article='008-1', name='Антисептик; "ULTRA" 1 л',
+                                         ozon_name='', name_1c='', wb_name='', ozon_article='',
+                                         wb_article='', ym_article='', wb_article_td='')
+        prices = DealerPrice.objects.bulk_create([
+            DealerPrice(product_url=f'https://shop.ru/{number}', product_name=f'Объявление {number}',
+                        price=100.5 + number, date=date(2023, 7, 1 + number), dealer_id=dealers[number % 2])
+            for number in range(4)
+        ])
+        ProductDealerKey.objects.bulk_create([
+            ProductDealerKey(key=price, product_id=product, compliance_number=0, score=0.9)
+            for price in prices
+        ])
+
+    def get(self, name: str, **params):
+        response = self.client.get(reverse('export', args=[name]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv(self):
+        response, content = self.get('products')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('filename="products.csv"', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8')), delimiter=';'))
+        self.assertEqual(rows[0], [column for column, _ in exports.EXPORTS['products'].columns])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][rows[0].index('name')], 'Антисептик; "ULTRA" 1 л')
+
+    def test_json_with_filters(self):
+        response, content = self.get('matches', format='json', start_date='2023-07-02', dealers=2)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        matches = json.loads(content)
+        self.assertEqual([match['product_url'] for match in matches],
+                         ['https://shop.ru/1', 'https://shop.ru/3'])
+        self.assertEqual(matches[0], {
+            'product_url': 'https://shop.ru/1', 'dealer_id': 2, 'date': '2023-07-02',
+            'product_name': 'Объявление 1', 'article': '008-1',
+            'article_name': 'Антисептик; "ULTRA" 1 л', 'compliance_number': 0, 'score': 0.9,
+        })
+
+    def test_empty_json(self):
+        _, content = self.get('dealer_prices', format='json', start_date='2024-01-01')
+        self.assertEqual(json.loads(content), [])
+
+    def test_gzip(self):
+        _, plain = self.get('dealer_prices')
+        response, compressed = self.get('dealer_prices', gzip=1)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('filename="dealer_prices.csv.gz"', response['Content-Disposition'])
+        self.assertEqual(gzip.decompress(compressed), plain)
+
+    def test_streamed_in_chunks(self):
+        # маленький буфер: выгрузка отдаётся несколькими частями
+        with mock.patch.object(exports, 'BUFFER_SIZE', 64):
+            response = self.client.get(reverse('export', args=['dealer_prices']), {'format': 'json'})
+            chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(len(json.loads(b''.join(chunks))), 4)
+
+    def test_unknown_export_and_invalid_filter(self):
+        self.assertEqual(self.client.get(reverse('export', args=['users'])).status_code, 404)
+        response = self.client.get(reverse('export', args=['products']), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
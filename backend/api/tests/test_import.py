@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+from django.test import TestCase
+from products.models import Dealer
+from tools.import_csv import (DEALER_UPDATE_FIELDS, import_dealers_from_csv,
+                              upsert_objects)
+
+
+class UpsertObjectsTest(TestCase):
+    def setUp(self):
+        Dealer.objects.bulk_create([Dealer(id=1, name='Дилер 1'), Dealer(id=2, name='Дилер 2')])
+
+    def test_counts(self):
+        counts = upsert_objects(Dealer,
+                                [Dealer(id=1, name='Дилер 1'),
+                                 Dealer(id=2, name='Новое имя'),
+                                 Dealer(id=3, name='Дилер 3')],
+                                DEALER_UPDATE_FIELDS)
+        self.assertEqual(counts, (1, 1, 1))
+        self.assertEqual(dict(Dealer.objects.values_list('id', 'name')),
+                         {1: 'Дилер 1', 2: 'Новое имя', 3: 'Дилер 3'})
+
+    def test_string_keys_and_repeated_rows(self):
+        # ключи из CSV - строки, при повторе ключа остаётся последняя строка
+        counts = upsert_objects(Dealer,
+                                [Dealer(id='1', name='Дилер 1'),
+                                 Dealer(id='4', name='Первое'),
+                                 Dealer(id='4', name='Последнее')],
+                                DEALER_UPDATE_FIELDS)
+        self.assertEqual(counts, (1, 0, 1))
+        self.assertEqual(Dealer.objects.get(id=4).name, 'Последнее')
+
+    def test_import_report(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'marketing_dealer.csv')
+            with open(path, 'w', encoding='utf-8') as csv_file:
+                csv_file.write('id;name\n1;Дилер 1\n2;Другое имя\n5;Дилер 5\nбез имени\n')
+            report = import_dealers_from_csv(path, chunk_size=2)
+        self.assertEqual((report.rows, report.errors, report.chunks), (4, 1, 2))
+        self.assertEqual((report.inserted, report.updated, report.unchanged), (1, 1, 1))
+        self.assertEqual(report.saved, 2)
@@ -0,0 +1,59 @@
+from datetime import date
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from products.models import Dealer, DealerPrice, MatchingJob
+
+from api import jobs
+
+
+class PricesToMatchTest(TestCase):
+    def setUp(self):
+        dealer = Dealer.objects.create(id=1, name='Дилер')
+        DealerPrice.objects.bulk_create([
+            DealerPrice(product_url=f'https://shop.ru/{url}', product_name=name,
+                        matched_name=matched_name, date=date(2023, 7, 1), dealer_id=dealer)
+            for url, name, matched_name in (
+                ('matched', 'Грунт 5 л', 'Грунт 5 л'),
+                ('new', 'Антисептик 1 л', None),
+                ('renamed', 'Отбеливатель 1 л', 'Отбеливатель 0,5 л'),
+            )
+        ])
+        self.last_job = MatchingJob.objects.create(state=MatchingJob.DONE, upload_dir='done',
+                                                   catalogue_key='catalogue', model_version='model',
+                                                   finished_at=timezone.now())
+        self.job = MatchingJob.objects.create(state=MatchingJob.RUNNING, upload_dir='running',
+                                              catalogue_key='catalogue', model_version='model')
+
+    def urls(self):
+        return sorted(price.product_url.rsplit('/', 1)[1] for price in jobs.prices_to_match(self.job))
+
+    def test_incremental(self):
+        self.assertEqual(self.urls(), ['new', 'renamed'])
+        self.assertFalse(self.job.full_rematch)
+
+    def test_full_rematch(self):
+        self.job.full_rematch = True
+        self.assertEqual(self.urls(), ['matched', 'new', 'renamed'])
+
+    def test_changed_catalogue_or_model(self):
+        for field in ('catalogue_key', 'model_version'):
+            with self.subTest(field=field):
+                self.job.full_rematch = False
+                setattr(self.job, field, 'changed')
+                self.assertEqual(self.urls(), ['matched', 'new', 'renamed'])
+                self.assertTrue(self.job.full_rematch)
+                setattr(self.job, field, getattr(self.last_job, field))
+
+    def test_first_job(self):
+        self.last_job.delete()
+        self.assertEqual(self.urls(), ['matched', 'new', 'renamed'])
+        self.assertTrue(self.job.full_rematch)
+
+    def test_price_chunks(self):
+        self.job.full_rematch = True
+        with mock.patch.object(jobs, 'MATCH_CHUNK_SIZE', 2):
+            chunks = list(jobs.price_chunks(jobs.prices_to_match(self.job)))
+        self.assertEqual([[price.product_url.rsplit('/', 1)[1] for price in chunk] for chunk in chunks],
+                         [['matched', 'new'], ['renamed']])
@@ -0,0 +1,74 @@
+from datetime import date
+
+from django.test import TestCase
+from products.models import (Dealer, DealerPrice, Product, ProductDealerKey,
+                             StatisticsRollup)
+
+from api.rollups import rebuild_rollups, record_markup
+
+NONE_CHOSEN = StatisticsRollup.NONE_CHOSEN
+NO_CATEGORY = StatisticsRollup.NO_CATEGORY
+
+
+class RecordMarkupTest(TestCase):
+    def setUp(self):
+        self.dealer = Dealer.objects.create(id=1, name='Дилер')
+        self.products = Product.objects.bulk_create([
+            Product(id=number, article=f'00{number}-1', name=f'Товар {number}', category_id=category_id,
+                    ozon_name='', name_1c='', wb_name='', ozon_article='', wb_article='',
+                    ym_article='', wb_article_td='')
+            for number, category_id in ((1, 10), (2, 20), (3, None))
+        ])
+        self.prices = DealerPrice.objects.bulk_create([
+            DealerPrice(product_url=f'https://shop.ru/{number}', product_name=f'Объявление {number}',
+                        date=date(2023, 7, 1), dealer_id=self.dealer)
+            for number in range(2)
+        ])
+        # варианты соответствия: первый товар - вариант 0, второй - вариант 1
+        ProductDealerKey.objects.bulk_create([
+            ProductDealerKey(key=price, product_id=product, compliance_number=position)
+            for price in self.prices
+            for position, product in enumerate(self.products[:2])
+        ])
+
+    def rollups(self) -> dict:
+        return {(rollup.dealer_id_id, rollup.category_id, rollup.chosen_position): rollup.count
+                for rollup in StatisticsRollup.objects.filter(count__gt=0)}
+
+    def mark(self, price: int, product) -> DealerPrice:
+        return record_markup(self.prices[price].product_url, product)
+
+    def test_new_markup(self):
+        price = self.mark(0, self.products[1])
+        self.assertEqual(price.marked_position, 1)
+        self.assertEqual(self.rollups(), {(1, 20, 1): 1})
+
+    def test_changed_markup_moves_count(self):
+        self.mark(0, self.products[0])
+        self.mark(1, self.products[0])
+        self.assertEqual(self.rollups(), {(1, 10, 0): 2})
+
+        self.mark(0, self.products[1])
+        self.assertEqual(self.rollups(), {(1, 10, 0): 1, (1, 20, 1): 1})
+        self.mark(0, None)
+        self.assertEqual(self.rollups(), {(1, 10, 0): 1, (1, NO_CATEGORY, NONE_CHOSEN): 1})
+        # товар не из вариантов соответствия и без категории
+        self.mark(1, self.products[2])
+        self.assertEqual(self.rollups(), {(1, NO_CATEGORY, NONE_CHOSEN): 2})
+
+    def test_repeated_markup(self):
+        self.mark(0, self.products[0])
+        self.mark(0, self.products[0])
+        self.assertEqual(self.rollups(), {(1, 10, 0): 1})
+
+    def test_matches_rebuild(self):
+        for price, product in ((0, self.products[0]), (1, self.products[1]), (0, None), (1, self.products[2])):
+            self.mark(price, product)
+        recorded = self.rollups()
+        rebuild_rollups()
+        self.assertEqual(self.rollups(), recorded)
+
+    def test_unknown_listing(self):
+        with self.assertRaises(DealerPrice.DoesNotExist):
+            record_markup('https://shop.ru/missing', None)
+        self.assertEqual(self.rollups(), {})
@@ -0,0 +1,60 @@
+from datetime import date
+
+from django.test import TestCase
+from django.urls import reverse
+from products.models import Dealer, DealerPrice, Product, ProductDealerKey
+
+
+class MainViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        dealers = Dealer.objects.bulk_create([Dealer(id=1, name='Дилер 1'), Dealer(id=2, name='Дилер 2')])
+        products = Product.objects.bulk_create([
+            Product(id=number, article=f'00{number}-1', name=f'Товар {number}', ozon_name='',
+                    name_1c='', wb_name='', ozon_article='', wb_article='', ym_article='',
+                    wb_article_td='')
+            for number in range(3)
+        ])
+        # несколько объявлений в один день: порядок внутри дня - по ссылке
+        prices = DealerPrice.objects.bulk_create([
+            DealerPrice(product_url=f'https://shop.ru/{number}', product_name=f'Объявление {number}',
+                        date=date(2023, 7, 1 + number // 3), dealer_id=dealers[number % 2])
+            for number in range(8)
+        ])
+        ProductDealerKey.objects.bulk_create([
+            ProductDealerKey(key=price, product_id=product, compliance_number=position,
+                             score=1 - position / 10)
+            for price in prices
+            for position, product in enumerate(products)
+        ])
+        cls.expected = [price.product_url for price in
+                        sorted(prices, key=lambda price: (price.date, price.product_url), reverse=True)]
+
+    def pages(self, **params):
+        urls, cursor = [], None
+        while True:
+            query = {**params, **({'cursor': cursor} if cursor else {})}
+            with self.assertNumQueries(2):
+                response = self.client.get(reverse('main_view'), query)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            urls.append([listing['product_url'] for listing in data['results']])
+            cursor = data['next_cursor']
+            if cursor is None:
+                return urls, data
+
+    def test_keyset_pages(self):
+        pages, _ = self.pages(page_size=3)
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        self.assertEqual(sum(pages, []), self.expected)
+
+    def test_filters_and_suggestions(self):
+        pages, data = self.pages(page_size=2, dealers=2, num_matches=2)
+        self.assertEqual(sum(pages, []), [url for url in self.expected if int(url[-1]) % 2])
+        suggestions = data['results'][0]['suggestions']
+        self.assertEqual(len(suggestions), 2)
+        self.assertEqual(suggestions, sorted(suggestions, key=lambda suggestion: suggestion['compliance_number']))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('main_view'), {'cursor': 'broken'})
+        self.assertEqual(response.status_code, 400)
@@ -2,10 +2,10 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (DealerListCreateView, DealerPriceListCreateView,
-                    LoadDataView, MainView, MarkupProductView,
-                    MatchingOptionsView, ProductDealerKeyListCreateView,
-                    ProductListCreateView, StatisticsView,
-                    VariantStatisticsView)
+                    ExportView, LoadDataView, MainView, MarkupProductView,
+                    MatchingJobView, MatchingOptionsView,
+                    ProductDealerKeyListCreateView, ProductListCreateView,
+                    StatisticsView, VariantStatisticsView)
 
 # Создаем роутер
 router = DefaultRouter()
@@ -17,9 +17,11 @@ router.register('product_dealer_keys', ProductDealerKeyListCreateView, basename=
 urlpatterns = [
     path('', MainView.as_view(), name='main_view'),
     path('load_data/', LoadDataView.as_view(), name='load_data'),
+    path('load_data/<int:job_id>/', MatchingJobView.as_view(), name='matching_job'),
     path('matching_options/<int:product_id>/', MatchingOptionsView.as_view(), name='matching_options'),
     path('markup_product/<int:product_id>/', MarkupProductView.as_view(), name='markup_product'),
     path('statistics/', StatisticsView.as_view(), name='statistics'),
     path('variant_statistics/', VariantStatisticsView.as_view(), name='variant_statistics'),
+    path('export/<str:name>/', ExportView.as_view(), name='export'),
     path('api/v1/', include(router.urls)),
 ]
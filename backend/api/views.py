@@ -1,37 +1,35 @@
-import json
 import os
+import tempfile
 from datetime import timedelta
 
 from django.db import transaction
-from django.db.models import Count, Q
-from django.http import JsonResponse
+from django.db.models import Prefetch, Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
-from django.urls import reverse
 from django.utils import timezone
-from django.utils.dateparse import parse_date
 from django.views import View
-from products.models import (Dealer, DealerPrice, Product, ProductDealerKey,
-                             Statistics)
+from products.models import (Dealer, DealerPrice, MatchingJob, Product,
+                             ProductDealerKey, StatisticsRollup)
 from rest_framework import status, viewsets
 from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from tools.import_csv import (export_model_to_csv_binary,
-                              import_dealers_from_csv, import_prices_from_csv,
-                              import_products_from_csv, save_json)
 
-from ML.main_script import result
+from ML.matchers import MATCHER_CHOICES
+from ML.snapshot import import_pyarrow
 
-from .forms import MarkupRequestForm
+from .constants import AMOUNT_RESULT
+from .exports import EXPORTS, csv_chunks, export_rows, gzip_chunks, json_chunks
+from .forms import (PAGE_SIZE, ExportFilterForm, ListingFilterForm,
+                    MarkupRequestForm, StatisticsFilterForm, encode_cursor)
+from .jobs import enqueue
+from .rollups import record_markup, rollups_in_range, summarize
 from .serializers import (DealerPriceSerializer, DealerSerializer,
-                          ProductDealerKeySerializer, ProductSerializer,
-                          StatisticsSerializer)
+                          ListingSerializer, MatchingJobSerializer,
+                          ProductDealerKeySerializer, ProductSerializer)
 
 NUMBERS_OF_FILES = 3
-AMOUNT_RESULT = 10
-DEALER_FILE = 'marketing_dealer.csv'
-PRODUCT_FILE = 'marketing_product.csv'
-PRICES_FILE = 'marketing_dealerprice.csv'
+UPLOAD_DIR = 'data/temp_data/'
 
 
 class DealerListCreateView(viewsets.ModelViewSet):
@@ -61,213 +59,226 @@ class LoadDataView(APIView):
     - marketing_dealer.csv
     - marketing_product.csv
     - marketing_dealerprice.csv
-    Класс сохраняет файлы локально в директорию 'data/temp_data/',
-    После вызывает функцию загрузки данных в БД.
+    Вместо любого из них можно передать файл '.parquet' с теми же
+    столбцами (см. команду convert_to_parquet): он меньше и быстрее читается.
+    Класс сохраняет файлы локально в отдельную директорию задачи
+    внутри 'data/temp_data/', создаёт задачу сопоставления и сразу
+    возвращает её идентификатор. Импорт и сопоставление выполняются
+    в фоне, статус задачи доступен в MatchingJobView.
+    Сопоставляются только новые и изменённые объявления,
+    параметр full_rematch=1 запускает сопоставление всех объявлений.
+    Параметр matcher выбирает модель сопоставления (например, tfidf).
     """
     parser_classes = [MultiPartParser]
 
     def post(self, request, *args, **kwargs):
         files = request.data.getlist('file')
 
-        # Проверка, что переданы три файла csv
+        # Проверка, что переданы три файла csv или parquet
         if len(files) != NUMBERS_OF_FILES:
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
+        matcher = request.data.get('matcher', '')
+        if matcher and matcher not in MATCHER_CHOICES:
+            return Response({'matcher': f'Доступные модели: {", ".join(MATCHER_CHOICES)}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # файлы Parquet читаются через pyarrow, без него задача упала бы при импорте
+        if any(file.name.endswith('.parquet') for file in files):
+            try:
+                import_pyarrow()
+            except ImportError as error:
+                return Response({'file': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
         # Сохранение файлов локально
-        save_path = 'data/temp_data/'
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        save_path = tempfile.mkdtemp(dir=UPLOAD_DIR)
         for file in files:
-            with open(os.path.join(save_path, file.name), 'wb') as destination:
+            with open(os.path.join(save_path, os.path.basename(file.name)), 'wb') as destination:
                 for chunk in file.chunks():
                     destination.write(chunk)
 
-        # Импорт файлов в базу данных
-        try:
-            import_dealers_from_csv(os.path.join(save_path, DEALER_FILE))
-            import_products_from_csv(os.path.join(save_path, PRODUCT_FILE))
-            import_prices_from_csv(os.path.join(save_path, PRICES_FILE))
-        except Exception:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-
-        # После импорта файлы удаляются
-        os.remove(os.path.join(save_path, DEALER_FILE))
-        os.remove(os.path.join(save_path, PRODUCT_FILE))
-        os.remove(os.path.join(save_path, PRICES_FILE))
-
-        # Экспорт очищенных файлов из базы данных в CSV
-        # и загрузка в предобученную модель
-        products_file = export_model_to_csv_binary(Product)
-        prices_file = export_model_to_csv_binary(DealerPrice)
-        ds_result = result(products_file,
-                           prices_file,
-                           AMOUNT_RESULT)
-
-        # Сохранение результата работы модели и создание записей в базе данных
-        json_file_path = 'data/temp_data/matching_prices.json'
-        save_json(json_data=ds_result,
-                  file_name=json_file_path)
-        with open(json_file_path, 'r') as file:
-            data = json.load(file)
-        dict_data = list(data.items())
-        os.remove(json_file_path)
-        prices_urls = {
-            price.product_url: price for price in DealerPrice.objects.all()
-        }
-        products_articles = {product.article: product for product in Product.objects.all()}
-        matching_data = []
-        for price in dict_data:
-            for count, product in enumerate(price[1]):
-                matching_data.append(
-                    ProductDealerKey(
-                        key=prices_urls[price[0]],
-                        product_id=products_articles[product],
-                        compliance_number=count
-                    )
-                )
-        ProductDealerKey.objects.bulk_create(matching_data)
-        return Response(status=status.HTTP_201_CREATED)
+        # Импорт и сопоставление выполняются в фоновом воркере
+        with transaction.atomic():
+            job = MatchingJob.objects.create(
+                upload_dir=save_path,
+                full_rematch=request.data.get('full_rematch') in ('1', 'true'),
+                matcher=matcher
+            )
+            enqueue(job)
+        return Response(MatchingJobSerializer(job).data,
+                        status=status.HTTP_202_ACCEPTED)
     
     def get(self, request, *args, **kwargs):
         # обработка GET запроса
         return Response(status=status.HTTP_200_OK)
 
 
+class MatchingJobView(APIView):
+    """
+    Представление для получения статуса и прогресса задачи сопоставления.
+    """
+
+    def get(self, request, job_id, *args, **kwargs):
+        job = get_object_or_404(MatchingJob, id=job_id)
+        return Response(MatchingJobSerializer(job).data)
+
+
 class MainView(View):
     """
-    Представление для отображения списка товаров с возможностью фильтрации.
+    Представление для отображения списка объявлений дилеров с возможностью фильтрации.
 
     GET-запрос:
     - Параметры запроса:
       - start_date: Начальная дата фильтрации (необязательно, формат: 'YYYY-MM-DD').
       - end_date: Конечная дата фильтрации (необязательно, формат: 'YYYY-MM-DD').
-      - status: Фильтр по статусу ('matched' или 'unmatched', необязательно).
-      - dealers: Список идентификаторов продавцов для дополнительной фильтрации (необязательно).
-      - num_matches: Количество вариантов соответствия, которое нужно предоставить (необязательно).
+      - status: Фильтр по статусу ('matched' - размечено оператором, 'unmatched' - нет, необязательно).
+      - dealers (или dealers[]): Идентификаторы продавцов (необязательно).
+      - num_matches: Количество вариантов соответствия на объявление (необязательно, по умолчанию все).
+      - page_size: Количество объявлений на странице (необязательно, по умолчанию 50).
+      - cursor: Курсор следующей страницы из next_cursor предыдущего ответа (необязательно).
 
-    POST-запрос:
+    POST-запрос (решение оператора по объявлению, см. api/rollups.py):
     - Параметры запроса:
       - action: Действие ('Да', 'Нет' или 'Сопоставить').
-      - product_id: Идентификатор товара.
-    
-    Возвращает JsonResponse со списком товаров, в том числе удовлетворяющих заданным критериям фильтрации,
-    а также предоставляет количество совпадений в соответствии с параметром num_matches.
+      - key: Ссылка на объявление дилера.
+      - product_id: Идентификатор выбранного товара (для 'Да').
+
+    Возвращает JsonResponse с одной страницей объявлений (новые первыми, порядок по дате
+    и ссылке) и их лучшими вариантами соответствия. Страница выбирается по курсору
+    (keyset), а не смещением, поэтому на любую страницу выполняется два запроса:
+    объявления с дилерами и варианты соответствия через prefetch_related.
     """
 
     def get(self, request, *args, **kwargs):
-        start_date = request.GET.get('start_date')
-        end_date = request.GET.get('end_date')
-        status_filter = request.GET.get('status')
-        dealer_ids = request.GET.getlist('dealers[]')
-        num_matches = request.GET.get('num_matches')
-
-        # Логика для определения начальной и конечной даты, если не заданы
-        if not start_date or not end_date:
-            end_date = timezone.now()
-            start_date = end_date - timedelta(days=6)
-
-        if not isinstance(start_date, timezone.datetime):
-            """
-            Если начальная дата не является экземпляром datetime, преобразует её из строки в объект datetime.
-
-            Параметры:
-            - start_date (str или datetime): Начальная дата фильтрации.
-
-            Результат:
-            - start_date преобразуется в объект datetime, если она не является таковым.
-            """
-            start_date = parse_date(start_date)
-
-        if not isinstance(end_date, timezone.datetime):
-            """
-            Если конечная дата не является экземпляром datetime, преобразует её из строки в объект datetime.
-
-            Параметры:
-            - end_date (str или datetime): Конечная дата фильтрации.
-
-            Результат:
-            - end_date преобразуется в объект datetime, если она не является таковым.
-            """
-            end_date = parse_date(end_date)
-
-        # Дополнительная фильтрация по dealer_ids
-        if dealer_ids:
-            dealer_filter = {'dealer__id__in': dealer_ids}
-        else:
-            dealer_filter = {}
-
-        if status_filter:
-            """
-            Если параметр status_filter задан, устанавливает фильтр по статусу товаров.
-
-            Параметры:
-            - status_filter (str): Фильтр по статусу ('matched' или 'unmatched').
-
-            Действия:
-            - Если status_filter равен 'matched', фильтрует товары, у которых имеются соответствия.
-            - Если status_filter равен 'unmatched', фильтрует товары, у которых нет соответствий.
-
-            Результат:
-            - dealer_filter обновляется в соответствии с заданным статусом для последующего использования
-            в фильтрации товаров.
-            """
-            
-            if status_filter == 'matched':
-                dealer_filter['product_dealer_keys__isnull'] = False
-            elif status_filter == 'unmatched':
-                dealer_filter['product_dealer_keys__isnull'] = True
-
-        # Получение списка товаров из базы данных
-        products_info_objects = Product.objects.filter(**dealer_filter)
-
-        # Сериализация данных о товарах
-        products_info_serialized = ProductSerializer(products_info_objects, many=True).data
-
-        # Получение списка вариантов соответствия для каждого товара
-        matching_options = []
-        for product in products_info_objects:
-            product_key = product.id
-            matching_options_url = reverse('matching_options', args=[product_key])
-            matching_options.append(matching_options_url)
-
-        # Логика для num_matches
-        if num_matches:
-            # Ограничение количества вариантов соответствия в соответствии с параметром num_matches
-            num_matches = int(num_matches)
-            matching_options = matching_options[:num_matches]
-
-        # Сериализация цен продавцов
-        dealer_prices = DealerPrice.objects.filter(**dealer_filter)
-        dealer_prices_serialized = DealerPriceSerializer(dealer_prices, many=True).data
-
-        # Сериализация данных о продавцах
-        dealers = Dealer.objects.filter(**dealer_filter)
-        dealers_serialized = DealerSerializer(dealers, many=True).data
+        data = request.GET.copy()
+        if 'dealers[]' in data:
+            data.setlist('dealers', data.getlist('dealers[]'))
+        form = ListingFilterForm(data)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        params = form.cleaned_data
+        page_size = params['page_size'] or PAGE_SIZE
+        num_matches = params['num_matches']
+        if num_matches is None:
+            num_matches = AMOUNT_RESULT
+
+        # фильтры выполняются в SQL
+        listings = DealerPrice.objects.all()
+        if params['start_date']:
+            listings = listings.filter(date__gte=params['start_date'])
+        if params['end_date']:
+            listings = listings.filter(date__lte=params['end_date'])
+        if params['dealers']:
+            listings = listings.filter(dealer_id__in=params['dealers'])
+        if params['status'] == 'matched':
+            listings = listings.filter(marking_date__isnull=False)
+        elif params['status'] == 'unmatched':
+            listings = listings.filter(marking_date__isnull=True)
+        if params['cursor']:
+            cursor_date, cursor_url = params['cursor']
+            listings = listings.filter(
+                Q(date__lt=cursor_date) | Q(date=cursor_date, product_url__lt=cursor_url)
+            )
+
+        suggestions = ProductDealerKey.objects.filter(
+            compliance_number__lt=num_matches
+        ).select_related('product_id').only(
+            'key_id', 'product_id__article', 'product_id__name', 'compliance_number', 'score'
+        ).order_by('compliance_number')
+        # лишнее объявление показывает, есть ли следующая страница
+        page = list(listings.select_related('dealer_id').prefetch_related(
+            Prefetch('matching_products', queryset=suggestions, to_attr='suggestions')
+        ).order_by('-date', '-product_url')[:page_size + 1])
+
+        next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            next_cursor = encode_cursor(page[-1].date, page[-1].product_url)
 
         return JsonResponse({
-            'products': products_info_serialized,
-            'matching_options': matching_options,
-            'dealer_prices': dealer_prices_serialized,
-            'dealers': dealers_serialized,
+            'results': ListingSerializer(page, many=True).data,
+            'page_size': page_size,
+            'next_cursor': next_cursor,
         })
-    
-    @transaction.atomic
+
     def post(self, request, *args, **kwargs):
         action = request.POST.get('action')
-        
+        markup_request_form = MarkupRequestForm(request.POST)
+        product_id = request.POST.get('product_id', '')
+        if action in ('Да', 'Нет') and not markup_request_form.is_valid():
+            return JsonResponse({"error": "Неверные данные формы"}, status=400)
+        if action == 'Да' and not product_id.isdigit():
+            return JsonResponse({"error": "Не указан product_id"}, status=400)
+
         if action == 'Да':
-            # Обработка "Да"
-            # Добавить логику для "Да"
-            return JsonResponse({"message": "Да"})
+            # Выбран товар заказчика (product_id) для объявления key
+            product = get_object_or_404(Product, id=product_id)
+            return markup_response(markup_request_form.cleaned_data['key'], product)
         elif action == 'Нет':
-            # Обработка "Нет"
-            # Добавить логику для "Нет"
-            return JsonResponse({"message": "Нет"})
+            # Ни один товар не подходит
+            return markup_response(markup_request_form.cleaned_data['key'], None)
         elif action == 'Сопоставить':
             # Обработка "Сопоставить"
             # Добавить логику для "Сопоставить"
             return JsonResponse({"message": "Сопоставить"})
         else:
             return JsonResponse({"error": "Неверное действие"}, status=400) # На случай возможных изменений в коде
-    
+
+
+def markup_response(product_url: str, product) -> JsonResponse:
+    """
+    Сохраняет решение оператора по объявлению (см. api/rollups.py).
+    """
+    try:
+        price = record_markup(product_url, product)
+    except DealerPrice.DoesNotExist:
+        return JsonResponse({"error": "Объявление не найдено"}, status=404)
+    return JsonResponse({
+        "message": f"Разметка объявления {product_url} сохранена",
+        "key": price.product_url,
+        "product_id": product.id if product else None,
+        "marked_position": price.marked_position,
+        "marking_date": price.marking_date,
+    })
+
+
+class ExportView(View):
+    """
+    Потоковая выгрузка таблицы: products, dealer_prices или matches
+    (варианты соответствия с объявлением, артикулом и близостью).
+    Параметры запроса:
+    - format: 'csv' (по умолчанию, разделитель ';') или 'json'.
+    - gzip: 1 - сжать выгрузку в gzip.
+    - start_date, end_date, dealers (или dealers[]): фильтры по дате
+      объявления и дилерам (для dealer_prices и matches).
+    Строки читаются из БД курсором пачками и сразу отдаются клиенту,
+    поэтому память процесса не зависит от размера таблицы.
+    """
+
+    def get(self, request, name, *args, **kwargs):
+        if name not in EXPORTS:
+            raise Http404(f'Нет выгрузки {name}')
+        data = request.GET.copy()
+        if 'dealers[]' in data:
+            data.setlist('dealers', data.getlist('dealers[]'))
+        form = ExportFilterForm(data)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        params = form.cleaned_data
+
+        headers, rows = export_rows(name, params['start_date'], params['end_date'], params['dealers'])
+        if params['format'] == 'json':
+            content, content_type, file_name = json_chunks(headers, rows), 'application/json', f'{name}.json'
+        else:
+            content, content_type, file_name = csv_chunks(headers, rows), 'text/csv; charset=utf-8', f'{name}.csv'
+        if request.GET.get('gzip') in ('1', 'true'):
+            content, content_type, file_name = gzip_chunks(content), 'application/gzip', f'{file_name}.gz'
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{file_name}"'
+        return response
+
 
 class MatchingOptionsView(View):
     """
@@ -280,7 +291,9 @@ class MatchingOptionsView(View):
 
         Возвращает JsonResponse с вариантами соответствия.
         """
-        product_dealer_keys = ProductDealerKey.objects.filter(product_id=product_id)
+        product_dealer_keys = ProductDealerKey.objects.filter(
+            product_id=product_id
+        ).order_by('compliance_number')
 
         # Сериализация объектов с использованием ProductDealerKeySerializer
         serializer = ProductDealerKeySerializer(product_dealer_keys, many=True)
@@ -311,159 +324,79 @@ class MarkupProductView(View):
         markup_request_form = MarkupRequestForm(request.POST)
 
         if markup_request_form.is_valid():
-            key = markup_request_form.cleaned_data['key']
-            markup_count = ProductDealerKey.objects.filter(product=product).count()
-
-            # Увеличиваем счетчик для новой разметки
-            product_dealer_key = ProductDealerKey.objects.create(key=key, product=product, order=markup_count + 1)
-
-            return JsonResponse({
-                "message": f"Разметка товара {product_id} завершена",
-                "markup_id": product_dealer_key.id,
-            })
+            # key - ссылка на объявление дилера, которому соответствует товар
+            return markup_response(markup_request_form.cleaned_data['key'], product)
         else:
-            return JsonResponse({"error": r"Неверные данные формы"}, status=400)     
+            return JsonResponse({"error": r"Неверные данные формы"}, status=400)
 
 
 class StatisticsView(View):
     """
     Представление для работы со статистикой.
+    Суммирует дневные итоги разметки (StatisticsRollup) за период:
+    количество размеченных объявлений, выбор по номеру варианта,
+    по дилерам и категориям и количество случаев, когда ни один вариант не выбран.
+    Параметры: start_date, end_date (по умолчанию последние 7 дней),
+    dealers и categories.
     """
-    
-    def get(self, request):
-        # Получаем начальную и конечную дату из запроса
-        start_date_str = request.GET.get('start_date')
-        end_date_str = request.GET.get('end_date')
-
-        # Используем даты из запроса или значения по умолчанию
-        if not start_date_str or not end_date_str:
-            end_date = timezone.now()
-            start_date = end_date - timedelta(days=6)
-        else:
-            start_date = parse_date(start_date_str)
-            end_date = parse_date(end_date_str)
-
-        # Статистика общего количества размеченных товаров за выбранный период
-        total_markup_count = ProductDealerKey.objects.filter(
-            marking_date__range=[start_date, end_date]
-        ).count()
-
-        # Статистика выбора предложенных вариантов за выбранный период
-        chosen_options_stats = ProductDealerKey.objects.filter(
-            marking_date__range=[start_date, end_date]
-        ).exclude(key=None).values(
-            'product_id', 'dealer_id', 'product_id__category_id'
-        ).annotate(
-            total_choices=Count('id'),
-            chosen_option_count=Count('key')
-        )
-
-        # Статистика по порядку выбора вариантов за выбранный период
-        choices_order = chosen_options_stats.values(
-            'choices_order', 'product_id', 'dealer_id', 'product_id__category_id'
-        ).annotate(
-            choices_count=Count('choices_order')
-        ).order_by('choices_order')
-
-        # Счетчик для порядкового номера выбора вариантов
-        choices_counter = 1
-
-        # Присвоение порядкового номера выбора вариантов
-        for stat in choices_order:
-            stat['choices_order'] = choices_counter
-            choices_counter += 1
-
-        # Преобразование QuerySet в список для сохранения в модель
-        chosen_options_stats_list = list(chosen_options_stats)
-        choices_order_list = list(choices_order)
-
-        # Статистика по тому, как часто ни один вариант не выбран
-        none_chosen_count = chosen_options_stats.filter(chosen_option_count=0).count()
-
-        # Получаем дилеров и категории
-        dealers = Dealer.objects.all()
-        categories = Product.objects.values('category_id').distinct()
-
-        # Сериализация статистики
-        statistics_data = Statistics.objects.all()
-        statistics_serialized = StatisticsSerializer(statistics_data, many=True).data
-
-        context = {
-            'statistics': statistics_serialized,
-            'start_date': start_date.strftime("%Y-%m-%d"),
-            'end_date': end_date.strftime("%Y-%m-%d"),
-            'total_markup_count': total_markup_count,
-            'chosen_options_stats': chosen_options_stats_list,
-            'choices_order': choices_order_list,
-            'none_chosen_count': none_chosen_count,
-            'dealers': dealers,
-            'categories': categories,
-        }
-
-        # Сохранение статистики в базе данных
-        Statistics.objects.create(
-            start_date=start_date,
-            end_date=end_date,
-            total_markup_count=total_markup_count,
-            none_chosen_count=none_chosen_count,
-            choices_order=choices_order_list,
-            chosen_options_stats=chosen_options_stats_list,
-        )
 
+    def get(self, request):
+        rollups, context = statistics_rollups(request)
+        if rollups is None:
+            return JsonResponse(context, status=400)
+
+        choices_order = summarize(rollups, 'chosen_position')
+        context.update({
+            'total_markup_count': sum(row['count'] for row in choices_order),
+            'none_chosen_count': sum(row['count'] for row in choices_order
+                                     if row['chosen_position'] == StatisticsRollup.NONE_CHOSEN),
+            'choices_order': choices_order,
+            'chosen_options_stats': summarize(rollups, 'dealer_id', 'category_id', 'chosen_position'),
+        })
         return JsonResponse(context)
 
 
 class VariantStatisticsView(View):
     """
     Представление для статистики по номеру варианта.
+    Возвращает количество выборов каждого варианта и количество случаев,
+    когда ни один вариант не выбран, по дневным итогам разметки.
     """
 
     def get(self, request):
-        # Логика для получения статистики по порядковому номеру выбора и невыбранным вариантам
-        start_date = request.GET.get('start_date')
-        end_date = request.GET.get('end_date')
-
-        # Ваша логика для фильтрации ProductDealerKey и сбора статистики
-        # Пример:
-        chosen_options_stats = ProductDealerKey.objects.filter(
-            marking_date__range=[start_date, end_date]
-        ).values(
-            'choices_order', 'product_id', 'dealer_id', 'product_id__category_id'
-        ).annotate(
-            choices_count=Count('choices_order'),
-            chosen_option_count=Count('id', filter=~Q(key=None)),
-        ).order_by('choices_order')
-
-        # Счетчик для порядкового номера выбора вариантов
-        choices_counter = 1
-
-        # Присвоение порядкового номера выбора вариантов
-        for stat in chosen_options_stats:
-            stat['choices_order'] = choices_counter
-            choices_counter += 1
-
-        # Преобразование QuerySet в список для сохранения в модель
-        chosen_options_stats_list = list(chosen_options_stats)
-
-        # Статистика по тому, как часто ни один вариант не выбран за выбранный период
-        none_chosen_count = chosen_options_stats.filter(chosen_option_count=0).count()
-
-        # Получаем дилеров и категории
-        dealers = Dealer.objects.all()
-        categories = Product.objects.values('category_id').distinct()
-
-        # Сериализация статистики
-        statistics_data = Statistics.objects.all()
-        statistics_serialized = StatisticsSerializer(statistics_data, many=True).data
-
-        context = {
-            'statistics': statistics_serialized,
-            'start_date': start_date.strftime("%Y-%m-%d") if start_date else None,
-            'end_date': end_date.strftime("%Y-%m-%d") if end_date else None,
-            'chosen_options_stats': chosen_options_stats_list,
-            'none_chosen_count': none_chosen_count,
-            'dealers': dealers,
-            'categories': categories,
-        }
-
+        rollups, context = statistics_rollups(request)
+        if rollups is None:
+            return JsonResponse(context, status=400)
+
+        choices_order = summarize(rollups, 'chosen_position')
+        context.update({
+            'choices_order': [row for row in choices_order
+                              if row['chosen_position'] != StatisticsRollup.NONE_CHOSEN],
+            'none_chosen_count': sum(row['count'] for row in choices_order
+                                     if row['chosen_position'] == StatisticsRollup.NONE_CHOSEN),
+        })
         return JsonResponse(context)
+
+
+def statistics_rollups(request):
+    """
+    Итоги разметки по параметрам запроса статистики
+    или (None, ошибки формы).
+    """
+    data = request.GET.copy()
+    for name in ('dealers', 'categories'):
+        if f'{name}[]' in data:
+            data.setlist(name, data.getlist(f'{name}[]'))
+    form = StatisticsFilterForm(data)
+    if not form.is_valid():
+        return None, {'errors': form.errors}
+    params = form.cleaned_data
+
+    # Используем даты из запроса или значения по умолчанию
+    end_date = params['end_date'] or timezone.localdate()
+    start_date = params['start_date'] or end_date - timedelta(days=6)
+    rollups = rollups_in_range(start_date, end_date, params['dealers'], params['categories'])
+    return rollups, {
+        'start_date': start_date.strftime("%Y-%m-%d"),
+        'end_date': end_date.strftime("%Y-%m-%d"),
+    }
@@ -1,8 +1,10 @@
 from django.contrib import admin
 
-from .models import Dealer, DealerPrice, Product, ProductDealerKey
+from .models import (Dealer, DealerPrice, MatchingJob, Product,
+                     ProductDealerKey)
 
 admin.site.register(Dealer)
 admin.site.register(Product)
 admin.site.register(DealerPrice)
 admin.site.register(ProductDealerKey)
+admin.site.register(MatchingJob)
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dealerprice',
+            index=models.Index(fields=['dealer_id', 'date'], name='dealerprice_dealer_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dealerprice',
+            index=models.Index(fields=['date', 'product_url'], name='dealerprice_date_url_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dealerprice',
+            index=models.Index(condition=models.Q(('marking_date__isnull', True)), fields=['date', 'product_url'], name='dealerprice_unmarked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dealerprice',
+            index=models.Index(condition=models.Q(('marking_date__isnull', False)), fields=['marking_date'], name='dealerprice_marked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productdealerkey',
+            index=models.Index(fields=['key', 'compliance_number'], name='pdk_key_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productdealerkey',
+            index=models.Index(fields=['product_id', 'compliance_number'], name='pdk_product_number_idx'),
+        ),
+    ]
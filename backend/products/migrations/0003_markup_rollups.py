@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 09:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_matching_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dealerprice',
+            name='marked_position',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='dealerprice',
+            name='marked_product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='marked_prices', to='products.product'),
+        ),
+        migrations.CreateModel(
+            name='StatisticsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('category_id', models.IntegerField(default=0)),
+                ('chosen_position', models.SmallIntegerField(default=-1)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('dealer_id', models.ForeignKey(db_column='dealer_id', on_delete=django.db.models.deletion.CASCADE, related_name='statistics_rollups', to='products.dealer')),
+            ],
+            options={
+                'db_table': 'statistics_rollup',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='statisticsrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'dealer_id', 'category_id', 'chosen_position'), name='statistics_rollup_key'),
+        ),
+    ]
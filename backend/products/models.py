@@ -54,12 +54,37 @@ class DealerPrice(models.Model):
                                   on_delete=models.CASCADE, 
                                   db_column='dealer_id')
     marking_date = models.DateTimeField(null=True)
+    # решение оператора: выбранный товар (NULL - ничего не подходит)
+    # и его номер среди вариантов соответствия (NULL - выбран не из вариантов)
+    marked_product = models.ForeignKey(Product,
+                                       related_name='marked_prices',
+                                       on_delete=models.SET_NULL,
+                                       null=True,
+                                       blank=True)
+    marked_position = models.PositiveSmallIntegerField(null=True, blank=True)
+    # название, по которому последний раз подбирались варианты соответствия;
+    # NULL - объявление ещё не сопоставлялось
+    matched_name = models.CharField(max_length=250, null=True, blank=True)
 
     def __str__(self):
         return self.product_url
     
     class Meta:
         db_table = 'marketing_dealerprice'
+        indexes = [
+            # фильтр по дилеру и периоду
+            models.Index(fields=['dealer_id', 'date'], name='dealerprice_dealer_date_idx'),
+            # порядок страниц MainView (keyset по дате и ссылке)
+            models.Index(fields=['date', 'product_url'], name='dealerprice_date_url_idx'),
+            # неразмеченные объявления - частичный индекс только по ним
+            models.Index(fields=['date', 'product_url'],
+                         condition=models.Q(marking_date__isnull=True),
+                         name='dealerprice_unmarked_idx'),
+            # статистика по дате разметки
+            models.Index(fields=['marking_date'],
+                         condition=models.Q(marking_date__isnull=False),
+                         name='dealerprice_marked_idx'),
+        ]
 
 
 class ProductDealerKey(models.Model):
@@ -75,13 +100,19 @@ class ProductDealerKey(models.Model):
     product_id = models.ForeignKey(Product,
                                    related_name='product_dealer_keys',
                                    on_delete=models.CASCADE)
-    compliance_number = models.PositiveSmallIntegerField()    
+    compliance_number = models.PositiveSmallIntegerField()
+    score = models.FloatField(null=True)
 
     def __str__(self):
         return f'ProductDealerKey {self.id} for Product {self.product}'
     
     class Meta:
         db_table = 'product_dealer_key'
+        indexes = [
+            # варианты объявления и варианты товара по порядку
+            models.Index(fields=['key', 'compliance_number'], name='pdk_key_number_idx'),
+            models.Index(fields=['product_id', 'compliance_number'], name='pdk_product_number_idx'),
+        ]
     
 
 class Statistics(models.Model):
@@ -97,3 +128,84 @@ class Statistics(models.Model):
     
     class Meta:
         db_table = 'statistics'
+
+
+class StatisticsRollup(models.Model):
+    """
+    Дневные итоги разметки: количество решений оператора за день
+    по дилеру, категории выбранного товара и номеру выбранного варианта.
+    Обновляется вместе с решением (см. api/rollups.py).
+    """
+    # значения вместо NULL, чтобы ключ итогов был уникальным
+    NO_CATEGORY = 0
+    NONE_CHOSEN = -1
+
+    day = models.DateField()
+    dealer_id = models.ForeignKey(Dealer,
+                                  related_name='statistics_rollups',
+                                  on_delete=models.CASCADE,
+                                  db_column='dealer_id')
+    # категория выбранного товара, NO_CATEGORY - товар не выбран или без категории
+    category_id = models.IntegerField(default=NO_CATEGORY)
+    # номер выбранного варианта, NONE_CHOSEN - ни один из вариантов не выбран
+    chosen_position = models.SmallIntegerField(default=NONE_CHOSEN)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'StatisticsRollup {self.day} dealer {self.dealer_id_id}'
+
+    class Meta:
+        db_table = 'statistics_rollup'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'dealer_id', 'category_id', 'chosen_position'],
+                                    name='statistics_rollup_key'),
+        ]
+
+
+class MatchingJob(models.Model):
+    """
+    Модель данных для задачи сопоставления товаров.
+    Создаётся при загрузке файлов и выполняется в фоне (см. api/jobs.py).
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATE_CHOICES = [
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершена'),
+        (FAILED, 'Ошибка'),
+    ]
+
+    state = models.CharField(max_length=10,
+                             choices=STATE_CHOICES,
+                             default=PENDING,
+                             db_index=True)
+    stage = models.CharField(max_length=20, blank=True)
+    full_rematch = models.BooleanField(default=False)
+    # модель сопоставления (см. ML/matchers.py), пусто - ML_MATCHER
+    matcher = models.CharField(max_length=30, blank=True)
+    catalogue_key = models.CharField(max_length=40, blank=True)
+    model_version = models.CharField(max_length=250, blank=True)
+    upload_dir = models.CharField(max_length=255)
+    imported_count = models.PositiveIntegerField(default=0)
+    import_errors_count = models.PositiveIntegerField(default=0)
+    inserted_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    unchanged_count = models.PositiveIntegerField(default=0)
+    prices_count = models.PositiveIntegerField(default=0)
+    processed_count = models.PositiveIntegerField(default=0)
+    matches_count = models.PositiveIntegerField(default=0)
+    # сколько объявлений сопоставлено по коду, по названию и моделью
+    stage_counts = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f'MatchingJob {self.id} ({self.state})'
+
+    class Meta:
+        db_table = 'matching_job'
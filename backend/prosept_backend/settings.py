@@ -20,6 +20,23 @@ ALLOWED_HOSTS = []
 DATA_UPLOAD_MAX_MEMORY_SIZE = 100000000
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 10000
 
+# Загружать модель ML при старте WSGI-воркера, а не при первом запросе.
+# Путь к локальной копии модели задаётся переменной окружения ML_MODEL_PATH
+ML_WARM_UP_ON_START = False
+
+# Количество фоновых потоков для задач сопоставления в каждом процессе
+# (для sqlite больше одного не имеет смысла - запись идёт в один поток)
+MATCHING_WORKERS = 1
+
+# Задача, которая выполняется дольше (минут), считается брошенной
+# аварийно завершённым воркером и возвращается в очередь process_matching_jobs
+MATCHING_STALE_AFTER = 360
+
+# Модель сопоставления для отдельных дилеров: {id дилера: 'tfidf'}.
+# Остальные дилеры сопоставляются моделью задачи или ML_MATCHER.
+# После изменения нужна задача с full_rematch=1
+MATCHERS_BY_DEALER = {}
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'prosept_backend.settings')
 
 application = get_wsgi_application()
+
+# Модель ML загружается лениво при первом запросе,
+# ML_WARM_UP_ON_START позволяет загрузить её сразу при старте воркера
+from django.conf import settings  # noqa: E402
+
+if settings.ML_WARM_UP_ON_START:
+    from ML.registry import warm_up
+    warm_up()
@@ -1,153 +1,237 @@
 import csv
-import io
-import json
-from typing import Type, Union
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from typing import Callable, Iterator, Optional, Sequence, Type
 
-import pandas as pd
+from django.db import transaction
 from django.db.models import Model
 from products.models import Dealer, DealerPrice, Product
 
 ITEMS_IN_MARKETING_DEALERPRICE = 7
+CHUNK_SIZE = 10000 # количество строк csv, читаемых и сохраняемых за одну транзакцию
+BATCH_SIZE = 1000 # размер одного INSERT внутри пачки
 
 
-def import_dealers_from_csv(path_to_csv: str) -> None:
-    """
-    Функция принимает путь к csv-файлу со списком дилеров.
-    На основе обработанных данных создаются записи в БД.
-    """
-    with open(path_to_csv, newline='', encoding='utf-8') as csv_file:
-        csv_reader = csv.reader(csv_file, delimiter=';')
-        next(csv_reader)
-        dealer_list = [
-            Dealer(id=id,
-                   name=name)
-            for id, name in csv_reader
-        ]
-        Dealer.objects.bulk_create(dealer_list)
+# поля, которые обновляются при повторной загрузке существующих записей
+DEALER_UPDATE_FIELDS = ['name']
+PRODUCT_UPDATE_FIELDS = [
+    'id', 'ean_13', 'name', 'cost', 'recommended_price', 'category_id',
+    'ozon_name', 'name_1c', 'wb_name', 'ozon_article', 'wb_article',
+    'ym_article', 'wb_article_td',
+]
+PRICE_UPDATE_FIELDS = ['product_key', 'price', 'product_name', 'date', 'dealer_id']
 
 
-def import_products_from_csv(path_to_csv: str) -> None:
+@dataclass
+class ImportReport:
     """
-    Функция принимает путь со списком продуктов производителя.
-    На основе обработанных данных создаются записи в БД.
+    Счётчики импорта: прочитанные строки, строки с ошибками,
+    отправленные в БД записи и обработанные пачки.
+    При импорте с обновлением (upsert) также считаются
+    новые, обновлённые и не изменившиеся записи.
     """
-    with open(path_to_csv, newline='', encoding='utf-8') as csv_file:
-        csv_reader = csv.reader(csv_file, delimiter=';')
-        next(csv_reader)
-        products_list = [
-            Product(
-                article=article,
-                ean_13=int(float(ean_13)) if ean_13 else None,
-                name=name,
-                cost=cost if cost else None,
-                recommended_price=recommended_price
-                if recommended_price else None,
-                category_id=int(float(category_id))
-                if category_id else None,
-                ozon_name=ozon_name,
-                name_1c=name_1c,
-                wb_name=wb_name,
-                ozon_article=ozon_article,
-                wb_article=wb_article,
-                ym_article=ym_article,
-                wb_article_td=wb_article_td)
-            for row_number, id, article, ean_13, name, cost,
-            recommended_price, category_id, ozon_name,
-            name_1c, wb_name, ozon_article, wb_article,
-            ym_article, wb_article_td
-            in csv_reader
-        ]
-        Product.objects.bulk_create(products_list)
-
-
-def import_prices_from_csv(path_to_csv: str) -> None:
+    rows: int = 0
+    errors: int = 0
+    saved: int = 0
+    chunks: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+
+def upsert_objects(model: Type[Model],
+                   objects: list[Model],
+                   update_fields: list[str],
+                   batch_size: int = BATCH_SIZE) -> tuple[int, int, int]:
     """
-    Функция принимает путь со списком объявлений дилеров.
-    На основе обработанных данных создаются записи в БД.
+    Функция вставляет новые записи и обновляет изменившиеся одним
+    bulk_create(update_conflicts=True), не изменившиеся записи пропускаются.
+    Возвращает количество новых, обновлённых и не изменившихся записей.
+    """
+    pk_field = model._meta.pk
+    fields = [model._meta.get_field(name) for name in update_fields]
+
+    # при повторе ключа внутри пачки остаётся последняя строка
+    objects_by_pk = {}
+    for obj in objects:
+        obj.pk = pk_field.to_python(obj.pk)
+        objects_by_pk[obj.pk] = obj
+    existing = model.objects.only(*update_fields).in_bulk(list(objects_by_pk))
+
+    changed = []
+    inserted = unchanged = 0
+    for pk, obj in objects_by_pk.items():
+        current = existing.get(pk)
+        if current is None:
+            inserted += 1
+        elif all(field.to_python(getattr(obj, field.attname))
+                 == field.to_python(getattr(current, field.attname))
+                 for field in fields):
+            unchanged += 1
+            continue
+        changed.append(obj)
+
+    model.objects.bulk_create(changed,
+                              batch_size=batch_size,
+                              update_conflicts=True,
+                              unique_fields=[pk_field.name],
+                              update_fields=update_fields)
+    return inserted, len(changed) - inserted, unchanged
+
+
+def import_in_chunks(path_to_csv: str,
+                     model: Type[Model],
+                     build: Callable[[list[str]], Model],
+                     chunk_size: int = CHUNK_SIZE,
+                     batch_size: int = BATCH_SIZE,
+                     progress: Optional[Callable[[ImportReport], None]] = None,
+                     update_fields: Optional[list[str]] = None,
+                     **bulk_create_kwargs) -> ImportReport:
     """
-    with open(path_to_csv, newline='', encoding='utf-8') as csv_file:
+    Функция читает csv-файл (или Parquet, см. read_chunks) пачками
+    по chunk_size строк и сохраняет каждую пачку отдельной транзакцией,
+    поэтому расход памяти не зависит от размера файла.
+    Если переданы update_fields, существующие записи обновляются
+    (см. upsert_objects), иначе пачка сохраняется обычным bulk_create.
+    Строки, которые не удалось разобрать, пропускаются и учитываются в errors.
+    После каждой пачки вызывается progress с текущими счётчиками.
+    """
+    report = ImportReport()
+    for rows in read_chunks(path_to_csv, chunk_size):
+        objects = []
+        for row in rows:
+            try:
+                objects.append(build(row))
+            except (ValueError, KeyError, TypeError):
+                report.errors += 1
+        with transaction.atomic():
+            if update_fields is None:
+                model.objects.bulk_create(objects,
+                                          batch_size=batch_size,
+                                          **bulk_create_kwargs)
+                report.saved += len(objects)
+            else:
+                inserted, updated, unchanged = upsert_objects(
+                    model, objects, update_fields, batch_size
+                )
+                report.inserted += inserted
+                report.updated += updated
+                report.unchanged += unchanged
+                report.saved += inserted + updated
+        report.rows += len(rows)
+        report.chunks += 1
+        if progress is not None:
+            progress(report)
+    return report
+
+
+def read_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[list[Sequence[str]]]:
+    """
+    Функция читает строки файла без заголовка пачками по chunk_size.
+    Файл '.parquet' читается по группам строк, а значения приводятся
+    к строкам, как в CSV (пустое значение - ''), поэтому разбор строк
+    (product_from_row и др.) общий для обоих форматов.
+    """
+    if path.endswith('.parquet'):
+        from ML.snapshot import import_pyarrow
+        pyarrow = import_pyarrow()
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            # приведение к строкам выполняется в Arrow для всего столбца сразу
+            columns = [pyarrow.compute.fill_null(pyarrow.compute.cast(column, pyarrow.string()), '')
+                       .to_pylist()
+                       for column in batch.columns]
+            yield list(zip(*columns))
+        return
+    with open(path, newline='', encoding='utf-8') as csv_file:
         csv_reader = csv.reader(csv_file, delimiter=';')
         next(csv_reader)
-        dealers_dict = {dealer.id: dealer for dealer in Dealer.objects.all()}
-        prices_list = []
-        for row in csv_reader:
-            if len(row) == ITEMS_IN_MARKETING_DEALERPRICE:
-                (pk, product_key, price, product_url,
-                 product_name, date, dealer_id) = row
-                prices_list.append(
-                    DealerPrice(
-                        product_key=int(float(product_key))
-                        if product_key.isdigit() else None,
-                        price=float(price) if price else None,
-                        product_url=product_url,
-                        product_name=product_name,
-                        date=date,
-                        dealer_id=dealers_dict[int(dealer_id)]
-                    )
-                )
-        DealerPrice.objects.bulk_create(prices_list, ignore_conflicts=True)
-
-
-def export_model_to_csv_binary(
-        model: Union[Type[DealerPrice], Type[Product]]
-) -> io.StringIO:
-    # Открываем объект для записи CSV в памяти
-    csv_buffer = io.StringIO()
-    csv_writer = csv.writer(csv_buffer)
-
-    # Заголовки CSV - имена полей модели
-    headers = [field.name for field in model._meta.fields]
-    csv_writer.writerow(headers)
-
-    # Записываем данные из базы данных в CSV
-    for row in model.objects.all():
-        csv_writer.writerow([getattr(row, field) for field in headers])
-
-    # Возвращаем объект для чтения CSV из памяти
-    csv_buffer.seek(0)
-
-    return csv_buffer
-
-
-def convert_csv_into_binary(file_path):
-    # Открываем файл для чтения
-    with open(file_path, 'r') as file:
-        # Открываем объект для записи CSV в памяти
-        csv_buffer = io.StringIO()
-        csv_writer = csv.writer(csv_buffer)
-
-        # Читаем первую строку файла, которая обычно содержит заголовки
-        headers = file.readline().strip().split(',')
-        csv_writer.writerow(headers)
-
-        # Читаем остальные строки и записываем их в CSV
-        for line in file:
-            row_data = line.strip().split(',')
-            csv_writer.writerow(row_data)
-
-        # Возвращаем объект для чтения CSV из памяти
-        csv_buffer.seek(0)
-
-        return csv_buffer
-
-
-def export_db_to_csv(model, file_path):
-    # Заголовки CSV - имена полей модели
-    headers = [field.name for field in model._meta.fields]
+        while True:
+            rows = list(islice(csv_reader, chunk_size))
+            if not rows:
+                return
+            yield rows
+
+
+def dealer_from_row(row: list[str]) -> Dealer:
+    id, name = row
+    return Dealer(id=id,
+                  name=name)
+
+
+def product_from_row(row: list[str]) -> Product:
+    (row_number, id, article, ean_13, name, cost,
+     recommended_price, category_id, ozon_name,
+     name_1c, wb_name, ozon_article, wb_article,
+     ym_article, wb_article_td) = row
+    return Product(
+        id=int(float(id)) if id else None,
+        article=article,
+        ean_13=int(float(ean_13)) if ean_13 else None,
+        name=name,
+        cost=cost if cost else None,
+        recommended_price=recommended_price
+        if recommended_price else None,
+        category_id=int(float(category_id))
+        if category_id else None,
+        ozon_name=ozon_name,
+        name_1c=name_1c,
+        wb_name=wb_name,
+        ozon_article=ozon_article,
+        wb_article=wb_article,
+        ym_article=ym_article,
+        wb_article_td=wb_article_td)
+
+
+def price_from_row(row: list[str], dealers_dict: dict[int, Dealer]) -> DealerPrice:
+    if len(row) != ITEMS_IN_MARKETING_DEALERPRICE:
+        raise ValueError(f'Ожидалось {ITEMS_IN_MARKETING_DEALERPRICE} полей, получено {len(row)}')
+    (pk, product_key, price, product_url,
+     product_name, date, dealer_id) = row
+    return DealerPrice(
+        product_key=int(float(product_key))
+        if product_key.isdigit() else None,
+        price=float(price) if price else None,
+        product_url=product_url,
+        product_name=product_name,
+        date=date,
+        dealer_id=dealers_dict[int(dealer_id)]
+    )
+
+
+def import_dealers_from_csv(path_to_csv: str, **kwargs) -> ImportReport:
+    """
+    Функция принимает путь к csv-файлу со списком дилеров.
+    На основе обработанных данных создаются или обновляются записи в БД.
+    Параметры пачек и progress передаются в import_in_chunks.
+    """
+    kwargs.setdefault('update_fields', DEALER_UPDATE_FIELDS)
+    return import_in_chunks(path_to_csv, Dealer, dealer_from_row, **kwargs)
 
-    # Создаем DataFrame из данных модели
-    data = [[getattr(row, field) for field in headers]
-            for row in model.objects.all()]
-    df = pd.DataFrame(data, columns=headers)
 
-    # Сохраняем DataFrame в CSV файл
-    df.to_csv(file_path, index=False)
+def import_products_from_csv(path_to_csv: str, **kwargs) -> ImportReport:
+    """
+    Функция принимает путь со списком продуктов производителя.
+    На основе обработанных данных создаются или обновляются записи в БД.
+    Параметры пачек и progress передаются в import_in_chunks.
+    """
+    kwargs.setdefault('update_fields', PRODUCT_UPDATE_FIELDS)
+    return import_in_chunks(path_to_csv, Product, product_from_row, **kwargs)
 
 
-def save_json(json_data: json, file_name: str) -> None:
-    json_str = json.dumps(json_data, indent=2, ensure_ascii=False)
-    with open(file_name, 'w', encoding='utf-8') as json_file:
-        json_file.write(json_data)
+def import_prices_from_csv(path_to_csv: str, **kwargs) -> ImportReport:
+    """
+    Функция принимает путь со списком объявлений дилеров.
+    На основе обработанных данных создаются записи в БД, у существующих
+    объявлений обновляются цена, название и дата.
+    Параметры пачек и progress передаются в import_in_chunks.
+    """
+    kwargs.setdefault('update_fields', PRICE_UPDATE_FIELDS)
+    dealers_dict = {dealer.id: dealer for dealer in Dealer.objects.all()}
+    return import_in_chunks(path_to_csv, DealerPrice,
+                            partial(price_from_row, dealers_dict=dealers_dict),
+                            **kwargs)
 
 
 # временные пути для файлов
@@ -0,0 +1,183 @@
+import csv
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, time as day_time, timedelta
+from typing import Callable, Optional
+
+import pandas as pd
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Q, QuerySet
+from django.utils import timezone
+from products.models import DealerPrice, Product, ProductDealerKey
+
+from .import_csv import (import_dealers_from_csv, import_prices_from_csv,
+                         import_products_from_csv)
+from .synthetic_data import DAYS, FIRST_DATE, generate_dataset
+
+BASE_MIGRATION = '0001_initial' # схема без индексов сопоставления
+INDEX_MIGRATION = '0002_matching_indexes'
+SUGGESTIONS = 10 # вариантов соответствия на объявление, как AMOUNT_RESULT
+MARKED_SHARE = 0.3 # доля размеченных объявлений
+PAGE_SIZE = 50
+REPEAT = 5 # запусков каждого запроса, берётся медиана
+BULK_SIZE = 10000
+
+
+def load_dataset(data_dir: str,
+                 suggestions: int = SUGGESTIONS,
+                 marked_share: float = MARKED_SHARE,
+                 seed: int = 0) -> int:
+    """
+    Функция загружает синтетический набор (см. generate_dataset) в текущую БД
+    через импорт CSV и создаёт для каждого объявления suggestions вариантов
+    соответствия: правильный товар на случайном месте и случайные товары.
+    Объявления с product_key не больше marked_share от их числа считаются
+    размеченными в день публикации. Возвращает количество объявлений.
+    """
+    rng = random.Random(seed)
+    import_dealers_from_csv(os.path.join(data_dir, 'marketing_dealer.csv'))
+    import_products_from_csv(os.path.join(data_dir, 'marketing_product.csv'))
+    rows = import_prices_from_csv(os.path.join(data_dir, 'marketing_dealerprice.csv')).rows
+
+    # product_id разметки - id из CSV, у повторов артикула в БД остаётся одна строка
+    products_df = pd.read_csv(os.path.join(data_dir, 'marketing_product.csv'), sep=';', dtype={'article': str})
+    article_by_id = dict(zip(products_df['id'], products_df['article']))
+    url_by_key = dict(DealerPrice.objects.values_list('product_key', 'product_url'))
+    articles = list(Product.objects.values_list('article', flat=True))
+    suggestions = min(suggestions, len(articles))
+    with open(os.path.join(data_dir, 'marketing_productdealerkey.csv'), newline='', encoding='utf-8') as file:
+        reader = csv.reader(file, delimiter=';')
+        next(reader)
+        keys = []
+        for _, key, _, product_id in reader:
+            true_article = article_by_id[int(product_id)]
+            options = [article for article in rng.sample(articles, suggestions)
+                       if article != true_article][:suggestions - 1]
+            options.insert(rng.randrange(len(options) + 1), true_article)
+            keys.extend(ProductDealerKey(key_id=url_by_key[int(key)],
+                                         product_id_id=article,
+                                         compliance_number=number,
+                                         score=1.0 - number / suggestions)
+                        for number, article in enumerate(options))
+            if len(keys) >= BULK_SIZE:
+                ProductDealerKey.objects.bulk_create(keys, batch_size=BULK_SIZE)
+                keys = []
+        ProductDealerKey.objects.bulk_create(keys, batch_size=BULK_SIZE)
+
+    marked_keys = int(rows * marked_share)
+    for day in range(DAYS):
+        date = FIRST_DATE + timedelta(days=day)
+        DealerPrice.objects.filter(date=date, product_key__lte=marked_keys).update(
+            marking_date=timezone.make_aware(datetime.combine(date, day_time(12)))
+        )
+    return rows
+
+
+def matching_queries() -> dict[str, Callable[[], QuerySet]]:
+    """
+    Функция возвращает запросы в форме, в которой их выполняют представления
+    и задачи сопоставления. Параметры (дилер, период, товар, страница)
+    берутся из загруженных данных.
+    """
+    dealer_id = DealerPrice.objects.values('dealer_id').annotate(
+        count=Count('product_url')
+    ).order_by('-count').values_list('dealer_id', flat=True).first()
+    period = (FIRST_DATE + timedelta(days=DAYS // 2), FIRST_DATE + timedelta(days=DAYS // 2 + 6))
+    marked_period = [timezone.make_aware(datetime.combine(date, day_time())) for date in period]
+    article = ProductDealerKey.objects.values_list('product_id', flat=True).first()
+    page = list(DealerPrice.objects.order_by('-date', '-product_url')
+                .values_list('date', 'product_url')[PAGE_SIZE:PAGE_SIZE * 2])
+    cursor_date, cursor_url = page[-1]
+    page_urls = [product_url for _, product_url in page]
+    return {
+        # MainView: дилер и период
+        'dealer_period': lambda: DealerPrice.objects.filter(
+            dealer_id=dealer_id, date__range=period
+        ).order_by('-date', '-product_url')[:PAGE_SIZE],
+        # MainView: следующая страница по курсору
+        'page_cursor': lambda: DealerPrice.objects.filter(
+            Q(date__lt=cursor_date) | Q(date=cursor_date, product_url__lt=cursor_url)
+        ).order_by('-date', '-product_url')[:PAGE_SIZE],
+        # MainView: неразмеченные объявления
+        'page_unmarked': lambda: DealerPrice.objects.filter(
+            marking_date__isnull=True
+        ).order_by('-date', '-product_url')[:PAGE_SIZE],
+        # MainView: варианты соответствия страницы (prefetch_related)
+        'page_suggestions': lambda: ProductDealerKey.objects.filter(
+            key__in=page_urls, compliance_number__lt=5
+        ).order_by('compliance_number'),
+        # MatchingOptionsView: варианты товара
+        'product_options': lambda: ProductDealerKey.objects.filter(
+            product_id=article
+        ).order_by('compliance_number'),
+        # статистика: размеченные за период по дилерам
+        'marked_period': lambda: DealerPrice.objects.filter(
+            marking_date__range=marked_period
+        ).values('dealer_id').annotate(count=Count('product_url')),
+    }
+
+
+def measure(queries: dict[str, Callable[[], QuerySet]], repeat: int = REPEAT) -> dict[str, dict]:
+    """
+    Функция возвращает для каждого запроса план (EXPLAIN) и медиану
+    времени выполнения в мс по repeat запускам.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    result = {}
+    for name, query in queries.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(query())
+            timings.append(1000 * (time.perf_counter() - start))
+        result[name] = {'ms': statistics.median(timings), 'plan': query().explain()}
+    return result
+
+
+def benchmark_indexes(rows: int,
+                      dealers_count: int = 18,
+                      repeat: int = REPEAT,
+                      seed: int = 0,
+                      data_dir: Optional[str] = None,
+                      progress: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    Функция сравнивает планы и время запросов сопоставления до и после
+    миграции индексов (INDEX_MIGRATION) на синтетическом наборе из rows
+    объявлений. Используется отдельная тестовая БД (как в тестах Django),
+    рабочая БД не меняется. Если data_dir не задан, набор генерируется
+    во временной директории.
+    """
+    progress = progress or (lambda message: None)
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        call_command('migrate', 'products', BASE_MIGRATION, verbosity=0)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_dir = data_dir or temp_dir
+            if not os.path.exists(os.path.join(data_dir, 'marketing_dealerprice.csv')):
+                progress(f'Генерация {rows} объявлений')
+                generate_dataset('data/marketing_product.csv', data_dir, rows,
+                                 dealers_count=dealers_count,
+                                 marketing_dealer_csv='data/marketing_dealer.csv',
+                                 seed=seed)
+            progress('Загрузка в тестовую БД')
+            rows = load_dataset(data_dir, seed=seed)
+
+        queries = matching_queries()
+        progress('Запросы без индексов')
+        before = measure(queries, repeat)
+        call_command('migrate', 'products', INDEX_MIGRATION, verbosity=0)
+        progress('Запросы с индексами')
+        after = measure(queries, repeat)
+        return {
+            'vendor': connection.vendor,
+            'rows': rows,
+            'suggestions': ProductDealerKey.objects.count(),
+            'queries': {name: {'before': before[name], 'after': after[name]} for name in queries},
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
@@ -0,0 +1,189 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+from itertools import islice
+from typing import Callable, Iterable, Optional, Type
+
+from django.db import transaction
+from django.db.models import Field, Model
+from django.utils import timezone
+from products.models import Dealer, DealerPrice, Product, ProductDealerKey
+
+from ML.main_script import CACHE_DIR
+from ML.snapshot import (EMBEDDINGS, FORMAT_VERSION, MANIFEST, import_pyarrow,
+                         snapshot_versions, write_embeddings)
+
+SNAPSHOT_DIR = 'data/snapshots'
+SNAPSHOT_MODELS = [Dealer, Product, DealerPrice, ProductDealerKey]
+CHUNK_SIZE = 2000 # строк, читаемых из БД за один запрос курсора
+ROW_GROUP_SIZE = 100000 # строк в одной группе строк Parquet
+COMPRESSION = 'zstd'
+
+# типы Arrow для внутренних типов полей Django
+ARROW_TYPES = {
+    'AutoField': 'int32',
+    'IntegerField': 'int32',
+    'SmallIntegerField': 'int16',
+    'PositiveSmallIntegerField': 'int16',
+    'PositiveIntegerField': 'int32',
+    'BigAutoField': 'int64',
+    'BigIntegerField': 'int64',
+    'FloatField': 'float64',
+    'BooleanField': 'bool_',
+    'CharField': 'string',
+    'TextField': 'string',
+}
+
+
+def arrow_type(field: Field):
+    """
+    Функция возвращает тип Arrow для поля модели. Внешний ключ
+    хранится значением поля, на которое он ссылается.
+    """
+    pyarrow = import_pyarrow()
+    if field.is_relation:
+        field = field.target_field
+    internal_type = field.get_internal_type()
+    if internal_type == 'DateField':
+        return pyarrow.date32()
+    if internal_type == 'DateTimeField':
+        return pyarrow.timestamp('us', tz='UTC')
+    return getattr(pyarrow, ARROW_TYPES.get(internal_type, 'string'))()
+
+
+def write_model(model: Type[Model], path: str) -> dict:
+    """
+    Функция записывает таблицу модели в файл Parquet. Строки читаются
+    из БД курсором пачками по CHUNK_SIZE и пишутся группами по ROW_GROUP_SIZE,
+    поэтому расход памяти не зависит от размера таблицы.
+    Столбцы называются как в БД (dealer_id, marked_product_id).
+    Возвращает запись манифеста.
+    """
+    pyarrow = import_pyarrow()
+    fields = model._meta.fields
+    schema = pyarrow.schema([(field.column, arrow_type(field)) for field in fields])
+    rows = model.objects.order_by('pk').values_list(
+        *(field.attname for field in fields)
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+    def batch(chunk: list[tuple]):
+        return pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(column, type) for column, type in zip(zip(*chunk), schema.types)],
+            schema=schema
+        )
+
+    count = 0
+    with pyarrow.parquet.ParquetWriter(path, schema, compression=COMPRESSION) as writer:
+        for chunk in iter(lambda: list(islice(rows, ROW_GROUP_SIZE)), []):
+            writer.write_batch(batch(chunk), row_group_size=ROW_GROUP_SIZE)
+            count += len(chunk)
+    return {
+        'file': os.path.basename(path),
+        'model': model._meta.label,
+        'rows': count,
+        'bytes': os.path.getsize(path),
+        'schema': {field.name: str(field.type) for field in schema},
+    }
+
+
+def create_snapshot(root: str = SNAPSHOT_DIR,
+                    models: Iterable[Type[Model]] = SNAPSHOT_MODELS,
+                    cache_dir: Optional[str] = CACHE_DIR,
+                    progress: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Функция создаёт снимок данных - новую версию в директории root:
+    по файлу Parquet на таблицу, кэши эмбеддингов из cache_dir
+    в файлах Arrow и manifest.json со списком файлов, количеством строк
+    и схемами. Таблицы читаются в одной транзакции. Снимок пишется
+    во временную директорию и появляется в root только целиком.
+    Возвращает директорию снимка.
+    """
+    pyarrow = import_pyarrow()
+    progress = progress or (lambda message: None)
+    os.makedirs(root, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix='.snapshot-', dir=root)
+    try:
+        manifest = {
+            'format': FORMAT_VERSION,
+            'created_at': timezone.now().isoformat(),
+            'pyarrow': pyarrow.__version__,
+            'tables': {},
+            'embeddings': {},
+        }
+        with transaction.atomic():
+            for model in models:
+                name = model._meta.db_table
+                progress(f'Таблица {name}')
+                manifest['tables'][name] = write_model(model, os.path.join(temp_dir, f'{name}.parquet'))
+        if cache_dir:
+            for name in EMBEDDINGS:
+                path = os.path.join(temp_dir, f'{name}.arrow')
+                embeddings = write_embeddings(cache_dir, name, path)
+                if embeddings is not None:
+                    progress(f'Эмбеддинги {name}')
+                    manifest['embeddings'][name] = {'file': os.path.basename(path),
+                                                    'bytes': os.path.getsize(path),
+                                                    **embeddings}
+
+        versions = snapshot_versions(root)
+        number = int(versions[-1]) + 1 if versions else 1
+        manifest['version'] = f'{number:04d}'
+        with open(os.path.join(temp_dir, MANIFEST), 'w', encoding='utf-8') as manifest_file:
+            json.dump(manifest, manifest_file, ensure_ascii=False, indent=2)
+        snapshot_dir = os.path.join(root, manifest['version'])
+        os.rename(temp_dir, snapshot_dir)
+        return snapshot_dir
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
+
+
+def prune_snapshots(root: str = SNAPSHOT_DIR, keep: int = 3) -> list[str]:
+    """
+    Функция удаляет старые снимки, оставляя keep последних.
+    Возвращает удалённые версии.
+    """
+    versions = snapshot_versions(root)
+    removed = versions[:max(len(versions) - keep, 0)]
+    for version in removed:
+        shutil.rmtree(os.path.join(root, version))
+    return removed
+
+
+def csv_to_parquet(path_to_csv: str, path_to_parquet: Optional[str] = None) -> str:
+    """
+    Функция переводит CSV с разделителем ';' (формат загружаемых файлов)
+    в Parquet с теми же столбцами в том же порядке. Значения читаются
+    как строки, пустые - как null; в целые числа переводятся только
+    столбцы, которые записываются обратно без изменений (не '0123'),
+    поэтому импорт файла Parquet даёт те же записи, что и импорт CSV.
+    Возвращает путь к файлу Parquet.
+    """
+    pyarrow = import_pyarrow()
+    path_to_parquet = path_to_parquet or os.path.splitext(path_to_csv)[0] + '.parquet'
+    with open(path_to_csv, newline='', encoding='utf-8') as csv_file:
+        headers = next(csv.reader(csv_file, delimiter=';'))
+    table = pyarrow.csv.read_csv(
+        path_to_csv,
+        parse_options=pyarrow.csv.ParseOptions(delimiter=';'),
+        convert_options=pyarrow.csv.ConvertOptions(
+            column_types={header: pyarrow.string() for header in headers},
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=True
+        )
+    )
+    columns = []
+    for column in table.columns:
+        try:
+            integers = pyarrow.compute.cast(column, pyarrow.int64())
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError):
+            columns.append(column)
+            continue
+        written = pyarrow.compute.cast(integers, pyarrow.string())
+        lossless = pyarrow.compute.all(pyarrow.compute.equal(written, column)).as_py()
+        columns.append(integers if lossless in (True, None) else column)
+    pyarrow.parquet.write_table(pyarrow.table(columns, names=table.column_names),
+                                path_to_parquet, compression=COMPRESSION)
+    return path_to_parquet
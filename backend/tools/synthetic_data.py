@@ -0,0 +1,267 @@
+import csv
+import os
+import random
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, Optional
+
+import pandas as pd
+
+from ML.main_script import ALIAS_COLUMNS
+
+CHUNK_SIZE = 100000 # количество строк, записываемых за один раз
+MAX_NAME_LENGTH = 250 # длина DealerPrice.product_name
+FIRST_DATE = date(2023, 7, 1)
+DAYS = 60 # объявления датируются днями с FIRST_DATE
+
+# слова, которые дилеры добавляют к названию
+INSERTIONS = [
+    'купить', 'в наличии', 'акция', 'хит продаж', 'оригинал', 'доставка', 'скидка',
+    'новинка', 'эффективный', 'профессиональный', 'для дома', 'для дачи', 'арт.',
+    'цена за шт', 'опт', 'быстрая доставка', 'официальный дилер', 'original',
+]
+# кириллические буквы и их латинские двойники
+HOMOGLYPHS = {
+    'а': 'a', 'е': 'e', 'о': 'o', 'р': 'p', 'с': 'c', 'у': 'y', 'х': 'x', 'к': 'k',
+    'А': 'A', 'В': 'B', 'Е': 'E', 'К': 'K', 'М': 'M', 'Н': 'H', 'О': 'O', 'Р': 'P',
+    'С': 'C', 'Т': 'T', 'Х': 'X',
+}
+# транслитерация латинских слов (PROSEPT -> ПРОСЕПТ)
+TRANSLIT = {
+    'a': 'а', 'b': 'б', 'c': 'к', 'd': 'д', 'e': 'е', 'f': 'ф', 'g': 'г', 'h': 'х',
+    'i': 'и', 'j': 'дж', 'k': 'к', 'l': 'л', 'm': 'м', 'n': 'н', 'o': 'о', 'p': 'п',
+    'q': 'к', 'r': 'р', 's': 'с', 't': 'т', 'u': 'у', 'v': 'в', 'w': 'в', 'x': 'кс',
+    'y': 'и', 'z': 'з',
+}
+UNIT_RE = re.compile(r'(?<![\d.,])(\d+(?:[.,]\d+)?)\s*(мл|л|кг|г)(?![а-яёa-z])', re.IGNORECASE)
+LATIN_WORD_RE = re.compile(r'[A-Za-z]{3,}')
+# варианты написания единиц
+UNIT_SPELLINGS = {
+    'мл': ['мл', 'ml', ' мл', ' ml'],
+    'л': ['л', 'l', ' л', ' литр', ' L'],
+    'г': ['г', 'гр', ' г', ' гр', ' g'],
+    'кг': ['кг', 'kg', ' кг', ' KG'],
+}
+UNIT_LARGE = {'мл': 'л', 'г': 'кг'}
+UNIT_SMALL = {large: small for small, large in UNIT_LARGE.items()}
+
+
+@dataclass
+class SyntheticReport:
+    """
+    Счётчики сгенерированного набора: строки объявлений дилеров,
+    дилеры, товары заказчика и пути к файлам.
+    """
+    rows: int = 0
+    dealers: int = 0
+    products: int = 0
+    output_dir: str = ''
+
+
+@dataclass
+class DealerStyle:
+    """
+    Привычки дилера при публикации названий: вероятности искажений,
+    фраза, которую он дописывает к названиям, и сайт.
+    """
+    id: int
+    name: str
+    host: str
+    suffix: str
+    insertion: float
+    unit_rewrite: float
+    mixing: float
+    case: str
+
+
+def _format_number(value: float, rng: random.Random) -> str:
+    text = f'{value:g}'
+    return text.replace('.', ',') if rng.random() < 0.5 else text
+
+
+def rewrite_units(name: str, rng: random.Random) -> str:
+    """
+    Функция переписывает объём и вес в названии эквивалентной записью:
+    1 л -> 1000 мл, 500 г -> 0,5 кг, 5 кг -> 5kg. Значение величины не меняется.
+    """
+    def replace(match: re.Match) -> str:
+        value = float(match.group(1).replace(',', '.'))
+        unit = match.group(2).lower()
+        # 0,5 л -> 500 мл, 750 г -> 0,75 кг
+        if unit in UNIT_SMALL and value < 10 and rng.random() < 0.5:
+            value, unit = value * 1000, UNIT_SMALL[unit]
+        elif unit in UNIT_LARGE and value >= 100 and rng.random() < 0.5:
+            value, unit = value / 1000, UNIT_LARGE[unit]
+        return _format_number(value, rng) + rng.choice(UNIT_SPELLINGS[unit])
+
+    return UNIT_RE.sub(replace, name)
+
+
+def mix_scripts(name: str, rng: random.Random) -> str:
+    """
+    Функция смешивает латиницу и кириллицу: латинские слова (бренды)
+    иногда записываются кириллицей, часть кириллических букв заменяется
+    латинскими двойниками.
+    """
+    if rng.random() < 0.5:
+        name = LATIN_WORD_RE.sub(
+            lambda match: ''.join(TRANSLIT.get(char, char) for char in match.group(0).lower())
+            if rng.random() < 0.5 else match.group(0),
+            name,
+        )
+    return ''.join(HOMOGLYPHS[char] if char in HOMOGLYPHS and rng.random() < 0.1 else char
+                   for char in name)
+
+
+def insert_words(name: str, rng: random.Random, suffix: str = '') -> str:
+    """
+    Функция вставляет в название слова дилеров между словами, в начало или в конец,
+    и дописывает фразу дилера suffix.
+    """
+    words = name.split()
+    for _ in range(rng.randint(1, 2)):
+        # число и единица измерения не разделяются ('5 л')
+        positions = [i for i in range(len(words) + 1) if i == 0 or not words[i - 1][-1].isdigit()]
+        words.insert(rng.choice(positions), rng.choice(INSERTIONS))
+    if suffix:
+        words.append(suffix)
+    return ' '.join(words)
+
+
+def dealer_name(name: str, style: DealerStyle, rng: random.Random) -> str:
+    """
+    Функция получает название объявления дилера из названия товара заказчика
+    с искажениями, характерными для дилера.
+    """
+    if rng.random() < style.unit_rewrite:
+        name = rewrite_units(name, rng)
+    if rng.random() < style.insertion:
+        name = insert_words(name, rng, style.suffix)
+    if rng.random() < style.mixing:
+        name = mix_scripts(name, rng)
+    if style.case == 'upper':
+        name = name.upper()
+    elif style.case == 'lower':
+        name = name.lower()
+    return name[:MAX_NAME_LENGTH].strip()
+
+
+def dealer_styles(dealers_count: int,
+                  rng: random.Random,
+                  dealer_names: Optional[list[tuple[int, str]]] = None) -> list[DealerStyle]:
+    """
+    Функция создаёт дилеров: сначала берутся существующие (id, name),
+    затем добавляются dealer_<id>. У каждого дилера свои вероятности искажений.
+    """
+    dealer_names = list(dealer_names or [])[:dealers_count]
+    next_id = max((dealer_id for dealer_id, _ in dealer_names), default=0) + 1
+    while len(dealer_names) < dealers_count:
+        dealer_names.append((next_id, f'dealer_{next_id}'))
+        next_id += 1
+    return [
+        DealerStyle(id=dealer_id,
+                    name=name,
+                    host=f'dealer{dealer_id}.example.ru',
+                    suffix=rng.choice(['', '', *INSERTIONS]),
+                    insertion=rng.uniform(0.2, 0.9),
+                    unit_rewrite=rng.uniform(0.1, 0.6),
+                    mixing=rng.uniform(0.0, 0.3),
+                    case=rng.choice(['keep', 'keep', 'keep', 'lower', 'upper']))
+        for dealer_id, name in dealer_names
+    ]
+
+
+def generate_dataset(marketing_product_csv: str,
+                     output_dir: str,
+                     rows: int,
+                     dealers_count: int = 18,
+                     marketing_dealer_csv: Optional[str] = None,
+                     seed: int = 0,
+                     sep: str = ';',
+                     chunk_size: int = CHUNK_SIZE,
+                     progress: Optional[Callable[[SyntheticReport], None]] = None) -> SyntheticReport:
+    """
+    Функция генерирует синтетический набор для нагрузочного тестирования
+    в формате исходных CSV: marketing_product.csv (копия каталога),
+    marketing_dealer.csv, marketing_dealerprice.csv на rows объявлений
+    и marketing_productdealerkey.csv с правильным товаром каждого объявления.
+    Названия объявлений получаются из названий товара (name, ozon_name,
+    wb_name, name_1c) вставкой слов, переписыванием единиц и смешением
+    латиницы и кириллицы. Строки пишутся пачками по chunk_size,
+    поэтому расход памяти не зависит от rows. После каждой пачки
+    вызывается progress. При одном seed результат одинаковый.
+    sep - разделитель полей: ';' для импорта в БД, ',' для ML.main_script.result.
+    """
+    rng = random.Random(seed)
+    # все столбцы читаются строками: каталог копируется без изменений,
+    # целые коды с пропусками не превращаются в числа с плавающей точкой
+    products_df = pd.read_csv(marketing_product_csv, sep=';', dtype=str, keep_default_na=False)
+    alias_columns = [column for column in ALIAS_COLUMNS if column in products_df]
+    products = []
+    for product in products_df.to_dict('records'):
+        names = sorted({product[column] for column in alias_columns if product[column].strip()})
+        if names:
+            price = product.get('recommended_price')
+            products.append((int(product['id']), names, float(price) if price else None))
+
+    dealer_names = None
+    if marketing_dealer_csv:
+        dealer_names = list(pd.read_csv(marketing_dealer_csv, sep=';')[['id', 'name']]
+                            .itertuples(index=False, name=None))
+    styles = dealer_styles(dealers_count, rng, dealer_names)
+
+    os.makedirs(output_dir, exist_ok=True)
+    products_df.to_csv(os.path.join(output_dir, 'marketing_product.csv'), sep=sep, index=False)
+    with open(os.path.join(output_dir, 'marketing_dealer.csv'), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file, delimiter=sep)
+        writer.writerow(['id', 'name'])
+        writer.writerows((style.id, style.name) for style in styles)
+
+    report = SyntheticReport(dealers=len(styles), products=len(products), output_dir=output_dir)
+    with open(os.path.join(output_dir, 'marketing_dealerprice.csv'), 'w',
+              newline='', encoding='utf-8') as prices_file, \
+            open(os.path.join(output_dir, 'marketing_productdealerkey.csv'), 'w',
+                 newline='', encoding='utf-8') as keys_file:
+        prices_writer = csv.writer(prices_file, delimiter=sep)
+        keys_writer = csv.writer(keys_file, delimiter=sep)
+        prices_writer.writerow(['id', 'product_key', 'price', 'product_url',
+                                'product_name', 'date', 'dealer_id'])
+        keys_writer.writerow(['id', 'key', 'dealer_id', 'product_id'])
+        while report.rows < rows:
+            prices_rows, keys_rows = [], []
+            for row_id in range(report.rows, min(report.rows + chunk_size, rows)):
+                product_id, names, price = rng.choice(products)
+                style = rng.choice(styles)
+                # product_key уникален в наборе, поэтому и ссылка объявления уникальна
+                product_key = row_id + 1
+                prices_rows.append([
+                    row_id,
+                    product_key,
+                    round(price * rng.uniform(0.8, 1.2), 2) if price else '',
+                    f'https://{style.host}/catalog/{product_key}',
+                    dealer_name(rng.choice(names), style, rng),
+                    FIRST_DATE + timedelta(days=rng.randrange(DAYS)),
+                    style.id,
+                ])
+                keys_rows.append([row_id + 1, product_key, style.id, product_id])
+            prices_writer.writerows(prices_rows)
+            keys_writer.writerows(keys_rows)
+            report.rows += len(prices_rows)
+            if progress is not None:
+                progress(report)
+    return report
+
+
+def generate_validation(marketing_product_csv: str,
+                        output_dir: str,
+                        rows: int,
+                        seed: int = 0) -> tuple[str, str]:
+    """
+    Функция генерирует синтетический набор (см. generate_dataset) для оценки
+    сопоставления, когда размеченных объявлений нет.
+    Возвращает пути к CSV объявлений дилеров и разметки.
+    """
+    generate_dataset(marketing_product_csv, output_dir, rows, seed=seed)
+    return (os.path.join(output_dir, 'marketing_dealerprice.csv'),
+            os.path.join(output_dir, 'marketing_productdealerkey.csv'))